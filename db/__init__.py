@@ -4,7 +4,7 @@ SQLite database files
 import os
 
 from geoalchemy2 import Geometry
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, create_engine
+from sqlalchemy import Column, Integer, SmallInteger, String, Boolean, Float, ForeignKey, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 
 # engine = create_engine('sqlite:///simulation.epi')
@@ -23,15 +23,12 @@ class Humans(Base):
     id = Column(Integer, primary_key=True, index=True)
     uniqueID = Column(String, index=True)
     linkedTo = Column(String)  # Link uniqueID to another uniqueID in table for relationships (sexual transmission)
+    linkedToID = Column(Integer, ForeignKey('Humans.id'))  # Same link by integer id, for integer identity builds
     subregion = Column(String)
     importer = Column(Boolean)
     importDay = Column(Integer)
-    pregnant = Column(String)
-    susceptible = Column(String, index=True)
-    infected = Column(String, index=True)
-    exposed = Column(String, index=True)
-    recovered = Column(String, index=True)
-    #dead = Column(String)
+    pregnant = Column(Boolean)
+    state = Column(SmallInteger, index=True)  # SEIR state code, as in model.arrays. sql/compact-state.sql migrates
     dayOfInf = Column(Integer)
     dayOfExp = Column(Integer)
     geom = Column(Geometry('POINT', srid=2845))
@@ -47,13 +44,10 @@ class Vectors(Base):
     uniqueID = Column(String, index=True)
     subregion = Column(String)
     modified = Column(Boolean)
-    alive = Column(String)
     vector_range = Column(Float)
     birthday = Column(Integer)
     lifetime = Column(Integer)
-    susceptible = Column(String, index=True)
-    infected = Column(String, index=True)
-    removed = Column(String)
+    state = Column(SmallInteger, index=True)  # Unborn/susceptible/infected/removed code, as in model.arrays
     geom = Column(Geometry('POINT', srid=2845))
 
 
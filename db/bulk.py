@@ -0,0 +1,185 @@
+"""
+Bulk table loading. Streams rows with COPY on PostgreSQL through psycopg2 or psycopg 3, and falls back to chunked
+executemany elsewhere.
+"""
+
+import csv
+import io
+
+import numpy as np
+from sqlalchemy import bindparam, func, select, text
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Little-endian EWKB point with the SRID flag set
+EWKB_POINT = np.dtype([('order', 'u1'), ('type', '<u4'), ('srid', '<u4'), ('x', '<f8'), ('y', '<f8')])
+
+
+def ewkb_points(x, y, srid):
+    """
+    Encodes points as hex EWKB, which PostGIS accepts as text input for geometry columns
+    :param x: x coordinates
+    :param y: y coordinates
+    :param srid: spatial reference id
+    :return: list of hex strings
+    """
+
+    points = np.empty(len(x), dtype=EWKB_POINT)
+    points['order'] = 1
+    points['type'] = 0x20000001
+    points['srid'] = srid
+    points['x'] = x
+    points['y'] = y
+
+    raw = points.tobytes()
+    size = EWKB_POINT.itemsize
+
+    return [raw[i:i + size].hex() for i in range(0, len(raw), size)]
+
+
+def ewkt_points(x, y, srid):
+    return ['SRID={0};POINT({1} {2})'.format(srid, a, b) for a, b in zip(x, y)]
+
+
+def _as_list(values):
+    if isinstance(values, np.ndarray):
+        return values.tolist()
+
+    return list(values)
+
+
+def copy_cursor(connection):
+    """
+    :return: DBAPI cursor that can COPY, or None when the database or driver can't. The caller closes it.
+    """
+
+    if connection.dialect.name != 'postgresql':
+        return None
+
+    cursor = connection.connection.cursor()
+    if hasattr(cursor, 'copy_expert') or hasattr(cursor, 'copy'):  # psycopg2, psycopg 3
+        return cursor
+
+    cursor.close()
+    return None
+
+
+def _copy_batch(cursor, table_name, names, columns):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(zip(*columns))
+    buffer.seek(0)
+
+    sql = 'COPY "{0}" ({1}) FROM STDIN WITH (FORMAT csv)'.format(table_name, ', '.join('"{0}"'.format(n)
+                                                                                        for n in names))
+    if hasattr(cursor, 'copy_expert'):
+        cursor.copy_expert(sql, buffer)
+    else:
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+def next_id(connection, table):
+    """
+    :return: first free integer primary key, for writing rows with explicit ids
+    """
+
+    current = connection.execute(select(func.max(table.c.id))).scalar()
+
+    return (current or 0) + 1
+
+
+def reset_sequence(connection, table):
+    """
+    Moves a PostgreSQL serial sequence past ids written explicitly, so later ORM inserts don't collide
+    """
+
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SELECT setval(pg_get_serial_sequence(\'"{0}"\', \'id\'), '
+                                'coalesce(max(id), 1)) FROM "{0}"'.format(table.name)))
+
+
+def load_table(connection, table, columns, geometry=None, srid=2845, batch_size=DEFAULT_BATCH_SIZE,
+               progress=None):
+    """
+    Writes column arrays to a table in batches
+    :param connection: sqlalchemy connection, e.g. session.connection()
+    :param table: sqlalchemy Table
+    :param columns: dict of column name -> sequence of values, all the same length. None is written as NULL.
+    :param geometry: optional (x, y) sequences written to the table's geom column as points
+    :param srid: spatial reference id of the points
+    :param batch_size: rows per COPY or executemany round trip
+    :param progress: optional callback, called as progress(rows_written, total_rows) after each batch
+    :return: number of rows written
+    """
+
+    names = list(columns)
+    values = [_as_list(columns[n]) for n in names]
+    if geometry is not None:
+        names.append('geom')
+    total = len(values[0]) if values else len(geometry[0])
+
+    cursor = copy_cursor(connection)
+
+    try:
+        for start in range(0, total, batch_size):
+            end = min(start + batch_size, total)
+            batch = [v[start:end] for v in values]
+
+            if geometry is not None:
+                x = geometry[0][start:end]
+                y = geometry[1][start:end]
+                batch.append(ewkb_points(x, y, srid) if cursor is not None else ewkt_points(x, y, srid))
+
+            if cursor is not None:
+                _copy_batch(cursor, table.name, names, batch)
+            else:
+                connection.execute(table.insert(), [dict(zip(names, row)) for row in zip(*batch)])
+
+            if progress is not None:
+                progress(end, total)
+    finally:
+        if cursor is not None:  # Chunked generation loads many times over one connection
+            cursor.close()
+
+    return total
+
+
+def update_column(connection, table, column, ids, values, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Sets one column of rows already written, matched by integer id. On PostgreSQL the values are copied into a
+    temporary table and applied with a single UPDATE, so a foreign key on the column is checked once, after every
+    row it can point to exists. Without COPY they are applied with chunked executemany.
+    :param connection: sqlalchemy connection, e.g. session.connection()
+    :param table: sqlalchemy Table with an integer id primary key
+    :param column: name of the column to set
+    :param ids: id of each row to update
+    :param values: new value of each row
+    :param batch_size: rows per COPY or executemany round trip
+    :return: number of rows updated
+    """
+
+    ids = _as_list(ids)
+    values = _as_list(values)
+    cursor = copy_cursor(connection)
+
+    if cursor is not None:
+        staging = '{0}_{1}_update'.format(table.name, column)
+        try:
+            connection.execute(text('CREATE TEMPORARY TABLE "{0}" (id integer PRIMARY KEY, value {1}) ON COMMIT DROP'
+                                    .format(staging, table.c[column].type.compile(connection.dialect))))
+
+            for start in range(0, len(ids), batch_size):
+                _copy_batch(cursor, staging, ['id', 'value'], [ids[start:start + batch_size],
+                                                                 values[start:start + batch_size]])
+        finally:
+            cursor.close()
+
+        connection.execute(text('UPDATE "{0}" t SET "{1}" = s.value FROM "{2}" s WHERE t.id = s.id'.format(
+            table.name, column, staging)))
+    else:
+        update = table.update().where(table.c.id == bindparam('_id')).values({column: bindparam('_value')})
+        for start in range(0, len(ids), batch_size):
+            connection.execute(update, [{'_id': i, '_value': v} for i, v in zip(ids[start:start + batch_size],
+                                                                               values[start:start + batch_size])])
+
+    return len(ids)
@@ -0,0 +1,167 @@
+"""
+Subregion geometry in contiguous NumPy buffers, converted from the subregions shapefile once and cached beside it
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import shapefile
+
+from gis.point_creator import triangle_areas, triangulate
+
+CACHE_SUFFIX = '.geometry.npz'
+CACHE_VERSION = 2
+
+
+def file_digest(filenames):
+    """
+    :return: sha1 hex digest over the contents of the files, in order
+    """
+
+    digest = hashlib.sha1()
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+
+    return digest.hexdigest()
+
+
+class SubregionGeometry(object):
+    """
+    Every subregion polygon in one vertex buffer. Subregion i owns vertices[offsets[i]:offsets[i + 1]] and rings
+    rings[ring_offsets[i]:ring_offsets[i + 1]], where each ring entry is the start of a shapefile part.
+    Its triangulation, for sampling points, is triangles[triangle_offsets[i]:triangle_offsets[i + 1]].
+    """
+
+    def __init__(self, ids, population, area, bbox, vertices, offsets, rings, ring_offsets, triangles=None,
+                 triangle_offsets=None):
+        self.ids = np.asarray(ids, dtype=str)
+        self.population = np.asarray(population, dtype=np.int64)
+        self.area = np.asarray(area, dtype=np.float64)  # Area field of the shapefile
+        self.bbox = np.asarray(bbox, dtype=np.float64).reshape(-1, 4)
+        self.vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.rings = np.asarray(rings, dtype=np.int64)
+        self.ring_offsets = np.asarray(ring_offsets, dtype=np.int64)
+
+        if triangles is None:
+            triangles, triangle_offsets = self.triangulate()
+        self.triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 2)
+        self.triangle_offsets = np.asarray(triangle_offsets, dtype=np.int64)
+        self.triangle_areas = triangle_areas(self.triangles)
+
+    def triangulate(self):
+        """
+        :return: (triangles, triangle_offsets) over every subregion, respecting parts and holes
+        """
+
+        triangles = []
+        for i in range(len(self)):
+            vertices = self.vertices[self.offsets[i]:self.offsets[i + 1]]
+            triangles.append(triangulate(vertices, self.rings[self.ring_offsets[i]:self.ring_offsets[i + 1]] -
+                                         self.offsets[i]))
+
+        offsets = np.zeros(len(triangles) + 1, dtype=np.int64)
+        np.cumsum([t.shape[0] for t in triangles], out=offsets[1:])
+
+        return np.concatenate(triangles or [np.zeros((0, 3, 2))]), offsets
+
+    def __len__(self):
+        return self.ids.shape[0]
+
+    def __getitem__(self, i):
+        """
+        :return: subregion dictionary, as from point_creator.grab_vertices(), over views of the buffers
+        """
+
+        return {
+            'id': str(self.ids[i]),
+            'bbox': self.bbox[i],
+            'vertices': self.vertices[self.offsets[i]:self.offsets[i + 1]],
+            'parts': self.rings[self.ring_offsets[i]:self.ring_offsets[i + 1]] - self.offsets[i],
+            'triangles': self.triangles[self.triangle_offsets[i]:self.triangle_offsets[i + 1]],
+            'triangle_areas': self.triangle_areas[self.triangle_offsets[i]:self.triangle_offsets[i + 1]],
+            'area': float(self.area[i]),
+            'population': int(self.population[i])
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @classmethod
+    def from_shapefile(cls, filename):
+        """
+        Parses a subregions shapefile with pyshp. Fields are read like grab_vertices(): id, population and area
+        in the 2nd, 3rd and 4th columns.
+        """
+
+        sf = shapefile.Reader(filename)
+        ids, population, area, bbox, vertices, rings = [], [], [], [], [], []
+        offsets = [0]
+        ring_offsets = [0]
+
+        for record in sf.shapeRecords():
+            shape = record.shape
+            ids.append(record.record[1])
+            population.append(int(record.record[2] or 0))
+            area.append(float(record.record[3] or 0))
+            bbox.append(shape.bbox)
+            vertices.append(np.asarray(shape.points, dtype=np.float64).reshape(-1, 2))
+            rings.extend(offsets[-1] + part for part in (shape.parts or [0]))
+            offsets.append(offsets[-1] + len(shape.points))
+            ring_offsets.append(len(rings))
+
+        return cls(ids, population, area, bbox, np.concatenate(vertices or [np.zeros((0, 2))]), offsets, rings,
+                   ring_offsets)
+
+    def save(self, filename, **key):
+        np.savez(filename, ids=self.ids, population=self.population, area=self.area, bbox=self.bbox,
+                 vertices=self.vertices, offsets=self.offsets, rings=self.rings, ring_offsets=self.ring_offsets,
+                 triangles=self.triangles, triangle_offsets=self.triangle_offsets, **key)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as cached:
+            return cls(*(cached[name] for name in ('ids', 'population', 'area', 'bbox', 'vertices', 'offsets',
+                                                   'rings', 'ring_offsets', 'triangles', 'triangle_offsets')))
+
+
+def load_geometry(filename, cache=None):
+    """
+    Reads subregion geometry from the cache when it matches the shapefile, and rebuilds the cache otherwise.
+    The cache is keyed by the modification times of the .shp and .dbf files, and by a hash of their contents
+    when the times differ, so touching the files doesn't force a rebuild.
+    :param filename: shapefile path without extension, as given to shapefile.Reader
+    :param cache: cache file, defaults to the shapefile path + '.geometry.npz'
+    :return: SubregionGeometry
+    """
+
+    if cache is None:
+        cache = filename + CACHE_SUFFIX
+
+    sources = [filename + '.shp', filename + '.dbf']
+    mtime = np.array([os.path.getmtime(s) for s in sources])
+
+    if os.path.exists(cache):
+        with np.load(cache) as cached:
+            version = int(cached['version'])
+            cached_mtime = cached['mtime']
+            cached_digest = str(cached['digest'])
+
+        if version == CACHE_VERSION:
+            if np.array_equal(cached_mtime, mtime):
+                return SubregionGeometry.load(cache)
+
+            digest = file_digest(sources)
+            if digest == cached_digest:
+                geometry = SubregionGeometry.load(cache)
+                geometry.save(cache, version=CACHE_VERSION, mtime=mtime, digest=digest)
+                return geometry
+
+    geometry = SubregionGeometry.from_shapefile(filename)
+    geometry.save(cache, version=CACHE_VERSION, mtime=mtime, digest=file_digest(sources))
+
+    return geometry
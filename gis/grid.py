@@ -0,0 +1,108 @@
+"""
+Uniform grid spatial index for batched radius queries on point sets
+"""
+
+import numpy as np
+
+# Neighbouring cells to visit around a query point's own cell
+NEIGHBOURS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+class GridIndex(object):
+    """
+    Points bucketed into square cells. With cells at least as wide as the largest search radius, every point
+    within range of a query lies in the 3 x 3 block of cells around it.
+    """
+
+    def __init__(self, x, y, cell_size):
+        """
+        :param x: point x coordinates
+        :param y: point y coordinates
+        :param cell_size: cell width, in map units. Should be >= the largest query radius.
+        """
+
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.cell_size = float(cell_size)
+        # Cells start at the lowest point, so projected coordinates far from the origin give small cell numbers
+        self.x0 = self.x.min() if self.x.shape[0] else 0.
+        self.y0 = self.y.min() if self.y.shape[0] else 0.
+
+        keys = self.cell_keys(self.x, self.y)
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    def cell_coordinates(self, x, y):
+        return (np.floor((x - self.x0) / self.cell_size).astype(np.int64),
+                np.floor((y - self.y0) / self.cell_size).astype(np.int64))
+
+    @staticmethod
+    def pack(cx, cy):
+        # Cells are addressed by one int64 so a sorted key array can stand in for a hash table
+        return (cx << 32) + cy
+
+    def cell_keys(self, x, y):
+        cx, cy = self.cell_coordinates(x, y)
+
+        return self.pack(cx, cy)
+
+    def neighbourhood(self, x, y):
+        """
+        Where the points of the 3 x 3 block of cells around each query point lie in order
+        :param x: query x coordinates
+        :param y: query y coordinates
+        :return: (first, count) arrays of shape (queries, 9), one column per cell in NEIGHBOURS order
+        """
+
+        cx, cy = self.cell_coordinates(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        keys = np.stack([self.pack(cx + dx, cy + dy) for dx, dy in NEIGHBOURS], axis=1)
+        first = np.searchsorted(self.keys, keys, 'left')
+
+        return first, np.searchsorted(self.keys, keys, 'right') - first
+
+    def query_radius(self, qx, qy, radius, chunk_size=50000):
+        """
+        Finds every indexed point within radius of each query point
+        :param qx: query x coordinates
+        :param qy: query y coordinates
+        :param radius: search radius per query point, or a single radius for all
+        :param chunk_size: query points expanded at once, to bound memory
+        :return: (query position, point position, distance) arrays, one entry per pair within range
+        """
+
+        qx = np.asarray(qx, dtype=np.float64)
+        qy = np.asarray(qy, dtype=np.float64)
+        radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), qx.shape)
+
+        if np.any(radius > self.cell_size):
+            raise ValueError("Search radius {0} is wider than the grid cell size {1}".format(radius.max(),
+                                                                                           self.cell_size))
+
+        found_queries = []
+        found_points = []
+        found_distances = []
+
+        for start in range(0, qx.shape[0], chunk_size):
+            queries = np.arange(start, min(start + chunk_size, qx.shape[0]))
+            cx, cy = self.cell_coordinates(qx[queries], qy[queries])
+
+            for dx, dy in NEIGHBOURS:
+                key = self.pack(cx + dx, cy + dy)
+                first = np.searchsorted(self.keys, key, 'left')
+                counts = np.searchsorted(self.keys, key, 'right') - first
+
+                pair_queries = np.repeat(queries, counts)
+                pair_offsets = np.arange(pair_queries.shape[0]) - np.repeat(np.cumsum(counts) - counts, counts)
+                pair_points = self.order[np.repeat(first, counts) + pair_offsets]
+
+                distance = np.hypot(self.x[pair_points] - qx[pair_queries], self.y[pair_points] - qy[pair_queries])
+                within = distance <= radius[pair_queries]
+
+                found_queries.append(pair_queries[within])
+                found_points.append(pair_points[within])
+                found_distances.append(distance[within])
+
+        if not found_queries:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        return np.concatenate(found_queries), np.concatenate(found_points), np.concatenate(found_distances)
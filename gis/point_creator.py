@@ -3,6 +3,7 @@ Robert Ross Wardrup
 Create points and make sure they're within the subregion polygons.
 """
 
+import numpy as np
 import shapefile
 
 name = "/home/rwardrup/DEV/host-vector-human-model/tarrant_tracts/cartodb_st_clusters"
@@ -37,6 +38,7 @@ def grab_vertices(filename):
         id = shapeRecs[i].record[1:2]
         bbox = shapes[i].bbox
         points = shapeRecs[i].shape.points[:]  # Make a list of all points for the polygon
+        parts = shapeRecs[i].shape.parts[:]  # Start of each ring in points; rings after the first may be holes
         population = shapeRecs[i].record[2:3]
         area = shapeRecs[i].record[3:4]
 
@@ -44,6 +46,7 @@ def grab_vertices(filename):
             'id':           id[0],
             'bbox':         bbox,
             'vertices':     points,
+            'parts':        parts,
             'area':         area[0],
             'population':   population[0]
         }
@@ -52,5 +55,132 @@ def grab_vertices(filename):
 
     return list_of_subregions
 
+def ring_edges(vertices, parts=None):
+    """
+    :param vertices: (M, 2) array of ring vertices, rings one after another
+    :param parts: start of each ring in vertices, as in shapefile parts. Defaults to a single ring.
+    :return: (x1, y1, x2, y2) arrays, one entry per edge, each ring closed on itself
+    """
+
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    starts = np.asarray([0] if parts is None or len(parts) == 0 else parts, dtype=np.int64)
+    ends = np.append(starts[1:], vertices.shape[0])
+
+    # Each vertex connects to the next one in its ring; the last wraps back to the ring's first
+    following = np.arange(1, vertices.shape[0] + 1)
+    following[ends[ends > starts] - 1] = starts[ends > starts]
+
+    return vertices[:, 0], vertices[:, 1], vertices[following, 0], vertices[following, 1]
+
+
+def triangulate(vertices, parts=None):
+    """
+    Splits a polygon into triangles that cover it exactly, with the even-odd rule, so holes
+    and multiple parts come out right. The polygon is cut into horizontal slabs at every vertex height; inside a
+    slab no edges cross, so sorted edges pair off into trapezoids, each split into two triangles.
+    :param vertices: (M, 2) array or list of vertex tuples
+    :param parts: start of each ring in vertices, as in shapefile parts
+    :return: (T, 3, 2) float64 array of triangle corners
+    """
+
+    x1, y1, x2, y2 = ring_edges(vertices, parts)
+
+    keep = y1 != y2
+    x1, y1, x2, y2 = x1[keep], y1[keep], x2[keep], y2[keep]
+    low = np.minimum(y1, y2)
+    high = np.maximum(y1, y2)
+    slope = (x2 - x1) / (y2 - y1)
+
+    levels = np.unique(np.concatenate([y1, y2]))
+    if levels.shape[0] < 2:
+        return np.zeros((0, 3, 2))
+
+    # Every (slab, edge) pair where the edge spans the slab
+    first = np.searchsorted(levels, low)
+    count = np.searchsorted(levels, high) - first
+    edges = np.repeat(np.arange(x1.shape[0]), count)
+    slabs = np.repeat(first, count) + np.arange(edges.shape[0]) - np.repeat(np.cumsum(count) - count, count)
+
+    bottom = levels[slabs]
+    top = levels[slabs + 1]
+    x_bottom = x1[edges] + (bottom - y1[edges]) * slope[edges]
+    x_top = x1[edges] + (top - y1[edges]) * slope[edges]
+
+    order = np.lexsort((x_bottom + x_top, slabs))
+    left = order[0::2]
+    right = order[1::2]
+
+    y0 = bottom[left]
+    y1 = top[left]
+    lower = np.stack([np.stack([x_bottom[left], y0], 1), np.stack([x_bottom[right], y0], 1),
+                      np.stack([x_top[right], y1], 1)], 1)
+    upper = np.stack([np.stack([x_bottom[left], y0], 1), np.stack([x_top[right], y1], 1),
+                      np.stack([x_top[left], y1], 1)], 1)
+
+    return np.concatenate([lower, upper])
+
+
+def triangle_areas(triangles):
+    a = triangles[:, 1] - triangles[:, 0]
+    b = triangles[:, 2] - triangles[:, 0]
+
+    return np.abs(a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]) / 2
+
+
+def sample_triangles(triangles, n, rng=None, areas=None):
+    """
+    Draws n uniform points over a set of triangles: a triangle chosen in proportion to its area, then a uniform
+    point inside it
+    :param triangles: (T, 3, 2) array from triangulate()
+    :param n: number of points to draw
+    :param rng: numpy Generator or RandomState. Defaults to the global numpy random state.
+    :param areas: triangle areas, if already known
+    :return: (n, 2) float64 array of x, y coordinates
+    """
+
+    if rng is None:
+        rng = np.random
+    if areas is None:
+        areas = triangle_areas(triangles)
+
+    if n == 0:
+        return np.empty((0, 2))
+
+    cumulative = np.cumsum(areas)
+    if cumulative.shape[0] == 0 or cumulative[-1] <= 0:
+        raise ValueError("Cannot place points in a polygon with no area")
+
+    chosen = np.minimum(np.searchsorted(cumulative, rng.uniform(0, cumulative[-1], n), 'right'),
+                        cumulative.shape[0] - 1)
+    u = rng.uniform(0, 1, n)
+    v = rng.uniform(0, 1, n)
+
+    # Folding the unit square onto the triangle keeps the draw uniform
+    folded = u + v > 1
+    u[folded] = 1 - u[folded]
+    v[folded] = 1 - v[folded]
+
+    a = triangles[chosen, 0]
+
+    return a + u[:, None] * (triangles[chosen, 1] - a) + v[:, None] * (triangles[chosen, 2] - a)
+
+
+def sample_points(subregion, n, rng=None):
+    """
+    Draws n uniform random points inside a subregion polygon in one call, without rejection. Uses the subregion's
+    cached triangulation when it has one, and triangulates its rings otherwise.
+    :param subregion: subregion dictionary from grab_vertices() or a SubregionGeometry
+    :param n: number of points to draw
+    :param rng: numpy Generator or RandomState. Defaults to the global numpy random state.
+    :return: (n, 2) float64 array of x, y coordinates
+    """
+
+    triangles = subregion.get('triangles')
+    if triangles is None:
+        triangles = triangulate(subregion['vertices'], subregion.get('parts'))
+
+    return sample_triangles(triangles, n, rng, subregion.get('triangle_areas'))
+
+
 if __name__ == '__main__':
     shapefile_reader()
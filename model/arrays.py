@@ -0,0 +1,155 @@
+"""
+Columnar (struct-of-arrays) stores for the host and vector populations.
+One NumPy array per attribute, indexed by dense position, so a million hosts fit in a few tens of megabytes.
+"""
+
+import numpy as np
+
+# Host SEIR state codes
+SUSCEPTIBLE = 0
+EXPOSED = 1
+INFECTED = 2
+RECOVERED = 3
+DEAD = 4
+HOST_STATES = 5
+
+# Vector state codes. Vectors are alive while SUSCEPTIBLE or INFECTED.
+UNBORN = 0
+VECTOR_SUSCEPTIBLE = 1
+VECTOR_INFECTED = 2
+REMOVED = 3
+VECTOR_STATES = 4
+
+NO_PARTNER = -1
+NO_IMPORT = -1
+
+
+def host_state(susceptible, exposed, infected, recovered):
+    """
+    Collapses the 'True'/'False' status columns of a Humans row into one state code
+    """
+
+    if recovered == 'True':
+        return RECOVERED
+    if infected == 'True':
+        return INFECTED
+    if exposed == 'True':
+        return EXPOSED
+    if susceptible == 'True':
+        return SUSCEPTIBLE
+
+    return DEAD
+
+
+def vector_state(alive, susceptible, infected, removed):
+    """
+    Collapses the 'True'/'False' status columns of a Vectors row into one state code
+    """
+
+    if removed == 'True':
+        return REMOVED
+    if infected == 'True':
+        return VECTOR_INFECTED
+    if alive == 'True' or susceptible == 'True':
+        return VECTOR_SUSCEPTIBLE
+
+    return UNBORN
+
+
+class HostArrays(object):
+    """
+    Host population as one array per attribute
+    """
+
+    def __init__(self, size, subregions=()):
+        """
+        :param size: number of hosts
+        :param subregions: subregion ids; host.subregion holds positions into this list
+        """
+
+        self.subregions = list(subregions)
+        self.id = np.zeros(size, dtype=np.int32)  # Primary key in the Humans table
+        self.state = np.zeros(size, dtype=np.uint8)
+        self.day_of_exp = np.zeros(size, dtype=np.int16)
+        self.day_of_inf = np.zeros(size, dtype=np.int16)
+        self.import_day = np.full(size, NO_IMPORT, dtype=np.int16)
+        self.subregion = np.zeros(size, dtype=np.int32)
+        self.partner = np.full(size, NO_PARTNER, dtype=np.int32)  # Position of linked spouse
+        self.x = np.zeros(size, dtype=np.float64)
+        self.y = np.zeros(size, dtype=np.float64)
+
+    def __len__(self):
+        return self.state.shape[0]
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, a).nbytes for a in self.columns())
+
+    @staticmethod
+    def columns():
+        return ['id', 'state', 'day_of_exp', 'day_of_inf', 'import_day', 'subregion', 'partner', 'x', 'y']
+
+    @staticmethod
+    def mutable_columns():
+        # Columns a run writes to; the rest stay fixed from load to report
+        return ['state', 'day_of_exp', 'day_of_inf']
+
+    def counts(self):
+        """
+        :return: (subregions, HOST_STATES) array of host counts
+        """
+
+        key = self.subregion.astype(np.int64) * HOST_STATES + self.state
+        counts = np.bincount(key, minlength=len(self.subregions) * HOST_STATES)
+
+        return counts.reshape(len(self.subregions), HOST_STATES)
+
+
+class VectorArrays(object):
+    """
+    Vector population as one array per attribute
+    """
+
+    def __init__(self, size, subregions=()):
+        """
+        :param size: number of vectors
+        :param subregions: subregion ids, shared with the host store
+        """
+
+        self.subregions = list(subregions)
+        self.id = np.zeros(size, dtype=np.int32)  # Primary key in the vectors table
+        self.state = np.zeros(size, dtype=np.uint8)
+        self.birthday = np.zeros(size, dtype=np.int16)
+        self.lifetime = np.zeros(size, dtype=np.int16)
+        self.subregion = np.zeros(size, dtype=np.int32)
+        self.range = np.zeros(size, dtype=np.float32)
+        self.x = np.zeros(size, dtype=np.float64)
+        self.y = np.zeros(size, dtype=np.float64)
+
+    def __len__(self):
+        return self.state.shape[0]
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, a).nbytes for a in self.columns())
+
+    @staticmethod
+    def columns():
+        return ['id', 'state', 'birthday', 'lifetime', 'subregion', 'range', 'x', 'y']
+
+    @staticmethod
+    def mutable_columns():
+        return ['state']
+
+    def alive(self):
+        return (self.state == VECTOR_SUSCEPTIBLE) | (self.state == VECTOR_INFECTED)
+
+    def counts(self):
+        """
+        :return: (subregions, VECTOR_STATES) array of vector counts
+        """
+
+        key = self.subregion.astype(np.int64) * VECTOR_STATES + self.state
+        counts = np.bincount(key, minlength=len(self.subregions) * VECTOR_STATES)
+
+        return counts.reshape(len(self.subregions), VECTOR_STATES)
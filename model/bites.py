@@ -0,0 +1,195 @@
+"""
+Batched vector-bite kernel. All of a day's bites are drawn, capped and resolved as whole arrays.
+"""
+
+import numpy as np
+
+from model.arrays import SUSCEPTIBLE, EXPOSED, INFECTED, VECTOR_SUSCEPTIBLE, VECTOR_INFECTED
+from model.links import GridLinks, LinkGraph
+
+# Rounds of picking from a vector's grid block before its bite falls back to listing the hosts in range
+GRID_TRIES = 8
+
+
+def draw_bites(biters, biting_rate, vector_subregion, host_order, host_offsets, rng):
+    """
+    Draws biting_rate targets for every biting vector, uniformly among the hosts of the vector's subregion
+    :param biters: positions of alive vectors
+    :param biting_rate: bites per vector per day
+    :param vector_subregion: subregion position of every vector
+    :param host_order: host positions sorted by subregion
+    :param host_offsets: CSR offsets into host_order
+    :param rng: numpy Generator
+    :return: (vector, host) position arrays, one entry per bite
+    """
+
+    s = vector_subregion[biters]
+    available = host_offsets[s + 1] - host_offsets[s]
+    biters = biters[available > 0]  # Nobody to bite here
+    start = host_offsets[s][available > 0]
+    available = available[available > 0]
+
+    bite_vectors = np.repeat(biters, biting_rate)
+    pick = (rng.random(bite_vectors.shape[0]) * np.repeat(available, biting_rate)).astype(np.int64)
+    bite_hosts = host_order[np.repeat(start, biting_rate) + pick]
+
+    return bite_vectors, bite_hosts
+
+
+def draw_linked_bites(biters, biting_rate, links, rng):
+    """
+    Draws biting_rate targets for every biting vector among the hosts linked to it, uniformly or by link weight
+    :param biters: positions of alive vectors
+    :param biting_rate: bites per vector per day
+    :param links: LinkGraph
+    :param rng: numpy Generator
+    :return: (vector, host) position arrays, one entry per bite
+    """
+
+    start = links.offsets[biters]
+    end = links.offsets[biters + 1]
+    linked = end > start  # Nobody within range
+    biters, start, end = biters[linked], start[linked], end[linked]
+
+    bite_vectors = np.repeat(biters, biting_rate)
+    start = np.repeat(start, biting_rate)
+    end = np.repeat(end, biting_rate)
+    draw = rng.random(bite_vectors.shape[0])
+
+    if links.cumulative is None:
+        pick = start + (draw * (end - start)).astype(np.int64)
+    else:
+        # One binary search per bite into the running weight sum, kept inside the vector's own row
+        cumulative = links.cumulative
+        base = np.where(start > 0, cumulative[np.maximum(start - 1, 0)], 0.)
+        target = base + draw * (cumulative[end - 1] - base)
+        pick = np.clip(np.searchsorted(cumulative, target, 'right'), start, end - 1)
+
+    return bite_vectors, links.hosts[pick]
+
+
+def draw_grid_bites(biters, biting_rate, links, rng, tries=GRID_TRIES):
+    """
+    Draws biting_rate targets for every biting vector among the hosts in range, with the same distribution as
+    draw_linked_bites() over a LinkGraph of the same links. Each round picks a host uniformly from the vector's
+    3 x 3 block of grid cells and keeps it if in range, with chance exp(-distance / scale) when weighted. Bites
+    still unplaced after the last round list their vectors' hosts in range and draw from those.
+    :param biters: positions of alive vectors
+    :param biting_rate: bites per vector per day
+    :param links: GridLinks
+    :param rng: numpy Generator
+    :param tries: rounds before falling back
+    :return: (vector, host) position arrays, one entry per bite
+    """
+
+    grid = links.grid
+    vectors = links.vectors
+
+    biters = biters[links.candidates(biters) > 0]  # No hosts anywhere near
+    bite_vectors = np.repeat(biters, biting_rate)
+    bite_hosts = np.zeros(bite_vectors.shape[0], dtype=np.int64)
+    pending = np.arange(bite_vectors.shape[0])
+
+    for _ in range(tries):
+        if pending.shape[0] == 0:
+            break
+
+        v = bite_vectors[pending]
+        cumulative = links.cumulative[v]
+        pick = (rng.random(v.shape[0]) * cumulative[:, -1]).astype(np.int64)
+        cell = (pick[:, None] >= cumulative).sum(axis=1)
+        host = grid.order[links.start[v, cell] + pick]
+
+        distance = np.hypot(grid.x[host] - vectors.x[v], grid.y[host] - vectors.y[v])
+        kept = distance <= vectors.range[v]
+        if links.distance_scale is not None:
+            kept &= rng.random(v.shape[0]) < np.exp(-distance / links.distance_scale)
+
+        bite_hosts[pending[kept]] = host[kept]
+        pending = pending[~kept]
+
+    if pending.shape[0] == 0:
+        return bite_vectors, bite_hosts
+
+    placed = np.ones(bite_vectors.shape[0], dtype=bool)
+    placed[pending] = False
+
+    # Vectors with few of their block's hosts in range, or none
+    unplaced, local = np.unique(bite_vectors[pending], return_inverse=True)
+    graph = LinkGraph(*grid.query_radius(vectors.x[unplaced], vectors.y[unplaced], vectors.range[unplaced]),
+                      vector_count=unplaced.shape[0], distance_scale=links.distance_scale)
+    fallback_vectors, fallback_hosts = draw_linked_bites(local.ravel(), 1, graph, rng)
+
+    return (np.concatenate([bite_vectors[placed], unplaced[fallback_vectors]]),
+            np.concatenate([bite_hosts[placed], fallback_hosts]))
+
+
+def enforce_bite_limit(bite_hosts, bite_count, bite_limit, rng):
+    """
+    Bites arrive in random order; once a host has been bitten bite_limit times today, later bites on it are lost
+    :param bite_hosts: host position of each bite
+    :param bite_count: per-host bites already taken today. Updated in place.
+    :param bite_limit: maximum bites per host per day
+    :param rng: numpy Generator
+    :return: indexes of the bites that land
+    """
+
+    arrival = rng.permutation(bite_hosts.shape[0])
+    by_host = arrival[np.argsort(bite_hosts[arrival], kind='stable')]
+    hosts_sorted = bite_hosts[by_host]
+
+    # Rank of each bite among the bites on the same host
+    first = np.ones(hosts_sorted.shape[0], dtype=bool)
+    first[1:] = hosts_sorted[1:] != hosts_sorted[:-1]
+    group_start = np.maximum.accumulate(np.where(first, np.arange(hosts_sorted.shape[0]), 0))
+    rank = np.arange(hosts_sorted.shape[0]) - group_start
+
+    landed = by_host[rank < bite_limit - bite_count[hosts_sorted]]
+    np.add.at(bite_count, bite_hosts[landed], 1)
+
+    return np.sort(landed)
+
+
+def vector_bites(state, params, host_index=None):
+    """
+    Resolves one day of vector-host contact. Infected vectors expose susceptible hosts with chance BETA;
+    susceptible vectors pick up the infection from infected hosts with chance TAU. Vectors bite within their
+    subregion, or within range when the state has a LinkGraph or GridLinks.
+    :param state: SimulationState
+    :param params: dict of epidemic parameters
+    :param host_index: SubregionIndex of where hosts are during the day, defaults to their home subregions
+    """
+
+    hosts = state.hosts
+    vectors = state.vectors
+    rng = state.rng
+
+    state.bite_count[:] = 0
+    biters = np.flatnonzero(vectors.alive())
+
+    if host_index is None:
+        host_index = state.host_index
+
+    if state.links is None:
+        bite_vectors, bite_hosts = draw_bites(biters, params['BITING_RATE'], vectors.subregion,
+                                              host_index.order, host_index.offsets, rng)
+    elif isinstance(state.links, GridLinks):
+        bite_vectors, bite_hosts = draw_grid_bites(biters, params['BITING_RATE'], state.links, rng)
+    else:
+        bite_vectors, bite_hosts = draw_linked_bites(biters, params['BITING_RATE'], state.links, rng)
+    landed = enforce_bite_limit(bite_hosts, state.bite_count, params['BITE_LIMIT'], rng)
+    bite_vectors = bite_vectors[landed]
+    bite_hosts = bite_hosts[landed]
+
+    # Both directions read the states from before today's bites
+    host_state = hosts.state[bite_hosts]
+    vector_state = vectors.state[bite_vectors]
+    chance = rng.random(bite_hosts.shape[0])
+
+    exposing = (host_state == SUSCEPTIBLE) & (vector_state == VECTOR_INFECTED) & (chance < params['BETA'])
+    infecting = (host_state == INFECTED) & (vector_state == VECTOR_SUSCEPTIBLE) & (chance < params['TAU'])
+
+    newly_exposed = np.unique(bite_hosts[exposing])
+    hosts.state[newly_exposed] = EXPOSED
+    vectors.state[bite_vectors[infecting]] = VECTOR_INFECTED
+    state.total_exposed += newly_exposed.shape[0]
@@ -0,0 +1,180 @@
+"""
+Checkpoints of a running simulation. Only what changes during a run is saved: the mutable host and vector columns,
+the generator state, the exposure total and the log buffer. Everything else is rebuilt from the loaded tables.
+"""
+
+import json
+import os
+
+import numpy as np
+
+CHECKPOINT_FILE = 'checkpoint.json'
+
+
+class Checkpoint(object):
+    """
+    Directory of memory-mapped .npy files written in place. Columns alternate between two slots, and
+    checkpoint.json names the last complete one only after its arrays are flushed, so a crash mid-write leaves the
+    previous checkpoint intact. Log rows never change once recorded, so only the new days are written.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta_file = os.path.join(directory, CHECKPOINT_FILE)
+        self._maps = {}
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.meta = None
+        if os.path.exists(self.meta_file):
+            with open(self.meta_file) as f:
+                self.meta = json.load(f)
+
+    def exists(self):
+        return self.meta is not None
+
+    @staticmethod
+    def columns(state):
+        """
+        :return: dict of file name -> array, for every column a run writes to
+        """
+
+        columns = dict(('host_' + c, getattr(state.hosts, c)) for c in state.hosts.mutable_columns())
+        columns.update(('vector_' + c, getattr(state.vectors, c)) for c in state.vectors.mutable_columns())
+        if state.dispersal is not None:  # Vectors move; their links are rebuilt from the saved positions
+            columns.update(vector_x=state.vectors.x, vector_y=state.vectors.y)
+
+        return columns
+
+    def _map(self, name, like):
+        # Files are opened once and kept mapped, so each save is a copy into the page cache and a flush
+        mapped = self._maps.get(name)
+        if mapped is not None and mapped.shape == like.shape and mapped.dtype == like.dtype:
+            return mapped
+
+        filename = os.path.join(self.directory, name + '.npy')
+        try:
+            mapped = np.lib.format.open_memmap(filename, mode='r+')
+            if mapped.shape != like.shape or mapped.dtype != like.dtype:
+                raise ValueError
+        except (IOError, ValueError):
+            mapped = np.lib.format.open_memmap(filename, mode='w+', dtype=like.dtype, shape=like.shape)
+
+        self._maps[name] = mapped
+
+        return mapped
+
+    def _read(self, name, like):
+        # Restoring never creates files: a missing or reshaped one means the run changed since the save
+        filename = os.path.join(self.directory, name + '.npy')
+        try:
+            saved = np.lib.format.open_memmap(filename, mode='r')
+        except IOError:
+            raise ValueError("Checkpoint file {0} is missing".format(filename))
+        if saved.shape != like.shape or saved.dtype != like.dtype:
+            raise ValueError("Checkpoint file {0} holds {1} {2}, not {3} {4}".format(
+                filename, saved.shape, saved.dtype, like.shape, like.dtype))
+
+        return saved
+
+    def save(self, state, day, log=None):
+        """
+        :param state: SimulationState
+        :param day: next day to simulate
+        :param log: optional LogBuffer
+        """
+
+        slot = 0 if self.meta is None else 1 - self.meta['slot']
+        columns = self.columns(state)
+
+        for name, values in columns.items():
+            mapped = self._map('{0}.{1}'.format(name, slot), values)
+            mapped[:] = values
+            mapped.flush()
+
+        meta = {
+            'day': day,
+            'slot': slot,
+            'hosts': len(state.hosts),
+            'vectors': len(state.vectors),
+            'columns': sorted(columns),
+            'total_exposed': int(state.total_exposed),
+            'rng': state.rng.bit_generator.state
+        }
+
+        if log is not None:
+            mapped = self._map('log', log.counts)
+            written = 0 if self.meta is None else self.meta.get('log_recorded', 0)
+            mapped[written:log.recorded] = log.counts[written:log.recorded]
+            mapped.flush()
+            meta['log_shape'] = list(log.counts.shape)
+            meta['log_recorded'] = log.recorded
+            meta['log_flushed'] = log.flushed
+
+        self._write_meta(meta)
+
+    def _write_meta(self, meta):
+        with open(self.meta_file + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(self.meta_file + '.tmp', self.meta_file)
+        self.meta = meta
+
+    def mark_flushed(self, flushed):
+        """
+        Records log days written out since the last save, so a resumed run doesn't write them again
+        :param flushed: LogBuffer.flushed, at most the checkpoint's recorded days
+        """
+
+        self._write_meta(dict(self.meta, log_flushed=min(flushed, self.meta.get('log_recorded', 0))))
+
+    def restore(self, state, log=None):
+        """
+        Puts a freshly built SimulationState (and LogBuffer) back where the last checkpoint left them
+        :param state: SimulationState over the same loaded population, with a generator of the same kind
+        :param log: optional LogBuffer of the same shape
+        :return: next day to simulate
+        :raises ValueError: if the checkpoint doesn't match the state or log, or any of its files is missing
+        """
+
+        meta = self.meta
+        if meta is None:
+            raise ValueError("No checkpoint in {0}".format(self.directory))
+        if meta['hosts'] != len(state.hosts) or meta['vectors'] != len(state.vectors):
+            raise ValueError("Checkpoint is for {0} hosts and {1} vectors, not {2} and {3}".format(
+                meta['hosts'], meta['vectors'], len(state.hosts), len(state.vectors)))
+
+        columns = self.columns(state)
+        if sorted(columns) != meta['columns']:
+            raise ValueError("Checkpoint saved columns {0}, not {1}".format(
+                ', '.join(meta['columns']), ', '.join(sorted(columns))))
+        if log is not None and 'log_recorded' in meta and meta['log_shape'] != list(log.counts.shape):
+            raise ValueError("Checkpoint log is {0}, not {1}".format(tuple(meta['log_shape']), log.counts.shape))
+
+        saved = dict((name, self._read('{0}.{1}'.format(name, meta['slot']), values))
+                     for name, values in columns.items())
+        if log is not None and 'log_recorded' in meta:
+            saved['log'] = self._read('log', log.counts)
+
+        for name, values in columns.items():
+            values[:] = saved[name]
+
+        if state.dispersal is not None and state.links is not None:
+            state.links = state.dispersal.links(state.vectors)
+
+        state.rng.bit_generator.state = meta['rng']
+        state.total_exposed = meta['total_exposed']
+
+        if log is not None and 'log_recorded' in meta:
+            log.counts[:meta['log_recorded']] = saved['log'][:meta['log_recorded']]
+            log.recorded = meta['log_recorded']
+            log.flushed = meta['log_flushed']
+
+        return meta['day']
+
+    def clear(self):
+        # Run finished; the next run starts from scratch
+        self._maps = {}
+        self.meta = None
+        if os.path.exists(self.meta_file):
+            os.remove(self.meta_file)
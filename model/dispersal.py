@@ -0,0 +1,75 @@
+"""
+Daily vector dispersal. Alive vectors take a random-walk step, and only the vectors that cross into another grid
+cell are bucketed again.
+"""
+
+import numpy as np
+
+from gis.grid import GridIndex
+from model.links import GridLinks
+
+
+class VectorDispersal(object):
+    """
+    Gaussian random walk clipped to the study area. Hosts don't move, so the host grid is built once. Vectors bite
+    through GridLinks over it, which find hosts in range at bite time, so a move costs a cell lookup rather than a
+    range query. Vectors bite that way since moving doesn't change their subregion.
+    """
+
+    def __init__(self, hosts, vectors, distance, chance=1., bounds=None, distance_scale=None):
+        """
+        :param hosts: HostArrays
+        :param vectors: VectorArrays
+        :param distance: standard deviation of a day's step along each axis, in map units
+        :param chance: daily chance that an alive vector moves at all
+        :param bounds: (x_min, y_min, x_max, y_max) of the study area. Defaults to the extent of the hosts.
+        :param distance_scale: distance weighting scale for bite targets, as in LinkGraph
+        """
+
+        if bounds is None:
+            bounds = (hosts.x.min(), hosts.y.min(), hosts.x.max(), hosts.y.max())
+
+        self.distance = distance
+        self.chance = chance
+        self.bounds = bounds
+        self.distance_scale = distance_scale
+
+        # Cells as wide as the longest vector range, as in build_range_links()
+        self.grid = GridIndex(hosts.x, hosts.y, max(float(vectors.range.max(initial=0)), 1.))
+
+    def links(self, vectors):
+        """
+        :return: GridLinks over every vector's current position
+        """
+
+        return GridLinks(self.grid, vectors, self.distance_scale)
+
+    def step(self, state):
+        """
+        Moves alive vectors and re-buckets the ones that changed cell
+        :param state: SimulationState with the GridLinks from links()
+        :return: positions of the vectors that moved
+        """
+
+        vectors = state.vectors
+        alive = np.flatnonzero(vectors.alive())
+        moved = alive[state.rng.random(alive.shape[0]) < self.chance]
+        x = vectors.x[moved]
+        y = vectors.y[moved]
+
+        x_min, y_min, x_max, y_max = self.bounds
+        step = state.rng.normal(0, self.distance, (moved.shape[0], 2))
+        vectors.x[moved] = np.clip(x + step[:, 0], x_min, x_max)
+        vectors.y[moved] = np.clip(y + step[:, 1], y_min, y_max)
+        changed = state.links.update(moved)
+
+        # Steps into cells with no host anywhere around, e.g. out of the tracts into a corner of the bounds, aren't
+        # taken. Vectors that stay in their cell keep the block they already had.
+        stranded = np.zeros(len(vectors), dtype=bool)
+        stranded[changed[state.links.candidates(changed) == 0]] = True
+        back = stranded[moved]
+        vectors.x[moved[back]] = x[back]
+        vectors.y[moved[back]] = y[back]
+        state.links.update(moved[back])
+
+        return moved[~back]
@@ -0,0 +1,143 @@
+"""
+Daily SEIR step over the columnar population stores
+"""
+
+import numpy as np
+
+from model.arrays import SUSCEPTIBLE, EXPOSED, INFECTED, RECOVERED, DEAD, NO_PARTNER
+from model.bites import vector_bites
+from model.index import SubregionIndex
+from model.schedule import VectorSchedule
+
+# Epidemic parameters step_day() reads; anything else in a parameter dict has no effect on a run
+PARAMETERS = ('CAUSES_DEATH', 'DEATH_CHANCE', 'BETA', 'KAPPA', 'TAU', 'INFECTIOUS_PERIOD', 'LATENT_PERIOD',
+              'CONTACT_RATE', 'BITE_LIMIT', 'BITING_RATE')
+
+
+class SimulationState(object):
+    """
+    Everything that changes from day to day during a run
+    """
+
+    def __init__(self, hosts, vectors, rng=None, schedule=None, links=None, dispersal=None, mobility=None):
+        """
+        :param hosts: HostArrays
+        :param vectors: VectorArrays
+        :param rng: numpy Generator. All random draws of the run come from it.
+        :param schedule: VectorSchedule. Defaults to every vector living out its lifetime, with no season.
+        :param links: optional LinkGraph or GridLinks; vectors then bite only hosts within their range
+        :param dispersal: optional VectorDispersal, moving alive vectors at the end of each day. Needs the GridLinks
+                          from its links().
+        :param mobility: optional HostMobility; vectors then bite hosts where they spend the day
+        """
+
+        if dispersal is not None and links is None:
+            raise ValueError("Vector dispersal needs range links; bites by subregion don't see vectors move")
+
+        if schedule is None:
+            days = int((vectors.birthday.astype(np.int64) + vectors.lifetime).max(initial=0)) + 1
+            schedule = VectorSchedule(vectors.birthday, vectors.lifetime, days)
+
+        self.hosts = hosts
+        self.vectors = vectors
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.schedule = schedule
+        self.links = links
+        self.dispersal = dispersal
+        self.mobility = mobility
+        self.couples = couples_from_partners(hosts.partner)
+        self.host_index = SubregionIndex(hosts.subregion, len(vectors.subregions))
+        self.vector_index = SubregionIndex(vectors.subregion, len(vectors.subregions))
+        self.bite_count = np.zeros(len(hosts), dtype=np.int16)
+        self.total_exposed = 0
+
+
+def progress_hosts(state, day, params):
+    """
+    Import, latent -> infectious and infectious -> recovered/dead transitions, as masked array updates
+    """
+
+    hosts = state.hosts
+    rng = state.rng
+
+    importing = np.flatnonzero((hosts.state == SUSCEPTIBLE) & (hosts.import_day == day))
+    hosts.state[importing] = np.where(rng.random(importing.shape[0]) < .5, INFECTED, EXPOSED)
+
+    becoming_infectious = (hosts.state == EXPOSED) & (hosts.day_of_exp >= params['LATENT_PERIOD'])
+    hosts.state[becoming_infectious] = INFECTED
+
+    resolving = np.flatnonzero((hosts.state == INFECTED) & (hosts.day_of_inf >= params['INFECTIOUS_PERIOD']))
+    if params['CAUSES_DEATH']:
+        hosts.state[resolving] = np.where(rng.random(resolving.shape[0]) < params['DEATH_CHANCE'], DEAD, RECOVERED)
+    else:
+        hosts.state[resolving] = RECOVERED
+
+
+def couples_from_partners(partner):
+    """
+    Lists every couple once, whether the partner links are symmetric or only run one way
+    :param partner: partner position of every host, NO_PARTNER for none
+    :return: (couples, 2) int32 array of host positions
+    """
+
+    linked = np.flatnonzero(partner != NO_PARTNER)
+    a = np.minimum(linked, partner[linked]).astype(np.int64)
+    b = np.maximum(linked, partner[linked]).astype(np.int64)
+    couples = np.unique(a * partner.shape[0] + b)
+
+    return np.stack([couples // partner.shape[0], couples % partner.shape[0]], axis=1).astype(np.int32)
+
+
+def partner_contacts(state, params):
+    """
+    Spouse contacts, resolved for all couples at once from the in-memory partner index. The infection can go
+    either way within a couple; over CONTACT_RATE contacts a day it passes with chance 1 - (1 - KAPPA)^CONTACT_RATE.
+    """
+
+    hosts = state.hosts
+    a = state.couples[:, 0]
+    b = state.couples[:, 1]
+    state_a = hosts.state[a]
+    state_b = hosts.state[b]
+
+    discordant = np.flatnonzero(((state_a == INFECTED) & (state_b == SUSCEPTIBLE)) |
+                                ((state_a == SUSCEPTIBLE) & (state_b == INFECTED)))
+
+    chance = 1 - (1 - params['KAPPA']) ** params['CONTACT_RATE']
+    transmitting = discordant[state.rng.random(discordant.shape[0]) < chance]
+
+    exposed = np.where(state_a[transmitting] == SUSCEPTIBLE, a[transmitting], b[transmitting])
+    hosts.state[exposed] = EXPOSED
+    state.total_exposed += exposed.shape[0]
+
+
+def step_day(state, day, params):
+    """
+    Advances the whole population by one day
+    :param state: SimulationState
+    :param day: day being simulated
+    :param params: dict of epidemic parameters, keyed like the module constants in simulation.py
+    :return: (subregions, HOST_STATES) host counts and (subregions, VECTOR_STATES) vector counts
+    """
+
+    hosts = state.hosts
+    vectors = state.vectors
+
+    state.schedule.hatch(vectors, day)
+
+    progress_hosts(state, day, params)
+    partner_contacts(state, params)
+    # Couples meet at home; bites happen wherever hosts spend the day
+    if state.mobility is None:
+        vector_bites(state, params)
+    else:
+        vector_bites(state, params, state.mobility.index(day, state.host_index))
+
+    state.schedule.expire(vectors, day)
+    if state.dispersal is not None:
+        state.dispersal.step(state)
+
+    hosts.day_of_exp[hosts.state == EXPOSED] += 1
+    hosts.day_of_inf[hosts.state == INFECTED] += 1
+
+    return hosts.counts(), vectors.counts()
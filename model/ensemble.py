@@ -0,0 +1,232 @@
+"""
+Monte Carlo ensembles: many stochastic replicates over one loaded population, summarised as quantile bands
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from model.arrays import HostArrays, VectorArrays, NO_PARTNER
+from model.engine import SimulationState, step_day
+from model.logbuffer import LogBuffer, LOG_COLUMNS
+from model.schedule import VectorSchedule
+from model.shared import SharedColumns, publish_store, view_store
+
+QUANTILES = (.05, .25, .5, .75, .95)
+
+# Population a worker process serves replicates from, set by attach_population()
+_population = None
+
+
+def stack_store(cls, columns, subregions, copies):
+    """
+    Tiles a store so several replicates run as one population. Copy r gets subregions offset by r * subregions,
+    so bites and spouse links never cross replicates.
+    :param cls: HostArrays or VectorArrays
+    :param columns: dict with an array for every column of cls
+    :param subregions: subregion ids of one copy
+    :param copies: number of replicates
+    :return: store of cls, copies x the size
+    """
+
+    size = columns['state'].shape[0]
+    store = cls(size * copies, list(subregions) * copies)
+    for column in cls.columns():
+        getattr(store, column)[:] = np.tile(columns[column], copies)
+
+    replicate = np.repeat(np.arange(copies, dtype=np.int32), size)
+    store.subregion += replicate * len(subregions)
+    if cls is HostArrays:
+        linked = store.partner != NO_PARTNER
+        store.partner[linked] += replicate[linked] * size
+
+    return store
+
+
+def attach_population(host_spec, vector_spec, initial_spec, subregions, params, days, season_start, season_end):
+    """
+    Pool initializer. Maps the published population once per worker process.
+    """
+
+    global _population
+
+    _population = (SharedColumns.attach(host_spec), SharedColumns.attach(vector_spec),
+                   SharedColumns.attach(initial_spec), subregions, params, days, season_start, season_end)
+
+
+def run_batch(copies, seed, params=None):
+    """
+    Runs replicates from the attached population. One replicate runs on zero-copy views; several are stacked
+    along the population axis and stepped together.
+    :param copies: number of replicates in the batch
+    :param seed: SeedSequence for the batch
+    :param params: epidemic parameters for the batch, defaults to the ones the population was attached with
+    :return: (copies, days + 1, subregions, LOG_COLUMNS) counts
+    """
+
+    shared_hosts, shared_vectors, initial, subregions, default_params, days, season_start, season_end = _population
+    params = default_params if params is None else params
+
+    host_columns = dict(shared_hosts.arrays)
+    vector_columns = dict(shared_vectors.arrays)
+    for column in HostArrays.mutable_columns():
+        host_columns[column] = initial.arrays['host_' + column].copy()
+    for column in VectorArrays.mutable_columns():
+        vector_columns[column] = initial.arrays['vector_' + column].copy()
+
+    if copies == 1:
+        hosts = view_store(HostArrays, host_columns, subregions)
+        vectors = view_store(VectorArrays, vector_columns, subregions)
+    else:
+        hosts = stack_store(HostArrays, host_columns, subregions, copies)
+        vectors = stack_store(VectorArrays, vector_columns, subregions, copies)
+
+    state = SimulationState(hosts, vectors, np.random.default_rng(seed),
+                            VectorSchedule(vectors.birthday, vectors.lifetime, days, season_start, season_end))
+    log = LogBuffer(days + 1, vectors.subregions)
+    log.record(0, hosts.counts(), vectors.counts())
+
+    for day in range(days):
+        host_counts, vector_counts = step_day(state, day, params)
+        log.record(day + 1, host_counts, vector_counts)
+
+    counts = log.counts.reshape(days + 1, copies, len(subregions), len(LOG_COLUMNS))
+
+    return counts.transpose(1, 0, 2, 3)
+
+
+class ReplicatePool(object):
+    """
+    Worker processes serving replicates of one loaded population. Fixed columns and the loaded states are
+    published once; each replicate starts from its own copy of the states.
+    """
+
+    def __init__(self, hosts, vectors, params, days, season_start=0, season_end=None, workers=None):
+        """
+        :param hosts: HostArrays
+        :param vectors: VectorArrays, whose subregion list covers the hosts'
+        :param params: default dict of epidemic parameters
+        :param days: days per replicate
+        :param season_start: first day of mosquito season
+        :param season_end: last day of mosquito season
+        :param workers: number of processes, defaults to the CPU count. 1 runs replicates in this process.
+        """
+
+        initial = dict(('host_' + c, getattr(hosts, c)) for c in HostArrays.mutable_columns())
+        initial.update(('vector_' + c, getattr(vectors, c)) for c in VectorArrays.mutable_columns())
+        self.shared = [publish_store(hosts), publish_store(vectors), SharedColumns(initial)]
+
+        setup = tuple(s.spec for s in self.shared) + (list(vectors.subregions), params, days, season_start,
+                                                       season_end)
+
+        if (workers or os.cpu_count()) == 1:
+            self.pool = None
+            self.previous = _population
+            attach_population(*setup)
+        else:
+            self.pool = ProcessPoolExecutor(workers, initializer=attach_population, initargs=setup)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def map(self, sizes, seeds, params=None):
+        """
+        :param sizes: replicates per batch
+        :param seeds: SeedSequence per batch
+        :param params: optional epidemic parameters per batch
+        :return: iterator of run_batch() results, in batch order
+        """
+
+        params = [None] * len(sizes) if params is None else params
+        if self.pool is None:
+            return map(run_batch, sizes, seeds, params)
+
+        return self.pool.map(run_batch, sizes, seeds, params)
+
+    def close(self):
+        global _population
+
+        if self.pool is None:
+            _population = self.previous
+        else:
+            self.pool.shutdown()
+
+        for shared in self.shared:
+            shared.close()
+        self.shared = []
+
+
+def run_ensemble(hosts, vectors, params, days, replicates, season_start=0, season_end=None, seed=None, workers=None,
+                 batch_size=1, filename=None):
+    """
+    Runs independent replicates of one parameter set over a ReplicatePool
+    :param hosts: HostArrays
+    :param vectors: VectorArrays, whose subregion list covers the hosts'
+    :param params: dict of epidemic parameters
+    :param days: days per replicate
+    :param replicates: number of replicates
+    :param season_start: first day of mosquito season
+    :param season_end: last day of mosquito season
+    :param seed: root seed; batch b draws from child b of SeedSequence(seed)
+    :param workers: processes to spread batches over, defaults to the CPU count. 1 runs in this process.
+    :param batch_size: replicates stacked into one population per batch. With 1, replicate r's results depend only
+                       on seed and r.
+    :param filename: optional path to keep the counts in an np.memmap file instead of memory
+    :return: (replicates, days + 1, subregions, LOG_COLUMNS) int32 counts
+    """
+
+    shape = (replicates, days + 1, len(vectors.subregions), len(LOG_COLUMNS))
+    if filename is None:
+        counts = np.zeros(shape, dtype=np.int32)
+    else:
+        counts = np.lib.format.open_memmap(filename, mode='w+', dtype=np.int32, shape=shape)
+
+    batches = [(start, min(start + batch_size, replicates)) for start in range(0, replicates, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+
+    with ReplicatePool(hosts, vectors, params, days, season_start, season_end, workers) as pool:
+        for (start, end), batch in zip(batches, pool.map([end - start for start, end in batches], seeds)):
+            counts[start:end] = batch
+
+    return counts
+
+
+def quantile_bands(counts, quantiles=QUANTILES):
+    """
+    :param counts: (replicates, days, subregions, LOG_COLUMNS) counts from run_ensemble()
+    :param quantiles: quantiles to take across replicates
+    :return: (quantiles, days, subregions, LOG_COLUMNS) float array
+    """
+
+    # One subregion at a time, so a memory-mapped ensemble is never copied whole
+    bands = np.empty((len(quantiles),) + counts.shape[1:])
+    for s in range(counts.shape[2]):
+        bands[:, :, s] = np.quantile(counts[:, :, s], quantiles, axis=0)
+
+    return bands
+
+
+def ensemble_mean(counts):
+    """
+    :return: (days, subregions, LOG_COLUMNS) mean across replicates, one subregion at a time like quantile_bands()
+    """
+
+    mean = np.empty(counts.shape[1:])
+    for s in range(counts.shape[2]):
+        mean[:, s] = counts[:, :, s].mean(axis=0)
+
+    return mean
+
+
+def save_bands(filename, counts, subregions, quantiles=QUANTILES):
+    """
+    Writes quantile bands per day and subregion, with the ensemble mean, to a compressed .npz file
+    """
+
+    np.savez_compressed(filename, bands=quantile_bands(counts, quantiles), mean=ensemble_mean(counts),
+                        quantiles=np.array(quantiles), subregions=np.array(subregions, dtype=str),
+                        columns=np.array(LOG_COLUMNS), replicates=counts.shape[0])
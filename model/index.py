@@ -0,0 +1,48 @@
+"""
+Subregion index over the columnar stores, built once at load time
+"""
+
+import numpy as np
+
+
+def group_positions(keys, key_count):
+    """
+    Groups positions by an integer key with one stable sort
+    :param keys: int array, one key in [0, key_count) per position
+    :param key_count: number of distinct keys
+    :return: (order, offsets). Positions with key k are order[offsets[k]:offsets[k + 1]].
+    """
+
+    order = np.argsort(keys, kind='stable').astype(np.int32)
+    offsets = np.zeros(key_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=key_count), out=offsets[1:])
+
+    return order, offsets
+
+
+class SubregionIndex(object):
+    """
+    CSR-style grouping of positions by subregion. Members of subregion s are order[offsets[s]:offsets[s + 1]].
+    """
+
+    def __init__(self, subregion, subregion_count):
+        """
+        :param subregion: int array with the subregion position of every member
+        :param subregion_count: number of subregions
+        """
+
+        self.order, self.offsets = group_positions(subregion, subregion_count)
+
+    def __len__(self):
+        return self.offsets.shape[0] - 1
+
+    def members(self, s):
+        """
+        :param s: subregion position
+        :return: view of the positions in subregion s
+        """
+
+        return self.order[self.offsets[s]:self.offsets[s + 1]]
+
+    def sizes(self):
+        return np.diff(self.offsets)
@@ -0,0 +1,124 @@
+"""
+Vector -> host neighbourhoods, from the vector_human_links table or a grid query, as a CSR adjacency or as grid
+cells searched at bite time
+"""
+
+import numpy as np
+
+from model.index import group_positions
+
+
+class LinkGraph(object):
+    """
+    Hosts within range of each vector. Vector v's links are hosts[offsets[v]:offsets[v + 1]], at the matching
+    distances. With a distance scale, bite targets are weighted by exp(-distance / scale).
+    """
+
+    def __init__(self, vector, host, distance, vector_count, distance_scale=None):
+        """
+        :param vector: vector position of each link
+        :param host: host position of each link
+        :param distance: length of each link, in map units
+        :param vector_count: number of vectors
+        :param distance_scale: optional distance over which a host's chance of being picked falls by a factor e
+        """
+
+        vector = np.asarray(vector, dtype=np.int64)
+        order, self.offsets = group_positions(vector, vector_count)
+
+        self.hosts = np.asarray(host, dtype=np.int32)[order]
+        self.distances = np.asarray(distance, dtype=np.float32)[order]
+        self.distance_scale = distance_scale
+        self.cumulative = self.weights()
+
+    def __len__(self):
+        return self.offsets.shape[0] - 1
+
+    def weights(self):
+        """
+        :return: running sum of link weights over the whole CSR array, or None for uniform targeting
+        """
+
+        if self.distance_scale is None:
+            return None
+
+        return np.cumsum(np.exp(-self.distances.astype(np.float64) / self.distance_scale))
+
+    def degree(self):
+        return np.diff(self.offsets)
+
+    def neighbours(self, v):
+        return self.hosts[self.offsets[v]:self.offsets[v + 1]]
+
+
+class GridLinks(object):
+    """
+    Hosts within range of each vector, left in a host GridIndex instead of listed. Each vector keeps the 3 x 3
+    block of cells around it, so a bite can pick a host from the block and keep it if it is in range. Moving
+    vectors only have their block looked up again when they cross into another cell.
+    """
+
+    def __init__(self, grid, vectors, distance_scale=None):
+        """
+        :param grid: GridIndex over host coordinates, with cells at least as wide as the longest vector range
+        :param vectors: VectorArrays. Positions are read as they change.
+        :param distance_scale: optional distance weighting scale, as in LinkGraph
+        """
+
+        self.grid = grid
+        self.vectors = vectors
+        self.distance_scale = distance_scale
+
+        self.cell = grid.cell_keys(vectors.x, vectors.y)
+        self.start, self.cumulative = self.blocks(np.arange(len(vectors)))
+
+    def __len__(self):
+        return self.cell.shape[0]
+
+    def blocks(self, positions):
+        """
+        :return: (start, cumulative) arrays of shape (vectors, 9). Host k of a vector's block, counting across its
+                 cells, is grid.order[start[cell] + k] for the first cell with k < cumulative[cell].
+        """
+
+        first, count = self.grid.neighbourhood(self.vectors.x[positions], self.vectors.y[positions])
+        cumulative = np.cumsum(count, axis=1)
+
+        return first - (cumulative - count), cumulative.astype(np.int32)
+
+    def candidates(self, positions=None):
+        """
+        :return: hosts in the block of each vector, in range or not
+        """
+
+        return self.cumulative[:, -1] if positions is None else self.cumulative[positions, -1]
+
+    def update(self, positions):
+        """
+        Re-buckets vectors after they move
+        :param positions: vectors that may have moved
+        :return: positions of the vectors that are now in another cell
+        """
+
+        cell = self.grid.cell_keys(self.vectors.x[positions], self.vectors.y[positions])
+        crossed = cell != self.cell[positions]
+        changed = positions[crossed]
+
+        self.cell[changed] = cell[crossed]
+        self.start[changed], self.cumulative[changed] = self.blocks(changed)
+
+        return changed
+
+
+def links_from_grid(grid, vectors, distance_scale=None):
+    """
+    Builds the graph in memory, the same way build_range_links() fills the table
+    :param grid: GridIndex over host coordinates, with cells at least as wide as the longest vector range
+    :param vectors: VectorArrays
+    :param distance_scale: optional distance weighting scale
+    :return: LinkGraph
+    """
+
+    vector_positions, host_positions, distances = grid.query_radius(vectors.x, vectors.y, vectors.range)
+
+    return LinkGraph(vector_positions, host_positions, distances, len(vectors), distance_scale)
@@ -0,0 +1,102 @@
+"""
+Loaders that fill the columnar stores from the Humans and vectors tables
+"""
+
+import numpy as np
+from sqlalchemy import Integer, cast, func, inspect, literal_column, null
+
+from db import Humans, Vectors, vectorHumanLinks
+from model.links import LinkGraph
+from model.rows import compact_layout, hosts_from_rows, positions_of, vectors_from_rows
+
+
+def table_columns(session, model):
+    """
+    :return: names of the columns the mapped table actually has in the database
+    """
+
+    return [c['name'] for c in inspect(session.get_bind()).get_columns(model.__tablename__)]
+
+
+def legacy_columns(*names):
+    # Status columns of the pre-compact layout, no longer mapped on the models
+    return [literal_column('"{0}"'.format(name)) for name in names]
+
+
+def load_hosts(session, chunk_size=10000):
+    """
+    Reads the Humans table into a HostArrays store. Spouses are resolved from the integer linkedToID column, or
+    through a uniqueID mapping for tables built with uuid identities.
+    :param session: sqlalchemy session
+    :param chunk_size: rows fetched per round trip
+    :return: HostArrays
+    """
+
+    size = session.query(func.count(Humans.id)).scalar()
+
+    # Tables built before integer ids have no linkedToID column, and tables not yet migrated by
+    # sql/compact-state.sql keep their state in 'True'/'False' strings
+    columns = table_columns(session, Humans)
+    linked_to_id = Humans.linkedToID if 'linkedToID' in columns else cast(null(), Integer)
+    compact = compact_layout(columns)
+    status = [Humans.state] if compact else legacy_columns('susceptible', 'exposed', 'infected', 'recovered')
+
+    rows = session.query(Humans.id, Humans.uniqueID, Humans.linkedTo, linked_to_id, Humans.subregion,
+                         Humans.importDay, Humans.dayOfExp, Humans.dayOfInf,
+                         func.st_x(Humans.geom), func.st_y(Humans.geom), *status).order_by(Humans.id) \
+        .yield_per(chunk_size)
+
+    return hosts_from_rows(rows, size, compact)
+
+
+def load_vectors(session, subregions=(), chunk_size=10000):
+    """
+    Reads the vectors table into a VectorArrays store
+    :param session: sqlalchemy session
+    :param subregions: subregion ids already used by the host store, so both share one numbering
+    :param chunk_size: rows fetched per round trip
+    :return: VectorArrays
+    """
+
+    size = session.query(func.count(Vectors.id)).scalar()
+
+    compact = compact_layout(table_columns(session, Vectors))
+    status = [Vectors.state] if compact else legacy_columns('alive', 'susceptible', 'infected', 'removed')
+
+    rows = session.query(Vectors.id, Vectors.subregion, Vectors.birthday, Vectors.lifetime, Vectors.vector_range,
+                         func.st_x(Vectors.geom), func.st_y(Vectors.geom), *status).order_by(Vectors.id) \
+        .yield_per(chunk_size)
+
+    return vectors_from_rows(rows, size, subregions, compact)
+
+
+def load_links(session, hosts, vectors, distance_scale=None, chunk_size=100000):
+    """
+    Reads the vector_human_links table, as filled by build_range_links(), into a LinkGraph
+    :param session: sqlalchemy session
+    :param hosts: HostArrays from load_hosts()
+    :param vectors: VectorArrays from load_vectors()
+    :param distance_scale: optional distance weighting scale for bite targets
+    :param chunk_size: rows fetched per round trip
+    :return: LinkGraph
+    """
+
+    size = session.query(func.count(vectorHumanLinks.id)).scalar()
+    vector_ids = np.zeros(size, dtype=np.int64)
+    host_ids = np.zeros(size, dtype=np.int64)
+    distances = np.zeros(size, dtype=np.float32)
+
+    rows = session.query(vectorHumanLinks.vector_id, vectorHumanLinks.human_id, vectorHumanLinks.distance) \
+        .yield_per(chunk_size)
+
+    for i, (vector_id, human_id, distance) in enumerate(rows):
+        vector_ids[i] = vector_id
+        host_ids[i] = human_id
+        distances[i] = distance
+
+    # Both stores are loaded in id order, so ids resolve to positions with one binary search each
+    vector_positions, vector_found = positions_of(vector_ids, vectors.id)
+    host_positions, host_found = positions_of(host_ids, hosts.id)
+    found = vector_found & host_found
+
+    return LinkGraph(vector_positions[found], host_positions[found], distances[found], len(vectors), distance_scale)
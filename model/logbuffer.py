@@ -0,0 +1,89 @@
+"""
+Preallocated buffer for the daily per-subregion counts written to the Log table
+"""
+
+import numpy as np
+
+from model.arrays import SUSCEPTIBLE, EXPOSED, INFECTED, RECOVERED, DEAD, VECTOR_SUSCEPTIBLE, VECTOR_INFECTED, \
+    REMOVED
+
+# Count columns of the Log table, in buffer order
+LOG_COLUMNS = ['nSusceptible', 'nExposed', 'nInfected', 'nRecovered', 'nDeaths', 'nBirthInfections',
+               'nInfectedVectors', 'nSuscVectors', 'nRemovedVectors']
+
+
+class LogBuffer(object):
+    """
+    (days x subregions x LOG_COLUMNS) array of counts, filled in place each day and written out in bulk
+    """
+
+    def __init__(self, days, subregions):
+        """
+        :param days: number of days to record, including day 0
+        :param subregions: subregion ids, in store order
+        """
+
+        self.subregions = np.array(subregions, dtype=object)
+        self.counts = np.zeros((days, len(subregions), len(LOG_COLUMNS)), dtype=np.int32)
+        self.recorded = 0  # Days recorded so far
+        self.flushed = 0  # Days already written out
+
+    def record(self, day, host_counts, vector_counts):
+        """
+        :param day: day the counts describe
+        :param host_counts: (subregions, HOST_STATES) array from HostArrays.counts()
+        :param vector_counts: (subregions, VECTOR_STATES) array from VectorArrays.counts()
+        """
+
+        row = self.counts[day]
+        row[:, 0] = host_counts[:, SUSCEPTIBLE]
+        row[:, 1] = host_counts[:, EXPOSED]
+        row[:, 2] = host_counts[:, INFECTED]
+        row[:, 3] = host_counts[:, RECOVERED]
+        row[:, 4] = host_counts[:, DEAD]
+        row[:, 6] = vector_counts[:, VECTOR_INFECTED]
+        row[:, 7] = vector_counts[:, VECTOR_SUSCEPTIBLE]
+        row[:, 8] = vector_counts[:, REMOVED]
+
+        self.recorded = max(self.recorded, day + 1)
+
+    def columns(self, start, end):
+        """
+        :return: dict of Log table column -> array, one row per day and subregion in [start, end)
+        """
+
+        days = end - start
+        columns = {
+            'Day': np.repeat(np.arange(start, end), len(self.subregions)),
+            'subregion': np.tile(self.subregions, days)
+        }
+
+        counts = self.counts[start:end].reshape(-1, len(LOG_COLUMNS))
+        for i, name in enumerate(LOG_COLUMNS):
+            columns[name] = counts[:, i]
+
+        return columns
+
+    def flush(self, write, end=None):
+        """
+        Hands every day recorded since the last flush to write() in one call
+        :param write: callable taking a dict of column arrays, e.g. a bulk table load
+        :param end: optional day to stop before, defaults to every recorded day
+        :return: number of days written
+        """
+
+        start = self.flushed
+        end = self.recorded if end is None else min(end, self.recorded)
+        if end > start:
+            write(self.columns(start, end))
+            self.flushed = end
+
+        return end - start
+
+    def save(self, filename):
+        """
+        Writes the whole buffer to a compressed .npz file
+        """
+
+        np.savez_compressed(filename, counts=self.counts[:self.recorded], subregions=self.subregions.astype(str),
+                            columns=np.array(LOG_COLUMNS))
@@ -0,0 +1,131 @@
+"""
+Home/work mobility. Hosts spend working days in a daytime subregion drawn from a sparse origin-destination matrix,
+and vectors there bite them instead of hosts who live there.
+"""
+
+import csv
+
+import numpy as np
+
+from model.index import SubregionIndex
+
+
+class ODMatrix(object):
+    """
+    Commuter flows between subregions, in CSR form: flows out of subregion s go to indices[indptr[s]:indptr[s + 1]],
+    with the matching counts in data
+    """
+
+    def __init__(self, origin, destination, flow, subregion_count):
+        """
+        Duplicate (origin, destination) pairs are summed and zero flows dropped
+        :param origin: origin subregion position of each flow
+        :param destination: destination subregion position of each flow
+        :param flow: number of commuters
+        :param subregion_count: number of subregions
+        """
+
+        pair = np.asarray(origin, dtype=np.int64) * subregion_count + np.asarray(destination, dtype=np.int64)
+        pair, inverse = np.unique(pair, return_inverse=True)
+        data = np.bincount(inverse.ravel(), weights=np.asarray(flow, dtype=np.float64), minlength=pair.shape[0])
+        keep = data > 0
+
+        self.subregion_count = subregion_count
+        self.indices = (pair[keep] % subregion_count).astype(np.int32)
+        self.data = data[keep]
+        self.indptr = np.zeros(subregion_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pair[keep] // subregion_count, minlength=subregion_count), out=self.indptr[1:])
+
+    @property
+    def nnz(self):
+        return self.data.shape[0]
+
+    def cumulative(self):
+        # Running flow sum with a leading zero, so row s sums to cumulative[indptr[s + 1]] - cumulative[indptr[s]]
+        cumulative = np.zeros(self.nnz + 1)
+        np.cumsum(self.data, out=cumulative[1:])
+
+        return cumulative
+
+    def row_totals(self):
+        cumulative = self.cumulative()
+
+        return cumulative[self.indptr[1:]] - cumulative[self.indptr[:-1]]
+
+    def draw_destinations(self, home, population, rng):
+        """
+        Draws a daytime subregion for every host. A host of subregion s goes to d with chance flow[s, d] / the
+        number of hosts living in s, and stays home otherwise; rows with more commuters than residents are scaled
+        down so that everybody commutes.
+        :param home: home subregion position of every host
+        :param population: hosts living in each subregion
+        :param rng: numpy Generator
+        :return: int32 array of daytime subregion positions
+        """
+
+        home = np.asarray(home, dtype=np.int64)
+        cumulative = self.cumulative()
+        residents = np.maximum(self.row_totals(), population)[home]
+
+        # One binary search per host into the running flow sum, landing past its row's end when it stays home
+        target = cumulative[self.indptr[home]] + rng.random(home.shape[0]) * residents
+        moves = target < cumulative[self.indptr[home + 1]]
+        pick = np.searchsorted(cumulative, target[moves], 'right') - 1
+
+        daytime = home.astype(np.int32)
+        daytime[moves] = self.indices[pick]
+
+        return daytime
+
+
+def load_od_matrix(filename, subregions):
+    """
+    Reads flows from a CSV file with origin, destination and flow columns, keyed by subregion id. Flows from or to
+    subregions outside the study area are dropped.
+    :param filename: CSV path
+    :param subregions: subregion ids, in position order
+    :return: ODMatrix
+    """
+
+    position = dict((s, i) for i, s in enumerate(subregions))
+    origin, destination, flow = [], [], []
+
+    with open(filename, newline='') as f:
+        for row in csv.DictReader(f):
+            if row['origin'] in position and row['destination'] in position:
+                origin.append(position[row['origin']])
+                destination.append(position[row['destination']])
+                flow.append(float(row['flow']))
+
+    return ODMatrix(origin, destination, flow, len(subregions))
+
+
+class HostMobility(object):
+    """
+    Fixed daytime subregion for every host, with the hosts of each daytime subregion grouped once so that the day's
+    bites cost no more than without mobility
+    """
+
+    def __init__(self, od, hosts, rng, work_days=7):
+        """
+        :param od: ODMatrix over the hosts' subregions
+        :param hosts: HostArrays
+        :param rng: numpy Generator for the draw of daytime subregions
+        :param work_days: days of each week spent at the daytime subregion; the rest are spent at home
+        """
+
+        home_index = SubregionIndex(hosts.subregion, od.subregion_count)
+
+        self.work_days = work_days
+        self.daytime = od.draw_destinations(hosts.subregion, home_index.sizes(), rng)
+        self.day_index = SubregionIndex(self.daytime, od.subregion_count)
+
+    def commuters(self, hosts):
+        return int(np.count_nonzero(self.daytime != hosts.subregion))
+
+    def index(self, day, home_index):
+        """
+        :return: SubregionIndex to resolve the day's bites against
+        """
+
+        return self.day_index if day % 7 < self.work_days else home_index
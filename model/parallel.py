@@ -0,0 +1,263 @@
+"""
+Runs subregions on a pool of worker processes. Humans are only bitten by vectors in their own subregion, so each
+subregion advances on its own; the workers step in lockstep, one day at a time.
+"""
+
+import multiprocessing
+import os
+
+import numpy as np
+
+from model.arrays import HostArrays, VectorArrays, HOST_STATES, VECTOR_STATES, NO_PARTNER
+from model.engine import SimulationState, step_day
+from model.index import SubregionIndex
+from model.schedule import VectorSchedule
+from model.shared import SharedColumns, publish_store, view_store
+
+
+def partition(hosts, vectors):
+    """
+    Copies both stores with each subregion's members made contiguous, in SubregionIndex order. Spouse links become
+    positions within the subregion, subregion columns are zeroed, and links that cross subregions are dropped.
+    :param hosts: HostArrays
+    :param vectors: VectorArrays, whose subregion list covers the hosts'
+    :return: (HostArrays, VectorArrays, host offsets, vector offsets); subregion s is offsets[s]:offsets[s + 1]
+    """
+
+    subregion_count = len(vectors.subregions)
+    host_index = SubregionIndex(hosts.subregion, subregion_count)
+    vector_index = SubregionIndex(vectors.subregion, subregion_count)
+
+    parted_hosts = HostArrays(len(hosts), vectors.subregions)
+    for column in HostArrays.columns():
+        getattr(parted_hosts, column)[:] = getattr(hosts, column)[host_index.order]
+    parted_hosts.subregion[:] = 0
+
+    # Position of every host within its own subregion
+    local = np.empty(len(hosts), dtype=np.int64)
+    local[host_index.order] = np.arange(len(hosts)) - np.repeat(host_index.offsets[:-1], host_index.sizes())
+
+    partner = hosts.partner[host_index.order]
+    linked = (partner != NO_PARTNER) & (hosts.subregion[np.maximum(partner, 0)] == hosts.subregion[host_index.order])
+    parted_hosts.partner[:] = np.where(linked, local[np.maximum(partner, 0)], NO_PARTNER)
+
+    parted_vectors = VectorArrays(len(vectors), vectors.subregions)
+    for column in VectorArrays.columns():
+        getattr(parted_vectors, column)[:] = getattr(vectors, column)[vector_index.order]
+    parted_vectors.subregion[:] = 0
+
+    return parted_hosts, parted_vectors, host_index.offsets, vector_index.offsets
+
+
+def split_subregions(hosts, vectors):
+    """
+    :return: list of (HostArrays, VectorArrays), one pair per subregion, from partition()
+    """
+
+    parted_hosts, parted_vectors, host_offsets, vector_offsets = partition(hosts, vectors)
+    host_columns = dict((c, getattr(parted_hosts, c)) for c in HostArrays.columns())
+    vector_columns = dict((c, getattr(parted_vectors, c)) for c in VectorArrays.columns())
+
+    return [(view_store(HostArrays, host_columns, [subregion], host_offsets[s], host_offsets[s + 1]),
+             view_store(VectorArrays, vector_columns, [subregion], vector_offsets[s], vector_offsets[s + 1]))
+            for s, subregion in enumerate(vectors.subregions)]
+
+
+def assign_workers(sizes, workers):
+    """
+    Greedy balance: the largest subregions go first, each to the least loaded worker
+    :param sizes: work per subregion, e.g. host counts
+    :param workers: number of workers
+    :return: list of subregion position arrays, one per worker
+    """
+
+    load = np.zeros(workers)
+    owner = np.zeros(len(sizes), dtype=np.int64)
+    for s in np.argsort(sizes, kind='stable')[::-1]:
+        owner[s] = np.argmin(load)
+        load[owner[s]] += sizes[s]
+
+    return [np.flatnonzero(owner == w) for w in range(workers)]
+
+
+def private_columns(store, start, end):
+    # A worker's own copy of the columns a run writes to
+    return dict((c, getattr(store, c)[start:end].copy()) for c in store.mutable_columns())
+
+
+def window(arrays, start, end):
+    return dict((c, a[start:end]) for c, a in arrays.items())
+
+
+def serve(connection, host_spec, vector_spec, parts, params, days, season_start, season_end):
+    """
+    Worker loop. Holds one SimulationState per subregion and steps all of them on each 'step' message.
+    :param connection: worker end of a multiprocessing Pipe
+    :param host_spec: SharedColumns.spec of the partitioned hosts' fixed columns
+    :param vector_spec: SharedColumns.spec of the partitioned vectors' fixed columns
+    :param parts: list of (subregion id, host range, vector range, host columns, vector columns, SeedSequence)
+                  for the worker's subregions, with private copies of the mutable columns
+    """
+
+    try:
+        shared_hosts = SharedColumns.attach(host_spec)
+        shared_vectors = SharedColumns.attach(vector_spec)
+        states = []
+
+        for subregion, host_range, vector_range, host_columns, vector_columns, seed in parts:
+            host_columns.update(window(shared_hosts.arrays, *host_range))
+            vector_columns.update(window(shared_vectors.arrays, *vector_range))
+            h = view_store(HostArrays, host_columns, [subregion])
+            v = view_store(VectorArrays, vector_columns, [subregion])
+
+            states.append(SimulationState(h, v, np.random.default_rng(seed),
+                                          VectorSchedule(v.birthday, v.lifetime, days, season_start, season_end)))
+    except KeyboardInterrupt:
+        return
+    except Exception as e:
+        connection.send(e)
+        return
+    connection.send(None)
+
+    try:
+        while True:
+            command, day = connection.recv()
+
+            try:
+                if command == 'step':
+                    counts = [step_day(state, day, params) for state in states]
+                    connection.send((np.concatenate([c[0] for c in counts] or [np.zeros((0, HOST_STATES))]),
+                                     np.concatenate([c[1] for c in counts] or [np.zeros((0, VECTOR_STATES))]),
+                                     sum(state.total_exposed for state in states)))
+                elif command == 'gather':
+                    connection.send([(state.hosts.state, state.hosts.day_of_exp, state.hosts.day_of_inf,
+                                      state.vectors.state) for state in states])
+                else:
+                    break
+            except Exception as e:
+                connection.send(e)
+    except (KeyboardInterrupt, EOFError):
+        pass  # Ctrl-C reaches the whole process group; the parent closes the pool
+
+
+class ParallelSimulation(object):
+    """
+    Partitions the subregions across worker processes. Every subregion draws from its own seed stream, so results
+    don't depend on the number of workers. Between calls to step() all workers are parked, which is where
+    cross-subregion processes belong.
+    """
+
+    def __init__(self, hosts, vectors, params, days, season_start=0, season_end=None, seed=None, workers=None):
+        """
+        :param hosts: HostArrays. Updated by gather().
+        :param vectors: VectorArrays. Updated by gather().
+        :param params: dict of epidemic parameters
+        :param days: number of days in the run
+        :param season_start: first day of mosquito season
+        :param season_end: last day of mosquito season
+        :param seed: root seed; subregion s draws from child s of SeedSequence(seed)
+        :param workers: number of processes, defaults to the CPU count
+        """
+
+        self.hosts = hosts
+        self.vectors = vectors
+        self.subregion_count = len(vectors.subregions)
+        self.host_index = SubregionIndex(hosts.subregion, self.subregion_count)
+        self.vector_index = SubregionIndex(vectors.subregion, self.subregion_count)
+        self.total_exposed = 0
+
+        workers = min(workers or os.cpu_count(), max(self.subregion_count, 1))
+        seeds = np.random.SeedSequence(seed).spawn(self.subregion_count)
+
+        # Fixed columns are published once and mapped by every worker
+        parted_hosts, parted_vectors, host_offsets, vector_offsets = partition(hosts, vectors)
+        self.shared = [publish_store(parted_hosts), publish_store(parted_vectors)]
+
+        self.assignments = assign_workers(self.host_index.sizes() + self.vector_index.sizes(), workers)
+        self.connections = []
+        self.processes = []
+
+        for owned in self.assignments:
+            parts = []
+            for s in owned:
+                host_range = (host_offsets[s], host_offsets[s + 1])
+                vector_range = (vector_offsets[s], vector_offsets[s + 1])
+                parts.append((vectors.subregions[s], host_range, vector_range,
+                              private_columns(parted_hosts, *host_range),
+                              private_columns(parted_vectors, *vector_range), seeds[s]))
+
+            connection, worker_end = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=serve, daemon=True, args=(
+                worker_end, self.shared[0].spec, self.shared[1].spec, parts, params, days, season_start, season_end))
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+        for connection in self.connections:
+            self._receive(connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _receive(self, connection):
+        reply = connection.recv()
+        if isinstance(reply, Exception):
+            raise reply
+
+        return reply
+
+    def _broadcast(self, command, day=None):
+        for connection in self.connections:
+            connection.send((command, day))
+
+        return [self._receive(connection) for connection in self.connections]
+
+    def step(self, day):
+        """
+        Advances every subregion by one day and waits for all of them
+        :return: (subregions, HOST_STATES) host counts and (subregions, VECTOR_STATES) vector counts
+        """
+
+        host_counts = np.zeros((self.subregion_count, HOST_STATES), dtype=np.int64)
+        vector_counts = np.zeros((self.subregion_count, VECTOR_STATES), dtype=np.int64)
+        self.total_exposed = 0
+
+        for owned, (hosts, vectors, exposed) in zip(self.assignments, self._broadcast('step', day)):
+            # Each subregion's store has the one subregion, so rows come back in assignment order
+            host_counts[owned] = hosts
+            vector_counts[owned] = vectors
+            self.total_exposed += exposed
+
+        return host_counts, vector_counts
+
+    def gather(self):
+        """
+        Copies the workers' host and vector states back into the full stores
+        """
+
+        for owned, states in zip(self.assignments, self._broadcast('gather')):
+            for s, (state, day_of_exp, day_of_inf, vector_state) in zip(owned, states):
+                members = self.host_index.members(s)
+                self.hosts.state[members] = state
+                self.hosts.day_of_exp[members] = day_of_exp
+                self.hosts.day_of_inf[members] = day_of_inf
+                self.vectors.state[self.vector_index.members(s)] = vector_state
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(('stop', None))
+            except (BrokenPipeError, OSError):
+                pass  # Worker already gone, e.g. after an interrupt
+        for process in self.processes:
+            process.join()
+
+        self.connections = []
+        self.processes = []
+
+        for shared in self.shared:
+            shared.close()
+        self.shared = []
@@ -0,0 +1,84 @@
+"""
+Population generation helpers that work on whole arrays of hosts at once
+"""
+
+import numpy as np
+
+from model.arrays import NO_PARTNER
+
+
+def choose_seeds(total, infected, importers, days, rng=None):
+    """
+    Picks the initially infected hosts and the disease importers in one draw, before anything is written
+    :param total: number of hosts in the study area
+    :param infected: number of hosts infected at day 0
+    :param importers: number of hosts who bring the disease in from elsewhere
+    :param days: days in the run; import days fall in [1, days)
+    :param rng: numpy Generator or RandomState. Defaults to the global numpy random state.
+    :return: (infected positions, importer positions, import days). The two position sets never overlap.
+    """
+
+    if rng is None:
+        rng = np.random
+
+    infected = min(infected, total)
+    importers = min(importers, total - infected)
+
+    chosen = rng.choice(total, infected + importers, replace=False)
+    import_days = rng.choice(np.arange(1, days), importers)
+
+    return chosen[:infected], chosen[infected:], import_days
+
+
+def pair_spouses(eligible, fraction=.52, rng=None):
+    """
+    Marries off a fraction of the eligible hosts in O(N): the chosen hosts are shuffled once and paired off
+    neighbour by neighbour, so every link is symmetric and nobody is linked to themselves
+    :param eligible: boolean array, True for hosts who can marry
+    :param fraction: share of eligible hosts who end up married
+    :param rng: numpy Generator or RandomState. Defaults to the global numpy random state.
+    :return: int32 array of partner positions, NO_PARTNER for unmarried hosts
+    """
+
+    if rng is None:
+        rng = np.random
+
+    eligible = np.asarray(eligible, dtype=bool)
+    partner = np.full(eligible.shape[0], NO_PARTNER, dtype=np.int32)
+
+    candidates = np.flatnonzero(eligible)
+    married = candidates[rng.uniform(0, 1, candidates.shape[0]) < fraction]
+    married = married[rng.permutation(married.shape[0])]
+    couples = married[:married.shape[0] // 2 * 2].reshape(-1, 2)
+
+    partner[couples[:, 0]] = couples[:, 1]
+    partner[couples[:, 1]] = couples[:, 0]
+
+    return partner
+
+
+def chunked(columns, chunk_size):
+    """
+    Splits a dict of equal-length column arrays into views of at most chunk_size rows
+    :param columns: dict of column name -> array
+    :param chunk_size: most rows per chunk
+    :return: generator of column dicts
+    """
+
+    size = len(next(iter(columns.values()))) if columns else 0
+
+    for start in range(0, size, chunk_size):
+        yield dict((name, values[start:start + chunk_size]) for name, values in columns.items())
+
+
+def in_chunk(positions, offset, size):
+    """
+    :param positions: population-wide positions, e.g. from choose_seeds()
+    :param offset: population-wide position of the chunk's first row
+    :param size: rows in the chunk
+    :return: (chunk-local positions, mask of the entries of positions that fall in the chunk)
+    """
+
+    mask = (positions >= offset) & (positions < offset + size)
+
+    return positions[mask] - offset, mask
@@ -0,0 +1,118 @@
+"""
+Decoding of Humans and vectors table rows into the columnar stores, kept apart from the queries in loaders so it
+runs without a database
+"""
+
+import numpy as np
+
+from model.arrays import HostArrays, VectorArrays, host_state, vector_state, NO_IMPORT
+
+
+def compact_layout(columns):
+    """
+    :param columns: column names a Humans or vectors table has in the database
+    :return: whether sql/compact-state.sql has replaced the table's 'True'/'False' status strings with one
+             smallint state column
+    """
+
+    return 'state' in columns
+
+
+def hosts_from_rows(rows, size, compact=True):
+    """
+    Fills a HostArrays store from Humans rows in id order. Spouses are resolved from the integer linkedToID value,
+    or through a uniqueID mapping for tables built with uuid identities.
+    :param rows: iterable of (id, uniqueID, linkedTo, linkedToID, subregion, importDay, dayOfExp, dayOfInf, x, y,
+                 *status) tuples, where status is the state code, or the susceptible, exposed, infected and
+                 recovered strings of an unmigrated table
+    :param size: number of rows
+    :param compact: whether rows carry the state code rather than the status strings
+    :return: HostArrays
+    """
+
+    hosts = HostArrays(size)
+    subregion_index = {}
+    uuid_index = {}
+    links = []
+    partner_ids = np.zeros(size, dtype=np.int64)
+
+    for i, r in enumerate(rows):
+        pk, unique_id, linked_to, partner_id, subregion, import_day, day_of_exp, day_of_inf, x, y = r[:10]
+
+        if subregion not in subregion_index:
+            subregion_index[subregion] = len(subregion_index)
+            hosts.subregions.append(subregion)
+
+        hosts.id[i] = pk
+        hosts.state[i] = r[10] if compact else host_state(*r[10:])
+        hosts.day_of_exp[i] = day_of_exp or 0
+        hosts.day_of_inf[i] = day_of_inf or 0
+        hosts.import_day[i] = NO_IMPORT if import_day is None else import_day
+        hosts.subregion[i] = subregion_index[subregion]
+        hosts.x[i] = x
+        hosts.y[i] = y
+
+        if unique_id is not None:
+            uuid_index[unique_id] = i
+        if partner_id is not None:
+            partner_ids[i] = partner_id
+        elif linked_to:
+            links.append((i, linked_to))
+
+    # Rows come ordered by id, so integer links resolve to positions with one binary search
+    linked = np.flatnonzero(partner_ids)
+    positions, found = positions_of(partner_ids[linked], hosts.id)
+    hosts.partner[linked[found]] = positions[found]
+
+    # Older tables link spouses by uniqueID; resolve them through a mapping once everyone is loaded
+    for i, linked_to in links:
+        partner = uuid_index.get(linked_to)
+        if partner is not None:
+            hosts.partner[i] = partner
+
+    return hosts
+
+
+def vectors_from_rows(rows, size, subregions=(), compact=True):
+    """
+    Fills a VectorArrays store from vectors rows in id order
+    :param rows: iterable of (id, subregion, birthday, lifetime, vector_range, x, y, *status) tuples, where status
+                 is the state code, or the alive, susceptible, infected and removed strings of an unmigrated table
+    :param size: number of rows
+    :param subregions: subregion ids already used by the host store, so both share one numbering
+    :param compact: whether rows carry the state code rather than the status strings
+    :return: VectorArrays
+    """
+
+    vectors = VectorArrays(size, subregions)
+    subregion_index = dict((s, i) for i, s in enumerate(vectors.subregions))
+
+    for i, r in enumerate(rows):
+        pk, subregion, birthday, lifetime, vector_range, x, y = r[:7]
+
+        if subregion not in subregion_index:
+            subregion_index[subregion] = len(subregion_index)
+            vectors.subregions.append(subregion)
+
+        vectors.id[i] = pk
+        vectors.state[i] = r[7] if compact else vector_state(*r[7:])
+        vectors.birthday[i] = birthday
+        vectors.lifetime[i] = lifetime
+        vectors.subregion[i] = subregion_index[subregion]
+        vectors.range[i] = vector_range
+        vectors.x[i] = x
+        vectors.y[i] = y
+
+    return vectors
+
+
+def positions_of(ids, sorted_ids):
+    """
+    :return: (positions, found) of ids in an id column loaded in id order
+    """
+
+    positions = np.searchsorted(sorted_ids, ids)
+    found = positions < sorted_ids.shape[0]
+    found[found] = sorted_ids[positions[found]] == ids[found]
+
+    return positions, found
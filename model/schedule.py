@@ -0,0 +1,81 @@
+"""
+Day-keyed schedule of vector births and deaths
+"""
+
+import numpy as np
+
+from model.arrays import UNBORN, VECTOR_SUSCEPTIBLE, VECTOR_INFECTED, REMOVED
+from model.index import group_positions
+
+
+class VectorSchedule(object):
+    """
+    Precomputed per-day lists of the vectors born and the vectors expiring, so activation and removal cost
+    O(events) per day instead of a scan over every vector
+    """
+
+    def __init__(self, birthday, lifetime, days, season_start=0, season_end=None):
+        """
+        :param birthday: day each vector comes to life
+        :param lifetime: days each vector lives, e.g. from vector_lifetime()
+        :param days: number of days in the run
+        :param season_start: first day of mosquito season; vectors with earlier birthdays never hatch
+        :param season_end: last day of mosquito season; every vector still alive is removed then
+        """
+
+        if season_end is None:
+            season_end = days
+
+        birthday = np.asarray(birthday, dtype=np.int64)
+        lifetime = np.maximum(np.rint(lifetime).astype(np.int64), 0)
+
+        hatching = np.flatnonzero((birthday >= season_start) & (birthday < season_end) & (birthday < days))
+
+        # A vector bites on its birthday and every day up to birthday + lifetime, then is removed
+        expiry = np.minimum(birthday[hatching] + lifetime[hatching], season_end)
+        dying = expiry < days
+
+        self.days = days
+
+        order, self._birth_offsets = group_positions(birthday[hatching], days)
+        self._births = hatching[order]
+
+        order, self._death_offsets = group_positions(expiry[dying], days)
+        self._deaths = hatching[dying][order]
+
+    def born(self, day):
+        """
+        :return: positions of the vectors whose birthday is day
+        """
+
+        if day < 0 or day >= self.days:
+            return self._births[:0]
+
+        return self._births[self._birth_offsets[day]:self._birth_offsets[day + 1]]
+
+    def expiring(self, day):
+        """
+        :return: positions of the vectors removed at the end of day
+        """
+
+        if day < 0 or day >= self.days:
+            return self._deaths[:0]
+
+        return self._deaths[self._death_offsets[day]:self._death_offsets[day + 1]]
+
+    def hatch(self, vectors, day):
+        """
+        Brings the day's newborn vectors to life
+        """
+
+        born = self.born(day)
+        vectors.state[born[vectors.state[born] == UNBORN]] = VECTOR_SUSCEPTIBLE
+
+    def expire(self, vectors, day):
+        """
+        Removes the vectors whose lifetime, or the season, ends today
+        """
+
+        dying = self.expiring(day)
+        state = vectors.state[dying]
+        vectors.state[dying[(state == VECTOR_SUSCEPTIBLE) | (state == VECTOR_INFECTED)]] = REMOVED
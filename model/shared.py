@@ -0,0 +1,124 @@
+"""
+Columns published once for many worker processes, in shared memory or a memory-mapped file. Workers attach
+without copying; only the columns a run writes to are private to each worker.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+ALIGNMENT = 64  # Byte boundary each column starts on
+
+
+class SharedColumns(object):
+    """
+    Named arrays packed into one shared memory block, or into one file mapped with np.memmap.
+    The publishing process owns the block and removes it on close(); attached copies only release their mapping.
+    """
+
+    def __init__(self, columns, filename=None):
+        """
+        :param columns: dict of column name -> array
+        :param filename: optional path to back the columns with a file instead of shared memory
+        """
+
+        layout = []
+        size = 0
+        for name, values in columns.items():
+            values = np.asarray(values)
+            size = -(-size // ALIGNMENT) * ALIGNMENT
+            layout.append((name, values.dtype.str, values.shape, size))
+            size += values.nbytes
+
+        if filename is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            self.spec = (self._memory.name, None, layout)
+        else:
+            np.memmap(filename, dtype=np.uint8, mode='w+', shape=(max(size, 1),)).flush()
+            self._memory = None
+            self.spec = (None, filename, layout)
+
+        self.owner = True
+        self.arrays = self._map(self.spec, 'r+')
+
+        for name, values in columns.items():
+            self.arrays[name][...] = values
+            self.arrays[name].flags.writeable = False
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        Maps columns published by another process, read-only and without copying
+        :param spec: the publisher's SharedColumns.spec
+        :return: SharedColumns
+        """
+
+        attached = cls.__new__(cls)
+        name, filename, layout = spec
+        attached._memory = None if name is None else shared_memory.SharedMemory(name=name)
+        attached.spec = spec
+        attached.owner = False
+        attached.arrays = attached._map(spec, 'r')
+
+        return attached
+
+    def _map(self, spec, mode):
+        name, filename, layout = spec
+        arrays = {}
+
+        for column, dtype, shape, offset in layout:
+            if self._memory is not None:
+                arrays[column] = np.ndarray(shape, dtype=dtype, buffer=self._memory.buf, offset=offset)
+                arrays[column].flags.writeable = mode != 'r'
+            elif int(np.prod(shape)) == 0:
+                arrays[column] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[column] = np.memmap(filename, dtype=dtype, mode=mode, offset=offset, shape=shape)
+
+        return arrays
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self.arrays.values())
+
+    def close(self):
+        self.arrays = {}
+
+        if self._memory is not None:
+            if self.owner:
+                self._memory.unlink()
+            try:
+                self._memory.close()
+            except BufferError:
+                pass  # Views handed out are still alive; the mapping goes with them
+            self._memory = None
+
+
+def publish_store(store, filename=None):
+    """
+    Publishes the columns of a HostArrays or VectorArrays store that stay fixed for a whole run
+    :return: SharedColumns
+    """
+
+    mutable = store.mutable_columns()
+
+    return SharedColumns(dict((c, getattr(store, c)) for c in store.columns() if c not in mutable), filename)
+
+
+def view_store(cls, columns, subregions, start=0, end=None):
+    """
+    Builds a store over existing arrays without copying them
+    :param cls: HostArrays or VectorArrays
+    :param columns: dict with an array for every column of cls, e.g. attached static columns plus private copies
+                    of the mutable ones
+    :param subregions: subregion ids of the new store
+    :param start: first position taken from the arrays
+    :param end: position after the last one taken, defaults to the end of the arrays
+    :return: store of cls
+    """
+
+    store = cls(0, subregions)
+    for column in cls.columns():
+        setattr(store, column, columns[column][start:end])
+
+    return store
@@ -0,0 +1,168 @@
+"""
+Parameter sweeps: grid or Latin hypercube designs over the epidemic parameters, run against one loaded population
+and kept in a store indexed by parameter point
+"""
+
+import hashlib
+import itertools
+import json
+import os
+
+import numpy as np
+
+from model.engine import PARAMETERS
+from model.ensemble import ReplicatePool
+
+
+def grid_design(values):
+    """
+    :param values: dict of parameter name -> list of values to try
+    :return: list of parameter dicts, one per combination
+    """
+
+    names = sorted(values)
+
+    return [dict(zip(names, combination)) for combination in itertools.product(*(values[n] for n in names))]
+
+
+def latin_hypercube(bounds, points, rng=None):
+    """
+    Latin hypercube sample: each parameter's range is cut into as many strata as points, and every stratum is
+    used once. Parameters whose bounds are both integers get integer values.
+    :param bounds: dict of parameter name -> (low, high)
+    :param points: number of points
+    :param rng: numpy Generator
+    :return: list of parameter dicts
+    """
+
+    rng = np.random.default_rng() if rng is None else rng
+    design = [{} for _ in range(points)]
+
+    for name in sorted(bounds):
+        low, high = bounds[name]
+        strata = (rng.permutation(points) + rng.random(points)) / points
+        values = low + strata * (high - low)
+
+        if isinstance(low, int) and isinstance(high, int):
+            values = np.floor(low + strata * (high - low + 1)).astype(np.int64)
+
+        for point, value in zip(design, values.tolist()):
+            point[name] = value
+
+    return design
+
+
+def point_key(point):
+    # Stable name for a parameter point, independent of dict order
+    return hashlib.sha1(json.dumps(point, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def population_fingerprint(hosts, vectors):
+    """
+    :return: dict naming the loaded population, so results from a rebuilt one aren't taken for its own
+    """
+
+    digest = hashlib.sha1()
+    for column in (hosts.subregion, hosts.state, hosts.partner, hosts.import_day,
+                   vectors.subregion, vectors.birthday, vectors.lifetime):
+        digest.update(np.ascontiguousarray(column).tobytes())
+
+    return {'hosts': len(hosts), 'vectors': len(vectors), 'sha1': digest.hexdigest()}
+
+
+class SweepStore(object):
+    """
+    Directory of sweep results. Each point's counts are one .npy file, and index.json maps keys to the full
+    parameter dicts they were run with.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_file = os.path.join(directory, 'index.json')
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.index = {}
+        if os.path.exists(self.index_file):
+            with open(self.index_file) as f:
+                self.index = json.load(f)
+
+    def __contains__(self, point):
+        return point_key(point) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def save(self, point, counts):
+        key = point_key(point)
+        np.save(os.path.join(self.directory, key + '.npy'), counts)
+        self.index[key] = point
+
+        # Index is rewritten after each point, so an interrupted sweep keeps what it finished
+        with open(self.index_file + '.tmp', 'w') as f:
+            json.dump(self.index, f, sort_keys=True)
+        os.replace(self.index_file + '.tmp', self.index_file)
+
+    def load(self, point, mmap_mode=None):
+        """
+        :return: (replicates, days + 1, subregions, LOG_COLUMNS) counts saved for the point
+        """
+
+        return np.load(os.path.join(self.directory, point_key(point) + '.npy'), mmap_mode=mmap_mode)
+
+    def points(self):
+        return list(self.index.values())
+
+
+def run_sweep(hosts, vectors, base_params, design, days, store, replicates=1, season_start=0, season_end=None,
+              seed=None, workers=None):
+    """
+    Runs every point of a design not already in the store. Points run in parallel over one ReplicatePool, and all
+    points share the same replicate seeds, so differences between points come from the parameters.
+    :param hosts: HostArrays
+    :param vectors: VectorArrays, whose subregion list covers the hosts'
+    :param base_params: dict of epidemic parameters; each design point overrides some of them
+    :param design: list of parameter dicts, e.g. from grid_design() or latin_hypercube(), over names in
+                   engine.PARAMETERS
+    :param days: days per run
+    :param store: SweepStore
+    :param replicates: replicates per point
+    :param season_start: first day of mosquito season
+    :param season_end: last day of mosquito season
+    :param seed: root seed; replicate r draws from child r of SeedSequence(seed)
+    :param workers: processes, defaults to the CPU count
+    :return: number of points computed
+    """
+
+    for point in design:
+        unknown = set(point) - set(PARAMETERS)
+        if unknown:
+            raise ValueError("Sweep design varies parameters the engine doesn't read: {0}".format(
+                ', '.join(sorted(unknown))))
+
+    # The stored point records everything the run depended on, so changing the population, base parameters,
+    # days or seeds gives new keys rather than stale hits
+    population = population_fingerprint(hosts, vectors)
+    runs = []
+    for point in design:
+        params = dict(base_params, **point)
+        stored = dict(params, days=days, replicates=replicates, seed=seed, season=[season_start, season_end],
+                      population=population)
+        if stored not in store and stored not in [r[1] for r in runs]:
+            runs.append((params, stored))
+
+    if not runs:
+        return 0
+
+    seeds = np.random.SeedSequence(seed).spawn(replicates)
+    sizes = [1] * replicates * len(runs)
+    batches = [params for params, _ in runs for _ in range(replicates)]
+
+    with ReplicatePool(hosts, vectors, base_params, days, season_start, season_end, workers) as pool:
+        results = pool.map(sizes, seeds * len(runs), batches)
+
+        for params, stored in runs:
+            store.save(stored, np.concatenate([next(results) for _ in range(replicates)]))
+
+    return len(runs)
@@ -17,11 +17,25 @@ from time import sleep
 from uuid import uuid4 as uuid
 
 import numpy as np
-from sqlalchemy import create_engine, MetaData, Table, and_, func
+from sqlalchemy import create_engine, MetaData, Table
 from sqlalchemy.orm import sessionmaker
 
-from db import Humans, Vectors, Log, vectorHumanLinks
-from gis import point_creator
+from db import Humans, Vectors, Log, vectorHumanLinks, bulk
+from gis import geometry, point_creator
+from gis.grid import GridIndex
+from model import loaders
+from model.arrays import SUSCEPTIBLE, EXPOSED, INFECTED, RECOVERED, VECTOR_SUSCEPTIBLE, VECTOR_INFECTED, \
+    REMOVED, UNBORN, NO_PARTNER
+from model.checkpoint import Checkpoint
+from model.dispersal import VectorDispersal
+from model.engine import SimulationState, step_day
+from model.ensemble import run_ensemble, save_bands
+from model.logbuffer import LogBuffer
+from model.mobility import HostMobility, load_od_matrix
+from model.parallel import ParallelSimulation
+from model.population import choose_seeds, chunked, in_chunk, pair_spouses
+from model.schedule import VectorSchedule
+from model.sweep import SweepStore, latin_hypercube, run_sweep
 
 global working_directory_set
 
@@ -29,7 +43,34 @@ working_directory_set = False
 
 # Simulation parameters
 DAYS_TO_RUN = 365
-np.random.seed(5)
+RANDOM_SEED = 5
+BULK_BATCH_SIZE = 10000  # Rows per COPY/executemany round trip when writing tables
+POPULATION_CHUNK_SIZE = 50000  # Most agents generated and held in memory at once when building tables
+LOG_FLUSH_INTERVAL = 30  # Days of log counts buffered between bulk writes
+SIMULATION_WORKERS = 1  # Processes to spread subregions over; 1 runs everything in this process
+SPATIAL_BITES = False  # Single-process runs: vectors bite only hosts linked to them by build_range_links()
+LINK_DISTANCE_SCALE = None  # With SPATIAL_BITES, weight bite targets by exp(-distance / scale); None is uniform
+VECTOR_DISPERSAL = False  # With SPATIAL_BITES: alive vectors take a random-walk step every day
+DISPERSAL_DISTANCE = 30.  # Standard deviation of a day's step along each axis, in map units
+DISPERSAL_CHANCE = 1.  # Daily chance that an alive vector moves
+MOBILITY_FILE = None  # Single-process runs: CSV of origin,destination,flow commuters between subregion ids
+MOBILITY_WORK_DAYS = 5  # Days a week hosts spend in their daytime subregion, where vectors bite them
+CHECKPOINT_DIRECTORY = 'checkpoint'  # Where single-process runs save their state for resume_simulation()
+CHECKPOINT_INTERVAL = 1  # Days between checkpoints
+ENSEMBLE_REPLICATES = 100  # Stochastic replicates per ensemble run
+ENSEMBLE_WORKERS = None  # Processes for ensemble runs; None uses every core
+ENSEMBLE_FILE = 'ensemble.npz'  # Quantile bands per day and subregion from the last ensemble run
+ENSEMBLE_COUNTS_FILE = ENSEMBLE_FILE + '.counts.npy'  # Memory-mapped counts of every replicate from that run
+SWEEP_DIRECTORY = 'sweep'  # Store for parameter sweep results; points already in it are not rerun
+SWEEP_POINTS = 20  # Latin hypercube points per sweep
+SWEEP_REPLICATES = 10  # Replicates per sweep point
+SWEEP_BOUNDS = {  # Ranges swept; integer bounds give integer values
+    'BETA': (.01, .1),
+    'TAU': (.1, .5),
+    'KAPPA': (.005, .05),
+    'BITE_LIMIT': (1, 5)
+}
+np.random.seed(RANDOM_SEED)
 
 # Epidemic parameters
 CAUSES_DEATH = False
@@ -53,6 +94,8 @@ INITIAL_INFECTED = 5
 CONTACT_RATE = 1
 NUMBER_OF_IMPORTERS = 25  # number of people to bring back disease from foreign lands, over the study period
 BITE_LIMIT = 3  # Number of bites per human, per day.
+MARRIAGE_FRACTION = .52  # Share of adults linked to a spouse (sexual transmission)
+INTEGER_IDS = True  # Address hosts and spouse links by dense integer id instead of uuid4 strings
 
 # Vector population parameters
 GM_FLAG = False
@@ -63,6 +106,11 @@ BITING_RATE = 3  # average bites per day
 MOSQUITO_SEASON_START = 1
 MOSQUITO_SEASON_END = 266
 
+# Columns written to the Humans and vectors tables when building populations
+HOST_TABLE_COLUMNS = ['id', 'uniqueID', 'linkedTo', 'linkedToID', 'subregion', 'importer', 'importDay', 'pregnant',
+                      'state', 'dayOfInf', 'dayOfExp']
+VECTOR_TABLE_COLUMNS = ['subregion', 'modified', 'vector_range', 'birthday', 'lifetime', 'state']
+
 # Set up logging
 logger = logging.getLogger("epiSim")
 logger.setLevel(logging.INFO)
@@ -72,6 +120,26 @@ fh.setFormatter(formatter)
 logger.addHandler(fh)
 
 
+def simulation_parameters():
+    """
+    Collects the epidemic parameters above into the dict the simulation engine reads
+    :return: dict keyed by parameter name
+    """
+
+    return {
+        'CAUSES_DEATH': CAUSES_DEATH,
+        'DEATH_CHANCE': DEATH_CHANCE,
+        'BETA': BETA,
+        'KAPPA': KAPPA,
+        'TAU': TAU,
+        'INFECTIOUS_PERIOD': INFECTIOUS_PERIOD,
+        'LATENT_PERIOD': LATENT_PERIOD,
+        'CONTACT_RATE': CONTACT_RATE,
+        'BITE_LIMIT': BITE_LIMIT,
+        'BITING_RATE': BITING_RATE
+    }
+
+
 def prompt(question):
     """
     Simple user y/n prompt
@@ -88,187 +156,108 @@ def prompt(question):
         return question("Try again: ")
 
 
-def point_in_poly(x, y, poly):
+def build_population(subregions, chunk_size=None, first_id=1):
     """
-    Ray casting method of determining if point lies within a polygon.
+    Builds population with parameters, one subregion at a time
+    :param subregions: SubregionGeometry or subregion dicts from shape_subregions()
+    :param chunk_size: most hosts per yielded chunk. Defaults to POPULATION_CHUNK_SIZE.
+    :param first_id: integer id of the first host, when INTEGER_IDS is set
+    :return: generator of dicts of column arrays, keyed like the Humans table plus age, sex, x and y
     """
 
-    n = len(poly)
-    inside = False
-
-    p1x, p1y = poly[0]
-    for i in range(n + 1):
-        p2x, p2y = poly[i % n]
-        if y > min(p1y, p2y):
-            if y <= max(p1y, p2y):
-                if x <= max(p1x, p2x):
-                    if p1y != p2y:
-                        xints = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                    if p1x == p2x or x <= xints:
-                        inside = not inside
-        p1x, p1y = p2x, p2y
-
-    return inside
-
-
-def create_bboxes(list_coordinates):
-    """
-    Creates bounding boxes based on SW and NE coordinates
-    """
-
-    # Create bounding boxes to estimate location before pinpointing, to speed it up.
-    sw_x = float(list_coordinates[0])
-    sw_y = float(list_coordinates[1])
-    sw = (sw_x, sw_y)
-
-    ne_x = float(list_coordinates[2])
-    ne_y = float(list_coordinates[3])
-    ne = (ne_x, ne_y)
-
-    nw_x = sw_x
-    nw_y = ne_y
-    nw = (nw_x, nw_y)
-
-    se_x = ne_x
-    se_y = sw_y
-    se = (se_x, se_y)
-
-    bounding_box = [sw, nw, ne, se]
-
-    return bounding_box
-
+    if chunk_size is None:
+        chunk_size = POPULATION_CHUNK_SIZE
 
-def random_points(subregion_dictionary):
-    """
-    Random points within bounding box
-    """
-
-    bbox = create_bboxes(subregion_dictionary['bbox'])
-    poly = subregion_dictionary['vertices']
-
-    x_values = [x[0] for x in bbox]
-    x_min = min(x_values)
-    x_max = max(x_values)
-
-    y_values = [x[1] for x in bbox]
-    y_min = min(y_values)
-    y_max = max(y_values)
-
-    x = np.random.uniform(x_min, x_max)
-    y = np.random.uniform(y_min, y_max)
-
-    while not point_in_poly(x, y, poly):  # Make sure point does not fall outside subregion
-        x = np.random.uniform(x_min, x_max)
-        y = np.random.uniform(y_min, y_max)
-
-    coordinates = [x, y]
-
-    return coordinates
-
-
-def build_population():
-    """
-    Builds population with parameters
-    :return: Dict of dicts N size, with parameters
-    """
-
-    subregions_list = []
-
-    #in_subregion_data = os.path.join(working_directory, 'subregions.csv')
-    in_subregion_data = os.path.join(working_directory)
-    subregion_dict = shape_subregions(in_subregion_data)
     count = 1
+    next_id = first_id
 
-    for i in subregion_dict:
+    for i in subregions:
 
         subregion_id = i['id']
         subregion_population_count = int(i['population'])  # grab population from subregion dict
-        host_id_list = []
+        n = subregion_population_count
 
         clear_screen()
-        print("Building {0} hosts for subregion {1} of {2}".format(subregion_population_count, count, len(subregion_dict)))
-
-        population = dict(
-            (x, {
-                'uuid': str(uuid()),
-                'linkedTo': None,
-                'subregion': subregion_id,
-                'importer': False,  # Brings disease in from another place
-                'importDay': None,
-                'age': np.random.randint(0, 99),
-                'sex': np.random.choice(['Male', 'Female']),
-                'pregnant': 'False',
-                'susceptible': 'True',
-                'infected': 'False',
-                'exposed': 'False',
-                'recovered': 'False',
-                'dayOfInf': 0,
-                'dayOfExp': 0,
-                'recState': 0,
-                'x': random_points(i)[0],
-                'y': random_points(i)[1]
-            }) for x in range(subregion_population_count)
-        )
-
-        for x in population:  # assign pregnancy to some of population  This is duplicated.  TODO: figure out which one works
-            if population[x].get('age') >= 18:
-                host_id_list.append(population[x].get('uuid'))
-            if population[x].get('sex') == "Female":
-                if population[x].get('age') >= 15 and population[x].get('age') < 51:
-                    if np.random.uniform(0, 1) < .4:
-                        population[x]['pregnant'] = 'True'
-
-        for y in population:  # This must be a separate loop so that the ID_list is full before it runs.
-            if population[y].get('age') >= 18:  # 18 or older can be married
-                link_id = None
-                if np.random.uniform(0, 1) < .52:  # 48.2 percent of US population is married
-                    link_id = np.random.choice(host_id_list)  # Pick a partner
-                    while link_id == population[y].get('uuid'):  # Don't let someone get self-linked
-                        link_id = np.random.choice(host_id_list)  # Pick again
-                    host_id_list.remove(link_id)  # Remove a chosen person from the pool
-                    # TODO: Remove population[y] from possible links too. Maybe just check at the beginning of the loop
-
-                    population[y]['linkedTo'] = link_id
-                    for z in population:
-                        if population.get('uuid') == population[y].get('linkedTo'):
-                            population[z]['linkedTo'] = population[y]['uuid']
-
-
-        subregions_list.append(population)
-        count += 1
-
+        print("Building {0} hosts for subregion {1} of {2}".format(subregion_population_count, count, len(subregions)))
+
+        points = point_creator.sample_points(i, n)
+        age = np.random.randint(0, 99, n)
+        sex = np.random.choice(['Male', 'Female'], n)
+        ids = np.arange(next_id, next_id + n, dtype=np.int64)
+        next_id += n
+
+        # assign pregnancy to some of population
+        pregnant = (sex == 'Female') & (age >= 15) & (age < 51) & (np.random.uniform(0, 1, n) < .4)
+
+        # 18 or older can be married
+        partner = pair_spouses(age >= 18, MARRIAGE_FRACTION)
+
+        if INTEGER_IDS:
+            population = {
+                'id': ids,
+                'uniqueID': np.full(n, None, dtype=object),
+                'linkedTo': np.full(n, None, dtype=object),
+                'linkedToID': np.where(partner != NO_PARTNER, ids[partner], None)
+            }
+        else:
+            uuids = np.array([str(uuid()) for x in range(n)], dtype=object)
+            population = {
+                'id': np.full(n, None, dtype=object),  # Let the table's sequence number them
+                'uniqueID': uuids,
+                'linkedTo': np.where(partner != NO_PARTNER, uuids[partner], None),
+                'linkedToID': np.full(n, None, dtype=object)
+            }
+
+        population.update({
+            'subregion': np.full(n, subregion_id, dtype=object),
+            'importer': np.zeros(n, dtype=bool),  # Brings disease in from another place
+            'importDay': np.full(n, None, dtype=object),
+            'age': age,
+            'sex': sex,
+            'pregnant': pregnant,
+            'state': np.full(n, SUSCEPTIBLE, dtype=np.uint8),
+            'dayOfInf': np.zeros(n, dtype=np.int16),
+            'dayOfExp': np.zeros(n, dtype=np.int16),
+            'x': points[:, 0],
+            'y': points[:, 1]
+        })
+
+        for chunk in chunked(population, chunk_size):
+            yield chunk
 
-    return subregions_list
+        count += 1
 
 
-def vector_lifetime(gm):
+def vector_lifetime(gm, size=None):
     """
     Calculates vector lifetime based on if vector is genetically modified or not
+    :param gm: True for genetically modified vectors
+    :param size: number of lifetimes to draw. Draws a single float when None.
     """
 
     if gm:
-        lifetime = np.random.normal(3, .5)
+        lifetime = np.random.normal(3, .5, size)
     else:
-        lifetime = np.random.normal(15, 2)
+        lifetime = np.random.normal(15, 2, size)
 
     return lifetime
 
 
-def build_vectors():
+def build_vectors(subregions, chunk_size=None):
     """
-    Builds vector population
-    :return: Dict of dicts N size, with parameters
+    Builds vector population, one subregion at a time
+    :param subregions: SubregionGeometry or subregion dicts from shape_subregions()
+    :param chunk_size: most vectors per yielded chunk. Defaults to POPULATION_CHUNK_SIZE.
+    :return: generator of dicts of column arrays, keyed like the vectors table plus x and y
     """
 
     global GM_FLAG
 
-    subregions_list = []
-    count = 0
-    infected_vectors = 0
-    mosquito_season = list(range(MOSQUITO_SEASON_START, MOSQUITO_SEASON_END))
+    if chunk_size is None:
+        chunk_size = POPULATION_CHUNK_SIZE
 
-    in_subregion_data = os.path.join(working_directory)
-    sub_regions_dict = sub_regions_dict = shape_subregions(in_subregion_data)
+    count = 0
+    mosquito_season = np.arange(MOSQUITO_SEASON_START, MOSQUITO_SEASON_END)
 
     # Flag for adding modified mosquitos to population.
     if GM_FLAG:
@@ -276,44 +265,32 @@ def build_vectors():
     else:
         modified = False
 
-    for i in sub_regions_dict:
+    for i in subregions:
         subregion = i['id']  # subregion ID
         area = float(i['area'])  # get area from dict
         vector_pop = int((area / 1000000) * MOSQUITO_SUSCEPTIBLE_COEF)  # sq. meters to square km
 
         clear_screen()
-        print("Building {0} vectors for subregion {1} of {2}".format(vector_pop, count, len(sub_regions_dict)))
-
-        vector_population = dict(
-            (x, {
-                # 'uuid': str(uuid()),
-                'subregion': subregion,
-                'modified': modified,
-                'range': np.random.normal(90, 2),  # 90 meters or so
-                'alive': 'False',  # They come to life on their birthdays
-                'birthday': np.random.choice(mosquito_season),
-                'lifetime': vector_lifetime(GM_FLAG),  # in days
-                'susceptible': 'False',
-                'exposed': 'False',
-                'infected': 'False',
-                'removed': 'False',
-                'x': random_points(i)[0],
-                'y': random_points(i)[1]
-            }) for x in range(vector_pop)
-        )
-
-        # Infect the number of mosquitos set at beginning of script TODO: fix this.
-        for vector in range(MOSQUITO_INIT_INFECTED):
-            for x in vector_population:
-                if np.random.uniform(0, 1) < .01:
-                    vector_population[x]['infected'] = 'False'
-                    vector_population[x]['susceptible'] = 'False'
-                    vector_population[x]['exposed'] = 'False'
-
-        subregions_list.append(vector_population)
-        count += 1
+        print("Building {0} vectors for subregion {1} of {2}".format(vector_pop, count, len(subregions)))
+
+        points = point_creator.sample_points(i, vector_pop)
 
-    return subregions_list
+        # TODO: Infect the number of mosquitos set at beginning of script (MOSQUITO_INIT_INFECTED).
+        vector_population = {
+            'subregion': np.full(vector_pop, subregion, dtype=object),
+            'modified': np.full(vector_pop, modified),
+            'vector_range': np.random.normal(90, 2, vector_pop),  # 90 meters or so
+            'birthday': np.random.choice(mosquito_season, vector_pop),
+            'lifetime': np.rint(vector_lifetime(GM_FLAG, vector_pop)).astype(np.int16),  # in days
+            'state': np.full(vector_pop, UNBORN, dtype=np.uint8),  # They come to life on their birthdays
+            'x': points[:, 0],
+            'y': points[:, 1]
+        }
+
+        for chunk in chunked(vector_population, chunk_size):
+            yield chunk
+
+        count += 1
 
 
 def shape_subregions(wd):
@@ -376,127 +353,84 @@ def output_status(n, total):
     return (n / total) * 100
 
 
+def print_progress(done, total):
+    """
+    Progress callback for bulk table loads
+    :param done: rows written so far
+    :param total: rows to write
+    :return:
+    """
+
+    print("\r{0:.1f}% written".format(output_status(done, total)), end='', flush=True)
+    if done == total:
+        print()
+
+
 def build_population_files(directory, tableToBuild):  #TODO: This needs to be refactored
     global session
 
-    uuidList = []
-    infectList = []
-    importer_list = []
-
     try:
 
         if tableToBuild == 'Humans':
             logger.info("Building host population.")
 
-            # Print population structure info
-            population = (build_population())
+            subregions = shape_subregions(os.path.join(directory))
+            total = int(subregions.population.sum())
 
             pregnancy_eligible = 0
             pregnant_count = 0
+            offset = 0
+
+            # Seeds are drawn over population-wide positions up front and applied as each chunk streams past
+            infected, importers, import_days = choose_seeds(total, INITIAL_INFECTED, NUMBER_OF_IMPORTERS,
+                                                            DAYS_TO_RUN)
+            logger.info("Infecting {0} initial hosts.".format(infected.shape[0]))
+            logger.info("Setting up {0} disease importers.".format(importers.shape[0]))
 
             print("Creating population tables for database...")
 
-            for dictionary in population:  # Human dictionary
-                for i in dictionary:
-                    uniqueID = dictionary[i].get('uuid')
-                    subregion = dictionary[i].get('subregion')
-                    linkedTo = dictionary[i].get('linkedTo')
-                    importer = dictionary[i].get('importer')
-                    importDay = dictionary[i].get('importDay')
-                    age = dictionary[i].get('age')
-                    sex = dictionary[i].get('sex')
-                    pregnant = dictionary[i].get('pregnant')
-                    susceptible = dictionary[i].get('susceptible')
-                    exposed = dictionary[i].get('exposed')
-                    infected = dictionary[i].get('infected')
-                    recovered = dictionary[i].get('recovered')
-                    dayOfInf = dictionary[i].get('dayOfInf')
-                    dayOfExp = dictionary[i].get('dayOfExp')
-                    x = dictionary[i].get('x')
-                    y = dictionary[i].get('y')
-
-                    if sex == "Female":
-                        if age >= 14 and age < 51:
-                            pregnancy_eligible += 1
-                    if pregnant == 'True':
-                        pregnant_count += 1
-
-                    if importer:
-                        importer_list.append(i)
-
-                    new_human = Humans(
-                        uniqueID=uniqueID,
-                        linkedTo=linkedTo,
-                        subregion=subregion,
-                        importer=importer,
-                        importDay=importDay,
-                        pregnant=pregnant,
-                        susceptible=susceptible,
-                        exposed=exposed,
-                        infected=infected,
-                        recovered=recovered,
-                        dayOfInf=dayOfInf,
-                        dayOfExp=dayOfExp,
-                        geom='SRID=2845;POINT({0} {1})'.format(x, y)
-                    )
-
-                    uuidList.append(uniqueID)
-
-                    del i
-                    session.add(new_human)
-                    del new_human
+            # Spouse ids are set in a second pass once every host exists, since a spouse may be in a later batch
+            columns = [c for c in HOST_TABLE_COLUMNS if c != 'linkedToID'] if INTEGER_IDS else \
+                [c for c in HOST_TABLE_COLUMNS if c != 'id']
+            spouse_ids = []
+            spouse_links = []
+
+            for chunk in build_population(subregions, first_id=bulk.next_id(session.connection(), Humans.__table__)):
+                size = len(chunk['subregion'])
+
+                local, mask = in_chunk(infected, offset, size)
+                chunk['state'][local] = INFECTED
+
+                local, mask = in_chunk(importers, offset, size)
+                chunk['importer'][local] = True
+                chunk['importDay'][local] = import_days[mask].tolist()
 
+                pregnancy_eligible += np.count_nonzero((chunk['sex'] == 'Female') & (chunk['age'] >= 14) &
+                                                       (chunk['age'] < 51))
+                pregnant_count += np.count_nonzero(chunk['pregnant'])
+
+                linked = np.not_equal(chunk['linkedToID'], None)
+                spouse_ids.append(chunk['id'][linked].astype(np.int64))
+                spouse_links.append(chunk['linkedToID'][linked].astype(np.int64))
+
+                bulk.load_table(session.connection(), Humans.__table__,
+                                dict((c, chunk[c]) for c in columns),
+                                geometry=(chunk['x'], chunk['y']),
+                                batch_size=BULK_BATCH_SIZE, progress=print_progress)
                 session.commit()
+                offset += size
+
+            if INTEGER_IDS:
+                print("Linking spouses...")
+                bulk.update_column(session.connection(), Humans.__table__, 'linkedToID',
+                                   np.concatenate(spouse_ids or [np.zeros(0, dtype=np.int64)]),
+                                   np.concatenate(spouse_links or [np.zeros(0, dtype=np.int64)]),
+                                   batch_size=BULK_BATCH_SIZE)
 
-            # Create initial human infections
-            if INITIAL_INFECTED > 0:  # Only run if we start with human infections
-                logger.info("Infecting {0} initial hosts.".format(INITIAL_INFECTED))
-                initial_infection_counter = 0
-                row_count = 1
-                for i in range(INITIAL_INFECTED):
-                    infectList.append(np.random.choice(uuidList))  # Select random person, by id, to infect
-
-                clear_screen()  # it's prettier
-                # for i in infectList:
-                while initial_infection_counter < INITIAL_INFECTED:
-                    for h in infectList:  # For each ID in the infected list,
-                        row = session.query(Humans).filter_by(
-                            uniqueID=h)  # select a human from the table whose ID matches
-                        for r in row:
-                            print("Infected {0} of {1}".format(row_count, INITIAL_INFECTED))
-                            if r.uniqueID in infectList:  # This might be redundant. I think ' if r.id == h'
-                                row.update({"susceptible": 'False'}, synchronize_session='fetch')
-                                row.update({"exposed": 'False'}, synchronize_session='fetch')
-                                row.update({"infected": 'True'}, synchronize_session='fetch')
-                                row.update({"recovered": 'False'}, synchronize_session='fetch')
-                                initial_infection_counter += 1
-                            row_count += 1
-
-                        session.commit()
-
-            if NUMBER_OF_IMPORTERS > 0:
-                print("Setting up disease importers...")
-                logger.info("Setting up disease importers.")
-                importer_counter = 0  # If we're allowing random people to bring in disease from elsewhere
-
-                for i in range(NUMBER_OF_IMPORTERS + 1):  # Select importers randomly
-                    importer = np.random.randint(1, len(population))
-                    while importer in infectList or importer in importer_list:  # Can't use already infected hosts
-                        importer = np.random.randint(1, len(population))
-                    importer_list.append(importer)
-
-                for importer in importer_list:
-                    while importer_counter < NUMBER_OF_IMPORTERS:
-                        for importer in importer_list:
-                            row = session.query(Humans).filter_by(id=importer)
-                            for person in row:
-                                importDay = np.random.randint(1, DAYS_TO_RUN)
-                                row.update({'importer': True}, synchronize_session='fetch')
-                                row.update({'importDay': importDay}, synchronize_session='fetch')
-
-                            session.commit()
-                        importer_counter += 1
+            bulk.reset_sequence(session.connection(), Humans.__table__)
+            session.commit()
 
+            logger.info("{0} of {1} eligible hosts are pregnant.".format(pregnant_count, pregnancy_eligible))
             logger.info("Successfully built host population.")
             input("\nHuman population table successfully built. Press enter to return to main menu.")
 
@@ -507,50 +441,18 @@ def build_population_files(directory, tableToBuild):  #TODO: This needs to be re
             logger.info("Setting up vector population.")
             sleep(5)
 
-            vector = (build_vectors())
+            subregions = shape_subregions(os.path.join(directory))
 
             clear_screen()
             print("Adding vectors to PostGIS database...")
 
-            subregion_counter = 1
-            number_of_subregions = len(vector)
-
-            for dictionary in vector:
-                number_of_vectors = len(dictionary)
-                clear_screen()
-                print("Adding {0} vectors for subregion {1} of {2} to database...".format(number_of_vectors,
-                                                                                          subregion_counter,
-                                                                                          number_of_subregions))
-                for i in dictionary:
-                    uniqueID = dictionary[i].get('uuid')
-                    subregion = dictionary[i].get('subregion')
-                    vector_range = dictionary[i].get('range')
-                    alive = dictionary[i].get('alive')
-                    birthday = dictionary[i].get('birthday')
-                    lifetime = dictionary[i].get('lifetime')
-                    susceptible = dictionary[i].get('susceptible')
-                    infected = dictionary[i].get('infected')
-                    removed = dictionary[i].get('removed')
-                    x = dictionary[i].get('x')
-                    y = dictionary[i].get('y')
-
-                    new_vector = Vectors(
-                        uniqueID=uniqueID,
-                        subregion=subregion,
-                        vector_range=vector_range,
-                        alive=alive,
-                        birthday=birthday,
-                        lifetime=lifetime,
-                        susceptible=susceptible,
-                        infected=infected,
-                        removed=removed,
-                        geom='SRID=2845;POINT({0} {1})'.format(x, y)
-                    )
-
-                    session.add(new_vector)
+            for chunk in build_vectors(subregions):
+                bulk.load_table(session.connection(), Vectors.__table__,
+                                dict((c, chunk[c]) for c in VECTOR_TABLE_COLUMNS),
+                                geometry=(chunk['x'], chunk['y']),
+                                batch_size=BULK_BATCH_SIZE, progress=print_progress)
                 session.commit()
-                subregion_counter += 1
-            del vector[:]
+
             logger.info("Successfully built vector population.")
             input("Vector population table successfully built. Press enter to return to main menu.")
 
@@ -567,110 +469,44 @@ def build_range_links():
     clear_screen()
     print("\nLoading host database into RAM...")
     logger.info("Loading host database into ram, for building range links.")
-    row = session.query(Humans).yield_per(1000)  # This might be way more efficient
-    population = dict(
-        (r.id, {
-            'id': r.id,
-            'x': func.st_x(r.geom),  # TODO: Geom to x
-            'y': func.st_y(r.geom)
-        }) for r in row
-    )
+    hosts = loaders.load_hosts(session)
 
     print("Loading vector database into RAM...")
     logger.info("Loading vector database into ram, for building range links.")
-    vectors = session.query(Vectors).yield_per(1000)
-    vectors = dict(
-        (v.id, {
-            'id': v.id,
-            'range': v.vector_range,
-            'x': func.st_x(v.geom),
-            'y': func.st_y(v.geom)
-        }) for v in vectors
-    )
+    vectors = loaders.load_vectors(session, hosts.subregions)
 
     print("Linking...")
     logger.info("Attempting to build vector-host range links.")
-    for vector in vectors:
-        vector_id = vectors.get(vector)['id']
-        vector_range = vectors.get(vector)['range']  # These may need some work
-        vector_x = float(vectors.get(vector)['x'])
-        vector_y = float(vectors.get(vector)['y'])
-
-        vector_coordinates = [vector_x, vector_y]
 
-        for human in population:
-            human_id = population.get(human)['id']
-            human_x = float(population.get(human)['x'])
-            human_y = float(population.get(human)['y'])
+    # Cells as wide as the longest vector range, so each vector only checks the hosts in its 3 x 3 block of cells
+    grid = GridIndex(hosts.x, hosts.y, max(float(vectors.range.max(initial=0)), 1.))
+    vector_positions, host_positions, distances = grid.query_radius(vectors.x, vectors.y, vectors.range)
+    logger.info("Found {0} vector-host range links.".format(distances.shape[0]))
 
-            human_coordinates = [human_x, human_y]
+    session.query(vectorHumanLinks).delete()
 
-            if euclidian(vector_coordinates,
-                         human_coordinates) < vector_range:  # Add the relationship to the link table
-                distance = euclidian(vector_coordinates, human_coordinates)
+    bulk.load_table(session.connection(), vectorHumanLinks.__table__, {
+        'human_id': hosts.id[host_positions],
+        'vector_id': vectors.id[vector_positions],
+        'distance': distances
+    }, batch_size=BULK_BATCH_SIZE, progress=print_progress)
 
-                new_link = vectorHumanLinks(
-                    human_id=human_id,
-                    vector_id=vector_id,
-                    distance=distance
-                )
-
-                session.add(new_link)
     logger.info("Successfully built vector-host range links. Committing to PostGIS.")
     session.commit()
 
 
-def euclidian(a, b):
-    """
-    Calculate distance between points on 2d surface
-    :param a: a list of coordinates for point a
-    :param b: a list of coordinates for point b
-    :return: distance in whichever unit is provided to the function
-    """
-
-    x1 = a[0]
-    y1 = a[1]
-
-    x2 = b[0]
-    y2 = b[1]
-
-    a = np.array((x1, y1))
-    b = np.array((x2, y2))
-
-    dist = np.linalg.norm(a - b)
-
-    return dist
-
-
-def simulation():  #TODO: This needs to be refactored.
+def simulation(resume=False):  #TODO: This needs to be refactored.
     """
     Simulation class
+    :param resume: continue from the last checkpoint instead of day 0
     :return:
     """
 
     # TODO: Create backup_table function and use here.
     # TODO: Auto end simulation if infections end
-    # TODO: Fix total exposed counter
 
-    rowNum = 1
     day = 0
     converged = False
-    id_list = []
-    subregion_list = []
-    number_humans = session.query(Humans).count()
-    initial_susceptible_humans = session.query(Humans).filter_by(susceptible='True').count()
-    initial_susceptible_vectors = session.query(Vectors).filter_by(susceptible='True').count()
-    nInfectedVectors = 1
-    nSuscVectors = 1
-    number_vectors = session.query(Vectors).count()
-    total_exposed = 0
-    susceptible_count = 0
-    exposed_count = 0
-    infected_count = 0
-    recovered_count = 0
-    vector_susceptible_count = 0
-    vector_infected_count = 0
-    vector_removed_count = 0
 
     clear_screen()
 
@@ -686,305 +522,261 @@ def simulation():  #TODO: This needs to be refactored.
         sleep(3)
         logger.info("Beginning simulation - for {} days.".format(DAYS_TO_RUN))
 
-    rows = session.query(Humans).yield_per(1000)  # This might be way more efficient
-
-    print("DEBUG: Parsing population data from dict.")
-    population = dict(
-        (r.id, {
-            'id': r.id,
-            'subregion': r.subregion,
-            'linkedTo': r.linkedTo,
-            'importer': r.importer,
-            'importDay': r.importDay,
-            'pregnant': 'False',
-            'susceptible': r.susceptible,
-            'infected': r.infected,
-            'exposed': r.exposed,
-            'recovered': r.recovered,
-            'dayOfInf': r.dayOfInf,
-            'dayOfExp': r.dayOfExp,
-            'biteCount': 0,
-            'contacts': 0
-        }) for r in rows
-    )
-
-    print("DEBUG: Done.")
-
-    logger.info("Successfully loaded host population data.")
-
-    for p in population:
-        subregion = population.get(p)['subregion']
-
-        if subregion not in subregion_list:
-            subregion_list.append(subregion)
-
-    vectors = session.query(Vectors).yield_per(1000)
-
-    print("DEBUG: Parsing vector data from dict.")
-    vectors = dict(
-        (v.id, {
-            'id': v.id,
-            'alive': v.alive,
-            'daysAlive': 0,
-            'birthday': v.birthday,
-            'lifetime': v.lifetime,
-            'subregion': v.subregion,
-            'susceptible': v.susceptible,
-            'infected': v.infected,
-            'removed': v.removed
-        }) for v in vectors
-    )
-
-    print("DEBUG: Done.")
-
-    logger.info("Successfully loaded vector population data.")
+    print("Loading host population into arrays...")
+    hosts = loaders.load_hosts(session)
+    logger.info("Successfully loaded {0} hosts ({1} bytes).".format(len(hosts), hosts.nbytes))
+
+    print("Loading vector population into arrays...")
+    vectors = loaders.load_vectors(session, hosts.subregions)
+    hosts.subregions = vectors.subregions  # Vectors may live in subregions with no hosts
+    logger.info("Successfully loaded {0} vectors ({1} bytes).".format(len(vectors), vectors.nbytes))
+
+    host_counts = hosts.counts()
+    vector_counts = vectors.counts()
+
+    log = LogBuffer(DAYS_TO_RUN + 1, hosts.subregions)
+
+    def write_log(columns):
+        bulk.load_table(session.connection(), Log.__table__, columns, batch_size=BULK_BATCH_SIZE)
+        session.commit()
+
+    if not resume:
+        log.record(day, host_counts, vector_counts)  # Start log at day 0
+        log.flush(write_log)
+
     logger.info("Beginning simulation loop.")
 
+    params = simulation_parameters()
+
+    if SIMULATION_WORKERS > 1:  # Subregions stepped in lockstep on a process pool
+        if SPATIAL_BITES:
+            logger.warning("Workers bite by subregion; SPATIAL_BITES has no effect with SIMULATION_WORKERS > 1.")
+        if VECTOR_DISPERSAL:
+            logger.warning("Workers keep vectors in place; VECTOR_DISPERSAL has no effect with SIMULATION_WORKERS > 1.")
+        if MOBILITY_FILE is not None:
+            logger.warning("Workers keep hosts at home; MOBILITY_FILE has no effect with SIMULATION_WORKERS > 1.")
+        state = ParallelSimulation(hosts, vectors, params, DAYS_TO_RUN, MOSQUITO_SEASON_START, MOSQUITO_SEASON_END,
+                                   RANDOM_SEED, SIMULATION_WORKERS)
+        step = state.step
+    else:
+        schedule = VectorSchedule(vectors.birthday, vectors.lifetime, DAYS_TO_RUN,
+                                  MOSQUITO_SEASON_START, MOSQUITO_SEASON_END)
+        dispersal = None
+        if VECTOR_DISPERSAL and not SPATIAL_BITES:
+            logger.warning("Vectors bite by subregion without SPATIAL_BITES, so VECTOR_DISPERSAL has no effect.")
+        elif VECTOR_DISPERSAL:
+            dispersal = VectorDispersal(hosts, vectors, DISPERSAL_DISTANCE, DISPERSAL_CHANCE,
+                                        distance_scale=LINK_DISTANCE_SCALE)
+
+        links = None
+        if SPATIAL_BITES and dispersal is not None:
+            links = dispersal.links(vectors)  # Vectors move, so hosts in range are found at bite time, not listed
+            logger.info("Vectors bite hosts in range from a grid of {0}-unit cells.".format(dispersal.grid.cell_size))
+        elif SPATIAL_BITES:
+            print("Loading vector-host range links...")
+            links = loaders.load_links(session, hosts, vectors, LINK_DISTANCE_SCALE)
+            logger.info("Using {0} vector-host range links.".format(links.hosts.shape[0]))
+
+        rng = np.random.default_rng(RANDOM_SEED)
+        mobility = None
+        if MOBILITY_FILE is not None:
+            if links is not None:
+                logger.warning("Range links tie bites to home locations; MOBILITY_FILE has no effect with them.")
+            od = load_od_matrix(MOBILITY_FILE, hosts.subregions)
+            mobility = HostMobility(od, hosts, rng, MOBILITY_WORK_DAYS)  # Same draw again on resume, before restore
+            logger.info("{0} of {1} hosts spend the day away from home, over {2} subregion flows.".format(
+                mobility.commuters(hosts), len(hosts), od.nnz))
+
+        state = SimulationState(hosts, vectors, rng, schedule, links, dispersal, mobility)
+        step = lambda d: step_day(state, d, params)
+
+    checkpoint = Checkpoint(CHECKPOINT_DIRECTORY) if SIMULATION_WORKERS == 1 else None
+    if resume:
+        try:
+            day = checkpoint.restore(state, log)
+        except ValueError as e:  # DAYS_TO_RUN, the settings or the population changed since the save
+            logger.error("Checkpoint can't be resumed: {0}".format(e))
+            input("The checkpoint doesn't match this run and can't be resumed:\n{0}\n"
+                  "Press enter to return to main menu.".format(e))
+            return
+        logger.info("Resuming simulation at day {0}.".format(day))
+    elif checkpoint is not None:
+        checkpoint.clear()  # A checkpoint left by an earlier run must not seed this one's slots or log
+
     try:
-        while day < DAYS_TO_RUN and converged == False:  # TODO: Finish this next.
-            biteable_humans = number_humans
-            susceptible_count = 0
-            exposed_count = 0
-            infected_count = 0
-            recovered_count = 0
-            vector_list = []
-            vector_susceptible_count = 0
-            vector_infected_count = 0
-            vector_removed_count = 0
-
-            print("initializing simulation")
-            for subregion in subregion_list:
-
-                print("DEBUG: Parsing subregion population..")
-                for p in population:
-                    if population.get(p)['subregion'] == subregion:
-                        id_list.append(p)
-
-                print("DEBUG: Parsing subregion vector population..")
-                for v in vectors:
-                    if vectors.get(v)['birthday'] == day and \
-                                    vectors.get(v)['alive'] == 'False' and \
-                                    vectors.get(v)['removed'] == 'False':  # Number of vectors varies each day
-                        vectors.get(v)['alive'] = 'True'
-                        vectors.get(v)['susceptible'] = 'True'
-                    vector_list.append(v)  # TODO: Find a way to deal with this as it makes the sim slow.
-
-                print("DEBUG: Starting the simulation")
-                if day == 0:  # Start log at day 0
-                    susceptible_count = session.query(Humans).filter(and_(Humans.susceptible == 'True',
-                                                                             Humans.subregion == subregion)).count()
-                    log_entry = Log(Day=day,
-                                    nSusceptible=initial_susceptible_humans,
-                                    nExposed=exposed_count,
-                                    nInfected=infected_count,
-                                    nRecovered=recovered_count,
-                                    nDeaths=0,
-                                    nBirthInfections=0,
-                                    nInfectedVectors=vector_infected_count,
-                                    nSuscVectors=initial_susceptible_vectors,
-                                    nRemovedVectors=vector_removed_count)
-                    session.add(log_entry)
-                    session.commit()
-
-                # Run human-human interactions
-                print("DEBUG: Simulating contacts between {0} humans and {1} vectors".format(len(id_list),
-                                                                                             len(vector_list)))
-                for r in id_list:
-
-                    population.get(r)['contacts'] = 0  # Reset contact counter each day
-
-                    if population.get(r)['subregion'] == subregion:
-                        person_a = population.get(r)
-                        contact_counter = 0
-                        person_a['biteCount'] = 0
-
-                        if person_a['susceptible'] == 'True':
-                            if person_a['importDay'] == day:
-                                choices = ["infected", "exposed"]
-                                choice = np.random.choice(choices)
-                                person_a[choice] = 'True'
-                                person_a['susceptible'] = 'False'
-
-                        if person_a['exposed'] == 'True':
-                            if person_a['dayOfExp'] >= LATENT_PERIOD:
-                                person_a['exposed'] = 'False'
-                                person_a['infected'] = 'True'
-
-                        if person_a['infected'] == 'True':
-                            if person_a['dayOfInf'] >= INFECTIOUS_PERIOD:
-                                if CAUSES_DEATH:
-                                    person_a['infected'] = 'False'
-                                    if np.random.uniform(0, 1) < DEATH_CHANCE:
-                                        person_a['dead'] = 'True'
-
-                                    else:
-                                        person_a['recovered'] = 'True'
-                                        person_a['infected'] = 'False'
-
-                                else:
-                                    person_a['infected'] = 'False'
-                                    person_a['recovered'] = 'True'
-
-                        while contact_counter < CONTACT_RATE:  # Infect by contact rate per day
-                            # Choose any random number except the one that identifies the person selected, 'h'
-
-                            if not population.get(r)['linkedTo']:  # Check if a value is set in the "linkedTo" field
-                                pid = np.random.choice(id_list)
-
-                                while pid == r or population.get(pid)[
-                                    'linkedTo']:  # Can't infect theirself or linked spouse
-                                    pid = np.random.choice(id_list)
-
-                            else:
-                                pid = population.get(r)['linkedTo']  # Contact spouse
-                                #person_b = population.get(pid)
-                                person_b = session.query(Humans).filter_by(uniqueID=pid).first()
-
-                                #if person_b['contacts'] == 0:  # Make sure not doubling up on contacts each day
-
-                                if person_a['infected'] == 'True':
-                                    if np.random.uniform(0, 1) < KAPPA:  # chance of infection
-                                        person_b.update({"exposed": 'True'}, synchronize_session='fetch')
-                                        person_b.update({"susceptible": 'False'}, synchronize_session='fetch')
-                                        total_exposed += 1
-
-                                # the infection can go either way
-                                elif person_b.infected == 'True':
-                                    if np.random.uniform(0, 1) < KAPPA:  # chance of infection
-                                        person_a['exposed'] = 'True'
-                                        person_a['susceptible'] = 'False'
-                                        total_exposed += 1
-
-                            contact_counter += 1
-
-                # Run mosquito-human interactions
-                for v in vector_list:
-                    i = 0
-                    if vectors.get(v)['subregion'] == subregion:
-                        vector = vectors.get(v)
-                        if vector['alive'] == 'True':
-                            while i < BITING_RATE and biteable_humans > 0:
-
-                                pid = np.random.choice(id_list)  # Pick a human to bite
-                                while population.get(pid)['subregion'] != subregion:
-                                    pid = np.random.choice(id_list)
-                                person = population.get(pid)
-
-                                if person['susceptible'] == 'True' and vector['infected'] == 'True' and np.random.uniform(
-                                        0, 1) < BETA:
-                                    person['susceptible'] = 'False'
-                                    person['exposed'] = 'True'
-                                    print("DEBUG: We have a bite!!!")
-
-                                elif person['infected'] == 'True' and vector[
-                                    'susceptible'] == 'True':  # TODO: chance of vector infection
-                                    vector['susceptible'] = 'False'
-                                    vector['infected'] = 'True'
-                                person['biteCount'] += 1
-
-                                if person['biteCount'] >= BITE_LIMIT:
-                                    biteable_humans -= 1
-                            i += 1
-
-                            if vector['daysAlive'] >= vector['lifetime']:
-                                vector['removed'] = 'True'
-                                vector['alive'] = 'False'
-                                vector['susceptible'] = 'False'
-                                vector['infected'] = 'False'
-
-                for person in id_list:  # Get the count for each bin, each day.
-                    if population.get(person)['susceptible'] == 'True':
-                        susceptible_count += 1
-
-                    elif population.get(person)['exposed'] == 'True':
-                        exposed_count += 1
-                        population.get(person)['dayOfExp'] += 1
-
-                    elif population.get(person)['infected'] == 'True':
-                        infected_count += 1
-                        population.get(person)['dayOfInf'] += 1
-
-                    elif population.get(person)['recovered'] == 'True':
-                        recovered_count += 1
-
-                for v in vector_list:
-                    if vectors.get(v)['alive'] == 'True':
-                        vectors.get(v)['daysAlive'] += 1
-
-                    if vectors.get(v)['susceptible'] == 'True':
-                        vector_susceptible_count += 1
-
-                    if vectors.get(v)['infected'] == 'True':
-                        vector_infected_count += 1
-
-                    elif vectors.get(v)['removed'] == 'True':
-                        vector_removed_count += 1
-
-                log_entry = Log(Day=day + 1,
-                                subregion=subregion,
-                                nSusceptible=susceptible_count,
-                                nExposed=exposed_count,
-                                nInfected=infected_count,
-                                nRecovered=recovered_count,
-                                nDeaths='0',
-                                nBirthInfections='0',
-                                nInfectedVectors=vector_infected_count,
-                                nSuscVectors=vector_susceptible_count,
-                                nRemovedVectors=vector_removed_count)
-                session.add(log_entry)
+        try:
+            while day < DAYS_TO_RUN and converged == False:  # TODO: Finish this next.
+                host_counts, vector_counts = step(day)
+
+                log.record(day + 1, host_counts, vector_counts)
+
+                totals = host_counts.sum(axis=0)
+                vector_totals = vector_counts.sum(axis=0)
+
+                clear_screen()
+                print("Epidemiological Model Running\n")
+                print("Simulating day {0} of {1}".format(day, DAYS_TO_RUN))
+                print("\n---------------------------------"
+                      "\nSusceptible hosts:    {0}     "
+                      "\nExposed hosts:        {1}     "
+                      "\nInfected hosts:       {2}     "
+                      "\nRecovered hosts:      {3}     "
+                      "\n================================="
+                      "\nSusceptible vectors:  {4}     "
+                      "\nInfected vectors:     {5}     "
+                      "\nRemoved vectors:      {6}     "
+                      "\n---------------------------------"
+                      .format(totals[SUSCEPTIBLE], totals[EXPOSED], totals[INFECTED], totals[RECOVERED],
+                              vector_totals[VECTOR_SUSCEPTIBLE], vector_totals[VECTOR_INFECTED],
+                              vector_totals[REMOVED]))
+
+                day += 1
+
+                # A checkpoint is saved before every log flush and told about it after, so a resumed run never
+                # writes days the Log table already has
+                flush = day % LOG_FLUSH_INTERVAL == 0
+                if checkpoint is not None and (flush or day % CHECKPOINT_INTERVAL == 0):
+                    checkpoint.save(state, day, log)
+                if flush:  # Write the log out in one bulk load
+                    log.flush(write_log)
+                    if checkpoint is not None:
+                        checkpoint.mark_flushed(log.flushed)
+
+                #if vector_infected_count == 0 and
+            if SIMULATION_WORKERS > 1:
+                state.gather()
+        finally:
+            if SIMULATION_WORKERS > 1:  # Workers and shared memory go even when the run is interrupted
+                state.close()
 
-            clear_screen()
-            print("Epidemiological Model Running\n")
-            print("Simulating day {0} of {1}".format(day, DAYS_TO_RUN))
-            print("\n---------------------------------"
-                  "\nSusceptible hosts:    {0}     "
-                  "\nExposed hosts:        {1}     "
-                  "\nInfected hosts:       {2}     "
-                  "\nRecovered hosts:      {3}     "
-                  "\n================================="
-                  "\nSusceptible vectors:  {4}     "
-                  "\nInfected vectors:     {5}     "
-                  "\nRemoved vectors:      {6}     "
-                  "\n---------------------------------"
-                  .format(susceptible_count, exposed_count, infected_count, recovered_count,
-                          vector_susceptible_count, vector_infected_count, vector_removed_count))
-
-            day += 1
-
-            #if vector_infected_count == 0 and
         logger.info("Committing log to PostGIS.")
-        session.commit()
+        log.flush(write_log)
+        if checkpoint is not None:
+            checkpoint.clear()
 
-        not_exposed = session.query(Humans).filter_by(susceptible='True').count()
+        not_exposed = int(np.count_nonzero(hosts.state == SUSCEPTIBLE))
         clear_screen()
         print("**Post-epidemic Report**\n\n"
               "- Total Days Run: {0}\n"
               "- Total Exposed: {1}\n"
               "- Average Exposed/Day: {2}\n"
               "- Population Not Exposed: {3}\n".format(DAYS_TO_RUN,
-                                                       total_exposed,
-                                                       round((number_humans - not_exposed / DAYS_TO_RUN), 2),
+                                                       state.total_exposed,
+                                                       round(state.total_exposed / DAYS_TO_RUN, 2),
                                                        not_exposed))
 
-        # Update the log entry for the day. Might want to build in a dictionary first and then
-        # update the table at end of simulation.
-
         logger.info("Simulation complete.")
         input("\nPress enter to return to main menu.")
 
     except KeyboardInterrupt:
+        # Days past the last checkpoint are simulated again on resume, so only checkpointed days are written
+        if checkpoint is not None and checkpoint.exists():
+            log.flush(write_log, checkpoint.meta.get('log_recorded'))
+            checkpoint.mark_flushed(log.flushed)
+        else:
+            log.flush(write_log)
         session.commit()
         clear_screen()
         input("You interrupted me. Going back to main menu.")
         main_menu()
 
 
+def resume_simulation():
+    """
+    Continues the run that left a checkpoint in CHECKPOINT_DIRECTORY
+    """
+
+    if SIMULATION_WORKERS > 1 or not Checkpoint(CHECKPOINT_DIRECTORY).exists():
+        input("No single-process checkpoint to resume from. Press enter to return to main menu.")
+        return
+
+    simulation(resume=True)
+
+
+def ensemble():
+    """
+    Runs ENSEMBLE_REPLICATES replicates over one load of the population and saves quantile bands per day and
+    subregion to ENSEMBLE_FILE
+    """
+
+    clear_screen()
+
+    try:
+        setupDB()
+    except NameError:
+        logger.error("Ensemble was started with no database loaded.")
+        input("Database not loaded. Press enter to return to main menu.")
+        main_menu()
+
+    print("Loading host and vector populations into arrays...")
+    hosts = loaders.load_hosts(session)
+    vectors = loaders.load_vectors(session, hosts.subregions)
+    hosts.subregions = vectors.subregions
+
+    print("Running {0} replicates of {1} days...".format(ENSEMBLE_REPLICATES, DAYS_TO_RUN))
+    logger.info("Beginning ensemble - {0} replicates.".format(ENSEMBLE_REPLICATES))
+
+    try:
+        counts = run_ensemble(hosts, vectors, simulation_parameters(), DAYS_TO_RUN, ENSEMBLE_REPLICATES,
+                              MOSQUITO_SEASON_START, MOSQUITO_SEASON_END, RANDOM_SEED, ENSEMBLE_WORKERS,
+                              filename=ENSEMBLE_COUNTS_FILE)
+        save_bands(ENSEMBLE_FILE, counts, vectors.subregions)
+
+        logger.info("Ensemble complete.")
+        input("\nQuantile bands written to {0}. Press enter to return to main menu.".format(ENSEMBLE_FILE))
+
+    except KeyboardInterrupt:
+        clear_screen()
+        input("You interrupted me. Going back to main menu.")
+        main_menu()
+
+
+def sweep(design=None):
+    """
+    Runs a parameter sweep against one load of the population, adding results to SWEEP_DIRECTORY
+    :param design: list of parameter dicts. Defaults to a Latin hypercube of SWEEP_POINTS over SWEEP_BOUNDS.
+    """
+
+    clear_screen()
+
+    try:
+        setupDB()
+    except NameError:
+        logger.error("Sweep was started with no database loaded.")
+        input("Database not loaded. Press enter to return to main menu.")
+        main_menu()
+
+    if design is None:
+        design = latin_hypercube(SWEEP_BOUNDS, SWEEP_POINTS, np.random.default_rng(RANDOM_SEED))
+
+    print("Loading host and vector populations into arrays...")
+    hosts = loaders.load_hosts(session)
+    vectors = loaders.load_vectors(session, hosts.subregions)
+    hosts.subregions = vectors.subregions
+
+    store = SweepStore(SWEEP_DIRECTORY)
+    print("Sweeping {0} parameter points...".format(len(design)))
+    logger.info("Beginning sweep - {0} points, {1} already stored.".format(len(design), len(store)))
+
+    try:
+        computed = run_sweep(hosts, vectors, simulation_parameters(), design, DAYS_TO_RUN, store, SWEEP_REPLICATES,
+                             MOSQUITO_SEASON_START, MOSQUITO_SEASON_END, RANDOM_SEED, ENSEMBLE_WORKERS)
+
+        logger.info("Sweep complete - {0} points computed.".format(computed))
+        input("\n{0} new points written to {1}. Press enter to return to main menu.".format(computed,
+                                                                                            SWEEP_DIRECTORY))
+
+    except KeyboardInterrupt:
+        clear_screen()
+        input("You interrupted me. Finished points are kept. Going back to main menu.")
+        main_menu()
+
+
 def subregion_list_of_lists_generators(wd):
     """
     Generates random points based on coordinates and subregion DI
     """
-    records = point_creator.grab_vertices(wd + '/subregions')  # Load subregions shapefile
-    # TODO:  Create function to iterate through subregion ids, create points, and feed them to the point_in_poly
+    records = geometry.load_geometry(wd + '/subregions')  # Subregions shapefile, through the geometry cache
 
     return records
 
@@ -1367,7 +1159,10 @@ def main_menu():
                   "What would you like to do?\n"
                   "1. Configure Simulation\n"
                   "2. Run Simulation\n"
-                  "3. Quit\n")
+                  "3. Resume Simulation\n"
+                  "4. Run Ensemble\n"
+                  "5. Run Parameter Sweep\n"
+                  "6. Quit\n")
 
             answer = input(">>> ")
 
@@ -1378,6 +1173,15 @@ def main_menu():
                 simulation()
 
             if answer.startswith('3'):
+                resume_simulation()
+
+            if answer.startswith('4'):
+                ensemble()
+
+            if answer.startswith('5'):
+                sweep()
+
+            if answer.startswith('6'):
                 logger.info("User killed program.")
                 die()
 
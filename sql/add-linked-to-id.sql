@@ -0,0 +1,6 @@
+ALTER TABLE public."Humans" ADD COLUMN "linkedToID" integer REFERENCES public."Humans" (id);
+
+-- Carry existing uuid spouse links over to integer ids
+UPDATE public."Humans" h SET "linkedToID" = p.id
+	FROM public."Humans" p
+	WHERE h."linkedTo" = p."uniqueID";
@@ -0,0 +1,32 @@
+-- Collapse the 'True'/'False' status strings into one indexed smallint state column.
+-- Codes match model/arrays.py.
+
+ALTER TABLE public."Humans" ADD COLUMN state smallint;
+
+UPDATE public."Humans" SET state = CASE
+	WHEN recovered = 'True' THEN 3
+	WHEN infected = 'True' THEN 2
+	WHEN exposed = 'True' THEN 1
+	WHEN susceptible = 'True' THEN 0
+	ELSE 4
+	END;
+
+ALTER TABLE public."Humans" ALTER COLUMN pregnant TYPE boolean USING pregnant = 'True';
+ALTER TABLE public."Humans" DROP COLUMN susceptible, DROP COLUMN infected, DROP COLUMN exposed, DROP COLUMN recovered;
+CREATE INDEX "ix_Humans_state" ON public."Humans" (state);
+
+ALTER TABLE public.vectors ADD COLUMN state smallint;
+
+UPDATE public.vectors SET state = CASE
+	WHEN removed = 'True' THEN 3
+	WHEN infected = 'True' THEN 2
+	WHEN alive = 'True' OR susceptible = 'True' THEN 1
+	ELSE 0
+	END;
+
+ALTER TABLE public.vectors DROP COLUMN alive, DROP COLUMN susceptible, DROP COLUMN infected, DROP COLUMN removed;
+CREATE INDEX ix_vectors_state ON public.vectors (state);
+
+-- Reclaim the space held by the dropped columns
+VACUUM FULL public."Humans";
+VACUUM FULL public.vectors;
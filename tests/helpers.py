@@ -0,0 +1,90 @@
+"""
+Shared fixtures for the unit tests
+"""
+
+import numpy as np
+
+from model.arrays import HostArrays, VectorArrays, INFECTED
+
+# Epidemic parameters, keyed like the module constants in simulation.py
+PARAMS = {
+    'CAUSES_DEATH': False,
+    'DEATH_CHANCE': .001,
+    'BETA': .03,
+    'KAPPA': .02,
+    'TAU': .25,
+    'INFECTIOUS_PERIOD': 5,
+    'LATENT_PERIOD': 3,
+    'CONTACT_RATE': 1,
+    'BITE_LIMIT': 3,
+    'BITING_RATE': 3
+}
+
+# Faster spread, so short runs differ from one seed to the next
+OUTBREAK_PARAMS = dict(PARAMS, BETA=.3)
+
+
+def make_population(size=300, vector_count=400, subregions=3, seed=None, extent=None):
+    """
+    Small population over the subregions, with 15 infected hosts and 50 couples. Hosts and vectors are dealt to
+    the subregions in turn, so every couple spans two of them, or at random with a seed.
+    :param seed: optional seed for random subregions and coordinates
+    :param extent: optional width of the square hosts and vectors are scattered over; without it all are at 0, 0
+    :return: (HostArrays, VectorArrays)
+    """
+
+    rng = np.random.default_rng(seed)
+    names = ['s{0}'.format(s) for s in range(subregions)]
+
+    hosts = HostArrays(size, names)
+    hosts.id[:] = np.arange(1, size + 1)
+    hosts.subregion[:] = np.arange(size) % subregions if seed is None else rng.integers(0, subregions, size)
+    hosts.state[:15] = INFECTED
+    hosts.partner[:100] = np.arange(100) ^ 1
+
+    vectors = VectorArrays(vector_count, names)
+    vectors.subregion[:] = (np.arange(vector_count) % subregions if seed is None
+                            else rng.integers(0, subregions, vector_count))
+    vectors.birthday[:] = np.arange(vector_count) % 7
+    vectors.lifetime[:] = 10
+
+    if extent is not None:
+        for store in (hosts, vectors):
+            store.x[:] = rng.uniform(0, extent, len(store))
+            store.y[:] = rng.uniform(0, extent, len(store))
+
+    return hosts, vectors
+
+
+def polygon_area(poly):
+    """
+    Shoelace area of a single-ring polygon
+    """
+
+    poly = np.asarray(poly, dtype=np.float64)
+    x = poly[:, 0]
+    y = poly[:, 1]
+
+    return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+def points_in_poly(x, y, poly):
+    """
+    Even-odd ray casting against every edge at once, as an independent check on the sampled points
+    :return: boolean array, True where the point falls inside the polygon
+    """
+
+    poly = np.asarray(poly, dtype=np.float64)
+    bx = np.asarray(x, dtype=np.float64)[:, None]
+    by = np.asarray(y, dtype=np.float64)[:, None]
+
+    x1 = poly[:, 0]
+    y1 = poly[:, 1]
+    x2 = np.roll(x1, -1)
+    y2 = np.roll(y1, -1)
+    keep = y1 != y2  # Horizontal edges never cross the ray
+    x1, y1, x2, y2 = x1[keep], y1[keep], x2[keep], y2[keep]
+
+    crosses = ((y1 < by) != (y2 < by)) & (bx <= (by - y1) * (x2 - x1) / (y2 - y1) + x1)
+
+    return np.count_nonzero(crosses, axis=1) % 2 == 1
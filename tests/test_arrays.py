@@ -0,0 +1,68 @@
+"""
+unit tests for the columnar population stores
+"""
+
+import unittest
+
+import numpy as np
+
+from model.arrays import HostArrays, VectorArrays, host_state, vector_state, SUSCEPTIBLE, EXPOSED, INFECTED, \
+    RECOVERED, UNBORN, VECTOR_SUSCEPTIBLE, VECTOR_INFECTED, REMOVED
+from model.index import SubregionIndex
+
+
+class testStateCodes(unittest.TestCase):
+
+    def test_host_state(self):
+        self.assertEqual(host_state('True', 'False', 'False', 'False'), SUSCEPTIBLE)
+        self.assertEqual(host_state('False', 'True', 'False', 'False'), EXPOSED)
+        self.assertEqual(host_state('False', 'False', 'True', 'False'), INFECTED)
+        self.assertEqual(host_state('False', 'False', 'False', 'True'), RECOVERED)
+
+    def test_vector_state(self):
+        self.assertEqual(vector_state('False', 'False', 'False', 'False'), UNBORN)
+        self.assertEqual(vector_state('True', 'True', 'False', 'False'), VECTOR_SUSCEPTIBLE)
+        self.assertEqual(vector_state('True', 'False', 'True', 'False'), VECTOR_INFECTED)
+        self.assertEqual(vector_state('False', 'False', 'False', 'True'), REMOVED)
+
+
+class testHostArrays(unittest.TestCase):
+
+    def test_counts(self):
+        hosts = HostArrays(5, ['a', 'b'])
+        hosts.subregion[:] = [0, 0, 1, 1, 1]
+        hosts.state[:] = [SUSCEPTIBLE, INFECTED, SUSCEPTIBLE, SUSCEPTIBLE, RECOVERED]
+
+        counts = hosts.counts()
+
+        self.assertEqual(counts[0, SUSCEPTIBLE], 1)
+        self.assertEqual(counts[0, INFECTED], 1)
+        self.assertEqual(counts[1, SUSCEPTIBLE], 2)
+        self.assertEqual(counts[1, RECOVERED], 1)
+
+    def test_footprint(self):
+        hosts = HostArrays(1000000)
+
+        self.assertLess(hosts.nbytes, 40 * 1000000)
+
+    def test_vectors_alive(self):
+        vectors = VectorArrays(4)
+        vectors.state[:] = [UNBORN, VECTOR_SUSCEPTIBLE, VECTOR_INFECTED, REMOVED]
+
+        self.assertEqual(vectors.alive().tolist(), [False, True, True, False])
+
+
+class testSubregionIndex(unittest.TestCase):
+
+    def test_members(self):
+        index = SubregionIndex(np.array([2, 0, 2, 1, 0]), 4)
+
+        self.assertEqual(index.members(0).tolist(), [1, 4])
+        self.assertEqual(index.members(1).tolist(), [3])
+        self.assertEqual(index.members(2).tolist(), [0, 2])
+        self.assertEqual(index.members(3).tolist(), [])
+        self.assertEqual(index.sizes().tolist(), [2, 1, 2, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+unit tests for the batched bite kernel
+"""
+
+import unittest
+
+import numpy as np
+
+from model.arrays import HostArrays, VectorArrays, SUSCEPTIBLE, EXPOSED, VECTOR_INFECTED
+from model.bites import draw_bites, enforce_bite_limit, vector_bites
+from model.engine import SimulationState
+from model.index import SubregionIndex
+
+
+class testDrawBites(unittest.TestCase):
+
+    def test_targets_stay_in_subregion(self):
+        rng = np.random.default_rng(3)
+        host_subregion = rng.integers(0, 4, 1000)
+        vector_subregion = rng.integers(0, 5, 200)  # Subregion 4 has no hosts
+        index = SubregionIndex(host_subregion, 5)
+
+        bite_vectors, bite_hosts = draw_bites(np.arange(200), 3, vector_subregion, index.order, index.offsets, rng)
+
+        self.assertTrue((host_subregion[bite_hosts] == vector_subregion[bite_vectors]).all())
+        self.assertEqual(bite_hosts.shape[0], 3 * np.count_nonzero(vector_subregion < 4))
+
+
+class testBiteLimit(unittest.TestCase):
+
+    def test_limit(self):
+        rng = np.random.default_rng(4)
+        bite_hosts = rng.integers(0, 10, 500)
+        bite_count = np.zeros(10, dtype=np.int16)
+        bite_count[0] = 2
+
+        landed = enforce_bite_limit(bite_hosts, bite_count, 3, rng)
+
+        self.assertEqual(landed.shape[0], 28)
+        self.assertEqual(bite_count.tolist(), [3] * 10)
+        self.assertEqual(np.bincount(bite_hosts[landed], minlength=10).tolist(), [1] + [3] * 9)
+
+
+class testVectorBites(unittest.TestCase):
+
+    def test_exposure_rate(self):
+        # With a limit that never binds, every bite from an infected vector exposes with chance BETA
+        params = {'BITING_RATE': 3, 'BITE_LIMIT': 1000, 'BETA': .03, 'TAU': .25}
+        exposed = []
+
+        for seed in range(20):
+            hosts = HostArrays(100000, ['a'])
+            vectors = VectorArrays(1000, ['a'])
+            vectors.state[:] = VECTOR_INFECTED
+            vectors.lifetime[:] = 15
+            state = SimulationState(hosts, vectors, np.random.default_rng(seed))
+
+            vector_bites(state, params)
+            exposed.append(np.count_nonzero(hosts.state == EXPOSED))
+
+        self.assertAlmostEqual(np.mean(exposed) / 3000., .03, delta=.005)
+        self.assertTrue((hosts.state[hosts.state != EXPOSED] == SUSCEPTIBLE).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+unit tests for the bulk table loader, over an in-memory SQLite database
+"""
+
+import importlib.util
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table, create_engine, event, select
+from sqlalchemy.exc import IntegrityError
+
+# db/__init__.py connects to PostgreSQL at import, so the loader module is read on its own
+spec = importlib.util.spec_from_file_location('bulk', os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'db', 'bulk.py'))
+bulk = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bulk)
+
+
+def sqlite_engine():
+    engine = create_engine('sqlite://')
+    event.listen(engine, 'connect', lambda connection, record: connection.execute('PRAGMA foreign_keys=ON'))
+
+    return engine
+
+
+class testPoints(unittest.TestCase):
+
+    def test_ewkb(self):
+        # SELECT ST_AsEWKB(ST_SetSRID(ST_MakePoint(1, 2), 4326)) in PostGIS
+        self.assertEqual(bulk.ewkb_points([1.], [2.], 4326), ['0101000020e6100000000000000000f03f0000000000000040'])
+
+    def test_ewkt(self):
+        self.assertEqual(bulk.ewkt_points([1.5], [2], 2845), ['SRID=2845;POINT(1.5 2)'])
+
+
+class testLoadTable(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = sqlite_engine()
+        metadata = MetaData()
+        self.table = Table('Vectors', metadata,
+                           Column('id', Integer, primary_key=True),
+                           Column('lifetime', Integer),
+                           Column('geom', String))
+        metadata.create_all(self.engine)
+
+    def test_executemany(self):
+        progress = []
+
+        with self.engine.begin() as connection:
+            written = bulk.load_table(connection, self.table, {'lifetime': np.array([4, 5, 6])},
+                                      geometry=([0., 1., 2.], [3., 4., 5.]), srid=2845, batch_size=2,
+                                      progress=lambda done, total: progress.append((done, total)))
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(select(self.table.c.lifetime, self.table.c.geom).order_by('id')).all()
+
+        self.assertEqual(written, 3)
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+        self.assertEqual([tuple(r) for r in rows], [(4, 'SRID=2845;POINT(0.0 3.0)'), (5, 'SRID=2845;POINT(1.0 4.0)'),
+                                                     (6, 'SRID=2845;POINT(2.0 5.0)')])
+
+    def test_nulls(self):
+        with self.engine.begin() as connection:
+            bulk.load_table(connection, self.table, {'lifetime': np.array([None, 7], dtype=object)})
+
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(select(self.table.c.lifetime).order_by('id')).scalars().all(),
+                             [None, 7])
+
+
+class testCopy(unittest.TestCase):
+
+    class Psycopg2Cursor(object):
+        closed = False
+
+        def copy_expert(self, sql, buffer):
+            self.sql, self.data = sql, buffer.read()
+
+        def close(self):
+            self.closed = True
+
+    class Psycopg3Cursor(object):
+        def copy(self, sql):
+            self.sql = sql
+            return self
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def write(self, data):
+            self.data = data
+
+    def test_drivers(self):
+        for cursor in (self.Psycopg2Cursor(), self.Psycopg3Cursor()):
+            bulk._copy_batch(cursor, 'Humans', ['id', 'state'], [[1, 2], [0, None]])
+
+            self.assertEqual(cursor.sql, 'COPY "Humans" ("id", "state") FROM STDIN WITH (FORMAT csv)')
+            self.assertEqual(cursor.data.splitlines(), ['1,0', '2,'])
+
+    def test_cursor_closed(self):
+        cursor = self.Psycopg2Cursor()
+        connection = mock.Mock()
+        connection.dialect.name = 'postgresql'
+        connection.connection.cursor.return_value = cursor
+        table = Table('Humans', MetaData(), Column('id', Integer, primary_key=True))
+
+        bulk.load_table(connection, table, {'id': [1, 2, 3]}, batch_size=2)
+
+        self.assertTrue(cursor.closed)
+        self.assertEqual(cursor.data.splitlines(), ['3'])  # Last batch
+
+
+class testSpouseLinks(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = sqlite_engine()
+        metadata = MetaData()
+        self.table = Table('Humans', metadata,
+                           Column('id', Integer, primary_key=True),
+                           Column('subregion', String),
+                           Column('linkedToID', Integer, ForeignKey('Humans.id')))
+        metadata.create_all(self.engine)
+
+    def test_links_across_batches(self):
+        # Rows 1 and 4 are spouses, written in different batches
+        with self.engine.begin() as connection:
+            bulk.load_table(connection, self.table, {'id': [1, 2, 3, 4], 'subregion': ['a'] * 4}, batch_size=2)
+            bulk.update_column(connection, self.table, 'linkedToID', [1, 4], [4, 1], batch_size=1)
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(select(self.table.c.id, self.table.c.linkedToID).order_by('id')).all()
+
+        self.assertEqual([tuple(r) for r in rows], [(1, 4), (2, None), (3, None), (4, 1)])
+
+    def test_inline_link_breaks_key(self):
+        with self.assertRaises(IntegrityError):
+            with self.engine.begin() as connection:
+                bulk.load_table(connection, self.table, {'id': [1, 2], 'linkedToID': [2, 1]}, batch_size=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
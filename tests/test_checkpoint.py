@@ -0,0 +1,119 @@
+"""
+unit tests for simulation checkpoints
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from model.checkpoint import Checkpoint
+from model.engine import SimulationState, step_day
+from model.logbuffer import LogBuffer
+from helpers import OUTBREAK_PARAMS, make_population
+
+
+def run(days, checkpoint=None, stop=None, resume=False, seed=4, size=300):
+    # Mirrors simulation(): fresh runs clear whatever checkpoint an earlier run left
+    hosts, vectors = make_population(size)
+    state = SimulationState(hosts, vectors, np.random.default_rng(seed))
+    log = LogBuffer(days + 1, vectors.subregions)
+    log.record(0, hosts.counts(), vectors.counts())
+    day = 0
+    if resume:
+        day = checkpoint.restore(state, log)
+    elif checkpoint is not None:
+        checkpoint.clear()
+
+    while day < (stop or days):
+        host_counts, vector_counts = step_day(state, day, OUTBREAK_PARAMS)
+        log.record(day + 1, host_counts, vector_counts)
+        day += 1
+        if checkpoint is not None:
+            checkpoint.save(state, day, log)
+
+    return state, log
+
+
+class testCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_resume(self):
+        straight, straight_log = run(20)
+
+        run(20, Checkpoint(self.directory), stop=9)
+        resumed, resumed_log = run(20, Checkpoint(self.directory), resume=True)
+
+        self.assertTrue(np.array_equal(straight.hosts.state, resumed.hosts.state))
+        self.assertTrue(np.array_equal(straight.hosts.day_of_inf, resumed.hosts.day_of_inf))
+        self.assertTrue(np.array_equal(straight.vectors.state, resumed.vectors.state))
+        self.assertTrue(np.array_equal(straight_log.counts, resumed_log.counts))
+        self.assertEqual(straight.total_exposed, resumed.total_exposed)
+
+    def test_fresh_run_over_old_checkpoint(self):
+        straight, straight_log = run(20)
+
+        run(20, Checkpoint(self.directory), stop=15, seed=9, size=600)  # An earlier run left a checkpoint
+        run(20, Checkpoint(self.directory), stop=5)
+        resumed, resumed_log = run(20, Checkpoint(self.directory), resume=True)
+
+        self.assertTrue(np.array_equal(straight.hosts.state, resumed.hosts.state))
+        self.assertTrue(np.array_equal(straight_log.counts, resumed_log.counts))
+
+    def test_slots(self):
+        checkpoint = Checkpoint(self.directory)
+        run(3, checkpoint)
+
+        self.assertEqual(checkpoint.meta['day'], 3)
+        self.assertEqual(checkpoint.meta['slot'], 0)  # Days 1 and 3 went to slot 0, day 2 to slot 1
+
+    def test_mark_flushed(self):
+        checkpoint = Checkpoint(self.directory)
+        run(4, checkpoint)
+        checkpoint.mark_flushed(3)
+        hosts, vectors = make_population()
+        log = LogBuffer(5, vectors.subregions)
+
+        Checkpoint(self.directory).restore(SimulationState(hosts, vectors, np.random.default_rng(4)), log)
+
+        self.assertEqual(log.flushed, 3)
+        self.assertEqual(log.recorded, 5)
+
+    def test_mismatch(self):
+        checkpoint = Checkpoint(self.directory)
+        run(2, checkpoint)
+        hosts, vectors = make_population(size=150)
+
+        with self.assertRaises(ValueError):
+            Checkpoint(self.directory).restore(SimulationState(hosts, vectors))
+
+    def test_log_mismatch(self):
+        # DAYS_TO_RUN changed between the save and the resume
+        checkpoint = Checkpoint(self.directory)
+        run(4, checkpoint)
+        hosts, vectors = make_population()
+        log = LogBuffer(31, vectors.subregions)
+
+        with self.assertRaises(ValueError):
+            Checkpoint(self.directory).restore(SimulationState(hosts, vectors), log)
+        self.assertEqual(np.load(os.path.join(self.directory, 'log.npy')).shape[0], 5)  # Not recreated empty
+        self.assertEqual(log.recorded, 0)
+
+    def test_missing_file(self):
+        checkpoint = Checkpoint(self.directory)
+        run(3, checkpoint)
+        os.remove(os.path.join(self.directory, 'host_state.0.npy'))
+        hosts, vectors = make_population()
+
+        with self.assertRaises(ValueError):
+            Checkpoint(self.directory).restore(SimulationState(hosts, vectors))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'host_state.0.npy')))
+
+
+if __name__ == '__main__':
+    unittest.main()
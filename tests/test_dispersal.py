@@ -0,0 +1,71 @@
+"""
+unit tests for vector dispersal and incremental re-bucketing
+"""
+
+import unittest
+
+import numpy as np
+
+from model.arrays import VECTOR_SUSCEPTIBLE
+from model.dispersal import VectorDispersal
+from model.engine import SimulationState
+from model.links import GridLinks
+from helpers import make_population
+
+
+def flying_population():
+    # One subregion over a 1000-unit square; the first 50 vectors are unborn and the rest fly
+    hosts, vectors = make_population(2000, 300, 1, seed=7, extent=1000)
+    vectors.state[50:] = VECTOR_SUSCEPTIBLE
+    vectors.range[:] = 60
+
+    return hosts, vectors
+
+
+class testDispersal(unittest.TestCase):
+
+    def test_step(self):
+        hosts, vectors = flying_population()
+        dispersal = VectorDispersal(hosts, vectors, 25., distance_scale=30.)
+        state = SimulationState(hosts, vectors, np.random.default_rng(1), links=dispersal.links(vectors),
+                                dispersal=dispersal)
+        x = vectors.x.copy()
+
+        for day in range(5):
+            moved = dispersal.step(state)
+
+        self.assertTrue(np.array_equal(vectors.x[:50], x[:50]))  # Unborn vectors stay put
+        self.assertEqual(moved.tolist(), list(range(50, 300)))
+        self.assertTrue(((vectors.x[moved] >= hosts.x.min()) & (vectors.x[moved] <= hosts.x.max())).all())
+
+        # Blocks re-bucketed day by day match blocks built from scratch at the final positions
+        fresh = dispersal.links(vectors)
+        self.assertIsInstance(state.links, GridLinks)
+        self.assertTrue(np.array_equal(state.links.cell, fresh.cell))
+        self.assertTrue(np.array_equal(state.links.start, fresh.start))
+        self.assertTrue(np.array_equal(state.links.cumulative, fresh.cumulative))
+
+    def test_stays_near_hosts(self):
+        hosts, vectors = flying_population()
+        hosts.x[:] = np.minimum(hosts.x, 100)
+        vectors.x[:] = 100
+        dispersal = VectorDispersal(hosts, vectors, 200., bounds=(0, 0, 1000, 1000))
+        state = SimulationState(hosts, vectors, np.random.default_rng(2), links=dispersal.links(vectors),
+                                dispersal=dispersal)
+
+        moved = dispersal.step(state)
+
+        self.assertTrue(0 < moved.shape[0] < 250)
+        # Steps into cells with no hosts around them were not taken
+        self.assertTrue(np.all(vectors.x < hosts.x.min() + 3 * 60))
+        self.assertTrue(np.all(state.links.candidates()[50:] > 0))
+
+    def test_needs_links(self):
+        hosts, vectors = flying_population()
+
+        with self.assertRaises(ValueError):
+            SimulationState(hosts, vectors, dispersal=VectorDispersal(hosts, vectors, 25.))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+unit tests for the daily SEIR step
+"""
+
+import unittest
+
+import numpy as np
+
+from model.arrays import HostArrays, VectorArrays, SUSCEPTIBLE, EXPOSED, INFECTED, RECOVERED, DEAD
+from model.engine import SimulationState, couples_from_partners, partner_contacts, progress_hosts, step_day
+from helpers import PARAMS
+
+
+def make_state(size=10, seed=1):
+    hosts = HostArrays(size, ['a'])
+    vectors = VectorArrays(0, ['a'])
+
+    return SimulationState(hosts, vectors, np.random.default_rng(seed))
+
+
+class testProgressHosts(unittest.TestCase):
+
+    def test_transitions(self):
+        state = make_state(4)
+        hosts = state.hosts
+        hosts.state[:] = [SUSCEPTIBLE, EXPOSED, EXPOSED, INFECTED]
+        hosts.day_of_exp[:] = [0, 3, 2, 0]
+        hosts.day_of_inf[:] = [0, 0, 0, 5]
+
+        progress_hosts(state, 1, PARAMS)
+
+        self.assertEqual(hosts.state.tolist(), [SUSCEPTIBLE, INFECTED, EXPOSED, RECOVERED])
+
+    def test_import(self):
+        state = make_state(1000)
+        state.hosts.import_day[:500] = 7
+
+        progress_hosts(state, 7, PARAMS)
+
+        self.assertEqual(np.count_nonzero(state.hosts.state[:500] == SUSCEPTIBLE), 0)
+        self.assertTrue((state.hosts.state[500:] == SUSCEPTIBLE).all())
+
+    def test_death(self):
+        params = dict(PARAMS, CAUSES_DEATH=True, DEATH_CHANCE=1.)
+        state = make_state(3)
+        state.hosts.state[:] = INFECTED
+        state.hosts.day_of_inf[:] = 5
+
+        progress_hosts(state, 0, params)
+
+        self.assertTrue((state.hosts.state == DEAD).all())
+
+
+class testPartnerContacts(unittest.TestCase):
+
+    def test_couples(self):
+        partner = np.array([1, 0, 3, -1, -1], dtype=np.int32)  # 2 -> 3 only runs one way
+
+        self.assertEqual(couples_from_partners(partner).tolist(), [[0, 1], [2, 3]])
+
+    def test_transmission_both_ways(self):
+        params = dict(PARAMS, KAPPA=1.)
+        hosts = HostArrays(6, ['a'])
+        hosts.partner[:] = [1, 0, 3, 2, 5, 4]
+        hosts.state[:] = [INFECTED, SUSCEPTIBLE, SUSCEPTIBLE, INFECTED, RECOVERED, INFECTED]
+        state = SimulationState(hosts, VectorArrays(0, ['a']), np.random.default_rng(0))
+
+        partner_contacts(state, params)
+
+        self.assertEqual(hosts.state.tolist(), [INFECTED, EXPOSED, EXPOSED, INFECTED, RECOVERED, INFECTED])
+        self.assertEqual(state.total_exposed, 2)
+
+
+class testStepDay(unittest.TestCase):
+
+    def test_counters_and_counts(self):
+        state = make_state(3)
+        state.hosts.state[:] = [SUSCEPTIBLE, EXPOSED, INFECTED]
+
+        host_counts, vector_counts = step_day(state, 0, PARAMS)
+
+        self.assertEqual(state.hosts.day_of_exp.tolist(), [0, 1, 0])
+        self.assertEqual(state.hosts.day_of_inf.tolist(), [0, 0, 1])
+        self.assertEqual(host_counts[0, :3].tolist(), [1, 1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+unit tests for the Monte Carlo ensemble runner
+"""
+
+import unittest
+
+import numpy as np
+
+from model.arrays import HostArrays, INFECTED
+from model.ensemble import QUANTILES, ensemble_mean, quantile_bands, run_ensemble, stack_store
+from model.logbuffer import LOG_COLUMNS
+from helpers import OUTBREAK_PARAMS, make_population
+
+
+class testEnsemble(unittest.TestCase):
+
+    def test_replicates(self):
+        hosts, vectors = make_population()
+        counts = run_ensemble(hosts, vectors, OUTBREAK_PARAMS, 12, 4, seed=2, workers=1)
+
+        self.assertEqual(counts.shape, (4, 13, 3, len(LOG_COLUMNS)))
+        self.assertTrue(np.all(counts[:, 0] == counts[0, 0]))  # Every replicate starts from the loaded state
+        self.assertFalse(np.all(counts[:, -1] == counts[0, -1]))  # and ends somewhere of its own
+        self.assertEqual(int(hosts.state[0]), INFECTED)  # The loaded population is left alone
+
+    def test_workers_agree(self):
+        hosts, vectors = make_population()
+
+        serial = run_ensemble(hosts, vectors, OUTBREAK_PARAMS, 8, 3, seed=5, workers=1)
+        pooled = run_ensemble(hosts, vectors, OUTBREAK_PARAMS, 8, 3, seed=5, workers=2)
+
+        self.assertTrue(np.array_equal(serial, pooled))
+
+    def test_batches(self):
+        hosts, vectors = make_population()
+        counts = run_ensemble(hosts, vectors, OUTBREAK_PARAMS, 8, 5, seed=5, workers=1, batch_size=2)
+
+        self.assertEqual(counts.shape[0], 5)
+        # Hosts are conserved in every replicate of every batch
+        self.assertTrue(np.all(counts[..., :5].sum(axis=(2, 3)) == len(hosts)))
+
+    def test_stack_store(self):
+        hosts = HostArrays(6, ['a', 'b'])
+        hosts.subregion[:] = [0, 1, 0, 1, 0, 1]
+        hosts.partner[:] = [1, 0, 3, 2, 5, 4]
+        columns = dict((c, getattr(hosts, c)) for c in HostArrays.columns())
+        stacked = stack_store(HostArrays, columns, hosts.subregions, 2)
+
+        self.assertEqual(stacked.subregion.tolist(), [0, 1, 0, 1, 0, 1, 2, 3, 2, 3, 2, 3])
+        self.assertEqual(stacked.partner[6:].tolist(), [7, 6, 9, 8, 11, 10])
+
+    def test_bands(self):
+        counts = np.arange(5).reshape(5, 1, 1, 1) * np.ones((5, 2, 1, 3))
+        bands = quantile_bands(counts, (0, .5, 1))
+
+        self.assertEqual(bands.shape, (3, 2, 1, 3))
+        self.assertEqual(bands[:, 0, 0, 0].tolist(), [0, 2, 4])
+
+    def test_bands_by_subregion(self):
+        counts = np.random.default_rng(1).integers(0, 100, (7, 3, 4, 9))
+
+        self.assertTrue(np.allclose(quantile_bands(counts), np.quantile(counts, QUANTILES, axis=0)))
+        self.assertTrue(np.allclose(ensemble_mean(counts), counts.mean(axis=0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
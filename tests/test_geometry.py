@@ -0,0 +1,78 @@
+"""
+unit tests for the cached subregion geometry store
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import shapefile
+
+from gis.geometry import SubregionGeometry, load_geometry
+
+
+def write_subregions(filename, populations):
+    writer = shapefile.Writer(filename, shapeType=shapefile.POLYGON)
+    for name in ('OBJECTID', 'Subregion', 'Population'):
+        writer.field(name, 'C', size=11)
+    writer.field('Area', 'N', size=21, decimal=3)
+
+    for i, population in enumerate(populations):
+        x = 20 * i
+        # Second subregion is a square with a square hole
+        rings = [[[x, 0], [x, 10], [x + 10, 10], [x + 10, 0], [x, 0]]]
+        if i == 1:
+            rings.append([[x + 4, 4], [x + 6, 4], [x + 6, 6], [x + 4, 6], [x + 4, 4]])
+        writer.poly(rings)
+        writer.record(str(i), 'S{0}'.format(i), str(population), 100.)
+
+    writer.close()
+
+
+class testGeometry(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.filename = os.path.join(self.directory, 'subregions')
+        write_subregions(self.filename, [5, 7, 9])
+
+    def test_buffers(self):
+        geometry = SubregionGeometry.from_shapefile(self.filename)
+
+        self.assertEqual(len(geometry), 3)
+        self.assertEqual(geometry.ids.tolist(), ['S0', 'S1', 'S2'])
+        self.assertEqual(geometry.population.tolist(), [5, 7, 9])
+        self.assertEqual(geometry.offsets.tolist(), [0, 5, 15, 20])
+        self.assertEqual(geometry[1]['parts'].tolist(), [0, 5])
+        self.assertEqual(geometry[2]['bbox'].tolist(), [40, 0, 50, 10])
+        self.assertEqual(geometry[2]['vertices'].shape, (5, 2))
+        self.assertAlmostEqual(geometry[1]['triangle_areas'].sum(), 96.)  # Hole left out of the triangulation
+
+    def test_cache(self):
+        first = load_geometry(self.filename)
+        self.assertTrue(os.path.exists(self.filename + '.geometry.npz'))
+
+        with mock.patch.object(SubregionGeometry, 'from_shapefile', side_effect=AssertionError):
+            cached = load_geometry(self.filename)
+
+            # Touched but unchanged files are recognised by their hash
+            os.utime(self.filename + '.shp', (0, 0))
+            touched = load_geometry(self.filename)
+
+        self.assertTrue(np.array_equal(first.vertices, cached.vertices))
+        self.assertEqual(touched.ids.tolist(), first.ids.tolist())
+
+    def test_rebuild(self):
+        load_geometry(self.filename)
+        write_subregions(self.filename, [1, 2, 3])
+        os.utime(self.filename + '.dbf', (0, 0))
+
+        self.assertEqual(load_geometry(self.filename).population.tolist(), [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
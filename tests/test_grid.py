@@ -0,0 +1,50 @@
+"""
+unit tests for the grid spatial index
+"""
+
+import unittest
+
+import numpy as np
+
+from gis.grid import GridIndex
+
+
+class testGridIndex(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        hosts = rng.uniform(0, 2000, (3000, 2))
+        vectors = rng.uniform(-50, 2050, (300, 2))
+        radius = rng.normal(90, 2, 300)
+
+        grid = GridIndex(hosts[:, 0], hosts[:, 1], radius.max())
+        queries, points, distances = grid.query_radius(vectors[:, 0], vectors[:, 1], radius, chunk_size=64)
+
+        distance = np.hypot(vectors[:, None, 0] - hosts[None, :, 0], vectors[:, None, 1] - hosts[None, :, 1])
+        expected = np.argwhere(distance <= radius[:, None])
+
+        self.assertEqual(sorted(zip(queries.tolist(), points.tolist())), sorted(map(tuple, expected.tolist())))
+        self.assertTrue(np.allclose(distances, distance[queries, points]))
+
+    def test_projected_origin(self):
+        # State plane coordinates, millions of units from 0, 0
+        grid = GridIndex([715966., 716030.], [2117095., 2117150.], 50.)
+
+        self.assertEqual(grid.cell_coordinates(grid.x, grid.y)[0].tolist(), [0, 1])
+        self.assertEqual(grid.cell_coordinates(grid.x, grid.y)[1].tolist(), [0, 1])
+        queries, points, _ = grid.query_radius([716000.], [2117120.], 50.)
+        self.assertEqual(sorted(points.tolist()), [0, 1])
+
+    def test_empty(self):
+        grid = GridIndex([], [], 10.)
+
+        self.assertEqual(grid.query_radius([1.], [1.], 5.)[0].shape[0], 0)
+
+    def test_radius_wider_than_cells(self):
+        grid = GridIndex([0.], [0.], 10.)
+
+        self.assertRaises(ValueError, grid.query_radius, [0.], [0.], 20.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+unit tests for range-limited bite targeting
+"""
+
+import unittest
+
+import numpy as np
+
+from gis.grid import GridIndex
+from model.arrays import HostArrays, VectorArrays, SUSCEPTIBLE, EXPOSED, VECTOR_INFECTED
+from model.bites import draw_grid_bites, draw_linked_bites, vector_bites
+from model.engine import SimulationState
+from model.links import GridLinks, LinkGraph, links_from_grid
+
+
+class testLinkGraph(unittest.TestCase):
+
+    def test_csr(self):
+        links = LinkGraph([2, 0, 2, 0], [5, 6, 7, 8], [1., 2., 3., 4.], 4)
+
+        self.assertEqual(links.degree().tolist(), [2, 0, 2, 0])
+        self.assertEqual(links.neighbours(0).tolist(), [6, 8])
+        self.assertEqual(links.neighbours(2).tolist(), [5, 7])
+
+    def test_from_grid(self):
+        hosts = HostArrays(3, ['a'])
+        hosts.x[:] = [0, 5, 20]
+        vectors = VectorArrays(2, ['a'])
+        vectors.x[:] = [1, 19]
+        vectors.range[:] = [6, 2]
+
+        links = links_from_grid(GridIndex(hosts.x, hosts.y, 6), vectors)
+
+        self.assertEqual(sorted(links.neighbours(0).tolist()), [0, 1])
+        self.assertEqual(links.neighbours(1).tolist(), [2])
+
+
+class testLinkedBites(unittest.TestCase):
+
+    def test_targets_in_range(self):
+        rng = np.random.default_rng(5)
+        links = LinkGraph([0, 0, 1, 3], [10, 11, 12, 13], [1., 1., 1., 1.], 4)
+
+        bite_vectors, bite_hosts = draw_linked_bites(np.arange(4), 3, links, rng)
+
+        self.assertEqual(bite_vectors.tolist(), [0, 0, 0, 1, 1, 1, 3, 3, 3])  # Vector 2 has nobody in range
+        self.assertTrue(set(bite_hosts[:3]) <= {10, 11})
+        self.assertEqual(bite_hosts[3:].tolist(), [12, 12, 12, 13, 13, 13])
+
+    def test_distance_weighting(self):
+        rng = np.random.default_rng(6)
+        links = LinkGraph([0, 0, 1, 1], [0, 1, 2, 3], [0., 100., 0., 0.], 2, distance_scale=100.)
+
+        bite_vectors, bite_hosts = draw_linked_bites(np.array([0, 1]), 20000, links, rng)
+        near = np.mean(bite_hosts[bite_vectors == 0] == 0)
+
+        self.assertAlmostEqual(near, 1 / (1 + np.exp(-1)), delta=.02)
+        self.assertAlmostEqual(np.mean(bite_hosts[bite_vectors == 1] == 2), .5, delta=.02)
+
+    def test_vector_bites(self):
+        hosts = HostArrays(10, ['a'])
+        vectors = VectorArrays(1, ['a'])
+        vectors.state[:] = VECTOR_INFECTED
+        links = LinkGraph([0], [4], [0.], 1)
+        state = SimulationState(hosts, vectors, np.random.default_rng(1), links=links)
+
+        vector_bites(state, {'BITING_RATE': 3, 'BITE_LIMIT': 3, 'BETA': 1., 'TAU': 1.})
+
+        self.assertEqual(np.flatnonzero(hosts.state == EXPOSED).tolist(), [4])
+        self.assertEqual(np.count_nonzero(hosts.state == SUSCEPTIBLE), 9)
+
+
+class testGridBites(unittest.TestCase):
+
+    def grid_links(self, host_x, vector_x, vector_range, distance_scale=None):
+        hosts = HostArrays(len(host_x), ['a'])
+        hosts.x[:] = host_x
+        vectors = VectorArrays(len(vector_x), ['a'])
+        vectors.x[:] = vector_x
+        vectors.range[:] = vector_range
+
+        return GridLinks(GridIndex(hosts.x, hosts.y, max(vector_range)), vectors, distance_scale)
+
+    def test_targets_in_range(self):
+        # Hosts 0 and 3 are in vector 0's block of cells but out of its range
+        links = self.grid_links([0, 5, 12, 15, 40], [7, 40, 30], [6, 6, 6])
+
+        bite_vectors, bite_hosts = draw_grid_bites(np.arange(3), 500, links, np.random.default_rng(3))
+
+        self.assertEqual(set(bite_hosts[bite_vectors == 0]), {1, 2})
+        self.assertEqual(set(bite_hosts[bite_vectors == 1]), {4})
+        self.assertFalse(np.any(bite_vectors == 2))  # Nobody within range
+
+    def test_distance_weighting(self):
+        links = self.grid_links([0, 100, 300, 400, 500], [0], [100], distance_scale=100.)
+
+        for tries in (8, 0):  # Picked from the block, or every bite from the hosts listed in range
+            bite_vectors, bite_hosts = draw_grid_bites(np.array([0]), 20000, links, np.random.default_rng(6), tries)
+
+            self.assertEqual(bite_hosts.shape[0], 20000)
+            self.assertAlmostEqual(np.mean(bite_hosts == 0), 1 / (1 + np.exp(-1)), delta=.02)
+
+    def test_update(self):
+        links = self.grid_links([0, 5, 40], [1, 40], [6, 6])
+        links.vectors.x[:] = [3, 2]
+
+        changed = links.update(np.arange(2))
+        fresh = GridLinks(links.grid, links.vectors)
+
+        self.assertEqual(changed.tolist(), [1])
+        self.assertTrue(np.array_equal(links.start, fresh.start))
+        self.assertTrue(np.array_equal(links.cumulative, fresh.cumulative))
+
+
+if __name__ == '__main__':
+    unittest.main()
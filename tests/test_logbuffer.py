@@ -0,0 +1,63 @@
+"""
+unit tests for the buffered daily log
+"""
+
+import unittest
+
+import numpy as np
+
+from model.arrays import HostArrays, VectorArrays, INFECTED, VECTOR_INFECTED
+from model.logbuffer import LogBuffer, LOG_COLUMNS
+
+
+class testLogBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.hosts = HostArrays(3, ['a', 'b'])
+        self.hosts.subregion[:] = [0, 1, 1]
+        self.vectors = VectorArrays(2, ['a', 'b'])
+        self.vectors.subregion[:] = [1, 1]
+
+    def test_record(self):
+        log = LogBuffer(3, self.hosts.subregions)
+        self.hosts.state[2] = INFECTED
+        self.vectors.state[0] = VECTOR_INFECTED
+        log.record(1, self.hosts.counts(), self.vectors.counts())
+
+        columns = log.columns(1, 2)
+        self.assertEqual(columns['Day'].tolist(), [1, 1])
+        self.assertEqual(columns['subregion'].tolist(), ['a', 'b'])
+        self.assertEqual(columns['nSusceptible'].tolist(), [1, 1])
+        self.assertEqual(columns['nInfected'].tolist(), [0, 1])
+        self.assertEqual(columns['nInfectedVectors'].tolist(), [0, 1])
+        self.assertEqual(columns['nSuscVectors'].tolist(), [0, 0])
+        self.assertEqual(set(columns), set(LOG_COLUMNS) | {'Day', 'subregion'})
+
+    def test_flush(self):
+        log = LogBuffer(5, self.hosts.subregions)
+        written = []
+
+        for day in range(3):
+            log.record(day, self.hosts.counts(), self.vectors.counts())
+        self.assertEqual(log.flush(written.append), 3)
+        self.assertEqual(log.flush(written.append), 0)  # Nothing new since the last flush
+
+        log.record(3, self.hosts.counts(), self.vectors.counts())
+        log.flush(written.append)
+
+        self.assertEqual(len(written), 2)
+        self.assertEqual(np.concatenate([w['Day'] for w in written]).tolist(), [0, 0, 1, 1, 2, 2, 3, 3])
+
+    def test_flush_until(self):
+        log = LogBuffer(5, self.hosts.subregions)
+        written = []
+
+        for day in range(4):
+            log.record(day, self.hosts.counts(), self.vectors.counts())
+        self.assertEqual(log.flush(written.append, 2), 2)
+        self.assertEqual(log.flushed, 2)
+        self.assertEqual(log.flush(written.append, 9), 2)  # Never past the recorded days
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+unit tests for home/work host mobility
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from model.arrays import HostArrays, VectorArrays, SUSCEPTIBLE, EXPOSED, VECTOR_INFECTED
+from model.engine import SimulationState, step_day
+from model.mobility import ODMatrix, HostMobility, load_od_matrix
+from helpers import PARAMS
+
+BITE_PARAMS = dict(PARAMS, BETA=1., TAU=0., KAPPA=0.)  # Every infected bite exposes, and nothing else spreads
+
+
+class testODMatrix(unittest.TestCase):
+
+    def test_csr(self):
+        od = ODMatrix([2, 0, 0, 2, 1], [1, 2, 1, 1, 1], [3., 1., 2., 4., 0.], 3)
+
+        self.assertEqual(od.indptr.tolist(), [0, 2, 2, 3])
+        self.assertEqual(od.indices.tolist(), [1, 2, 1])
+        self.assertEqual(od.data.tolist(), [2., 1., 7.])  # Duplicates summed, the zero flow dropped
+        self.assertEqual(od.row_totals().tolist(), [3., 0., 7.])
+
+    def test_draw_destinations(self):
+        od = ODMatrix([0, 0, 2], [1, 2, 0], [300., 100., 50.], 3)
+        home = np.repeat([0, 1, 2], 1000)
+
+        daytime = od.draw_destinations(home, np.array([1000, 1000, 20]), np.random.default_rng(3))
+
+        self.assertAlmostEqual(np.mean(daytime[:1000] == 1), .3, delta=.04)
+        self.assertAlmostEqual(np.mean(daytime[:1000] == 2), .1, delta=.03)
+        self.assertTrue(np.all(daytime[1000:2000] == 1))  # No flows out, so everybody stays home
+        self.assertTrue(np.all(daytime[2000:] == 0))  # More commuters than residents: everybody goes
+
+    def test_load(self):
+        filename = os.path.join(tempfile.mkdtemp(), 'od.csv')
+        with open(filename, 'w') as f:
+            f.write('origin,destination,flow\na,b,5\nb,a,2\nb,elsewhere,9\n')
+
+        od = load_od_matrix(filename, ['a', 'b'])
+
+        self.assertEqual(od.indices.tolist(), [1, 0])
+        self.assertEqual(od.data.tolist(), [5., 2.])
+
+
+class testHostMobility(unittest.TestCase):
+
+    def setUp(self):
+        # Everybody in subregion 0 works in subregion 1, where the only vectors are
+        self.hosts = HostArrays(10, ['a', 'b'])
+        self.hosts.subregion[5:] = 1
+        self.vectors = VectorArrays(4, ['a', 'b'])
+        self.vectors.subregion[:] = 1
+        self.vectors.state[:] = VECTOR_INFECTED
+        self.vectors.lifetime[:] = 100
+        od = ODMatrix([0], [1], [5.], 2)
+        self.mobility = HostMobility(od, self.hosts, np.random.default_rng(1), work_days=5)
+
+    def test_index(self):
+        self.assertEqual(self.mobility.commuters(self.hosts), 5)
+        self.assertEqual(self.mobility.day_index.sizes().tolist(), [0, 10])
+        self.assertIs(self.mobility.index(6, 'home'), 'home')  # Weekend
+
+    def test_daytime_bites(self):
+        state = SimulationState(self.hosts, self.vectors, np.random.default_rng(2), mobility=self.mobility)
+
+        step_day(state, 0, BITE_PARAMS)
+
+        self.assertTrue(np.any(self.hosts.state[:5] == EXPOSED))  # Bitten at work, away from home
+
+    def test_weekend_at_home(self):
+        state = SimulationState(self.hosts, self.vectors, np.random.default_rng(2), mobility=self.mobility)
+
+        step_day(state, 5, BITE_PARAMS)
+
+        self.assertTrue(np.all(self.hosts.state[:5] == SUSCEPTIBLE))
+
+
+if __name__ == '__main__':
+    unittest.main()
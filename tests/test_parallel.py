@@ -0,0 +1,61 @@
+"""
+unit tests for the subregion process pool
+"""
+
+import unittest
+
+import numpy as np
+
+from model.arrays import NO_PARTNER
+from model.parallel import ParallelSimulation, assign_workers, split_subregions
+from helpers import OUTBREAK_PARAMS, make_population
+
+
+class testSplitSubregions(unittest.TestCase):
+
+    def test_partners(self):
+        hosts, vectors = make_population(600, 900, 4, seed=3)  # Some couples live apart
+        parts = split_subregions(hosts, vectors)
+
+        self.assertEqual(sum(len(h) for h, v in parts), len(hosts))
+        self.assertEqual(sum(len(v) for h, v in parts), len(vectors))
+
+        for part, _ in parts:
+            linked = np.flatnonzero(part.partner != NO_PARTNER)
+            # Local links point at the same spouse as in the full store, where id - 1 is the position
+            self.assertTrue(np.array_equal(hosts.partner[part.id[linked] - 1], part.id[part.partner[linked]] - 1))
+
+    def test_assign_workers(self):
+        owned = assign_workers(np.array([5, 1, 4, 2]), 2)
+
+        self.assertEqual(sorted(np.concatenate(owned).tolist()), [0, 1, 2, 3])
+        self.assertEqual([sorted(o.tolist()) for o in owned], [[0, 1], [2, 3]])
+
+
+class testParallelSimulation(unittest.TestCase):
+
+    def run_days(self, workers, days=15):
+        hosts, vectors = make_population(600, 900, 4, seed=3)
+        daily = []
+
+        with ParallelSimulation(hosts, vectors, OUTBREAK_PARAMS, days, seed=11, workers=workers) as runner:
+            for day in range(days):
+                daily.append(runner.step(day))
+            runner.gather()
+
+        return hosts, vectors, daily
+
+    def test_workers_agree(self):
+        hosts_1, vectors_1, daily_1 = self.run_days(1)
+        hosts_3, vectors_3, daily_3 = self.run_days(3)
+
+        for (h1, v1), (h3, v3) in zip(daily_1, daily_3):
+            self.assertTrue(np.array_equal(h1, h3))
+            self.assertTrue(np.array_equal(v1, v3))
+        self.assertTrue(np.array_equal(hosts_1.state, hosts_3.state))
+        self.assertTrue(np.array_equal(vectors_1.state, vectors_3.state))
+        self.assertTrue(np.array_equal(hosts_1.counts(), daily_1[-1][0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
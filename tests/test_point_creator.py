@@ -0,0 +1,73 @@
+"""
+unit tests for batched point sampling
+"""
+
+import unittest
+
+import numpy as np
+
+from gis.point_creator import sample_points, triangle_areas, triangulate
+from helpers import points_in_poly, polygon_area
+
+
+class testSamplePoints(unittest.TestCase):
+
+    def test_all_inside(self):
+        subregion = {
+            'bbox': [0, 0, 10, 10],
+            'vertices': [[0, 0], [10, 0], [10, 10], [5, 2], [0, 10]]
+        }
+
+        points = sample_points(subregion, 5000, np.random.default_rng(1))
+
+        self.assertEqual(points.shape, (5000, 2))
+        self.assertTrue(points_in_poly(points[:, 0], points[:, 1], subregion['vertices']).all())
+
+    def test_empty(self):
+        subregion = {'bbox': [0, 0, 1, 1], 'vertices': [[0, 0], [1, 0], [1, 1], [0, 1]]}
+
+        self.assertEqual(sample_points(subregion, 0).shape, (0, 2))
+
+    def test_hole(self):
+        # Square with a square hole, as two shapefile parts
+        subregion = {
+            'bbox': [0, 0, 10, 10],
+            'vertices': [[0, 0], [0, 10], [10, 10], [10, 0], [0, 0], [4, 4], [6, 4], [6, 6], [4, 6], [4, 4]],
+            'parts': [0, 5]
+        }
+
+        points = sample_points(subregion, 20000, np.random.default_rng(2))
+        in_hole = (np.abs(points[:, 0] - 5) < 1) & (np.abs(points[:, 1] - 5) < 1)
+
+        self.assertFalse(in_hole.any())
+        self.assertTrue(((points >= 0) & (points <= 10)).all())
+
+    def test_parts(self):
+        # Two unit squares far apart get points in proportion to their areas
+        subregion = {
+            'bbox': [0, 0, 12, 2],
+            'vertices': [[0, 0], [0, 1], [1, 1], [1, 0], [0, 0], [10, 0], [10, 2], [12, 2], [12, 0], [10, 0]],
+            'parts': [0, 5]
+        }
+
+        points = sample_points(subregion, 10000, np.random.default_rng(3))
+
+        self.assertAlmostEqual(np.mean(points[:, 0] > 5), .8, delta=.02)
+
+
+class testTriangulate(unittest.TestCase):
+
+    def test_area(self):
+        polygon = [[0, 0], [10, 0], [10, 10], [5, 2], [0, 10]]
+        triangles = triangulate(polygon)
+
+        self.assertAlmostEqual(triangle_areas(triangles).sum(), polygon_area(polygon))
+
+    def test_hole_area(self):
+        vertices = [[0, 0], [0, 10], [10, 10], [10, 0], [0, 0], [4, 4], [6, 4], [6, 6], [4, 6], [4, 4]]
+
+        self.assertAlmostEqual(triangle_areas(triangulate(vertices, [0, 5])).sum(), 96.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+unit tests for population generation helpers
+"""
+
+import unittest
+
+import numpy as np
+
+from model.arrays import NO_PARTNER
+from model.population import choose_seeds, chunked, in_chunk, pair_spouses
+
+
+class testChooseSeeds(unittest.TestCase):
+
+    def test_disjoint(self):
+        infected, importers, import_days = choose_seeds(100, 5, 25, 365, np.random.default_rng(2))
+
+        self.assertEqual(infected.shape[0], 5)
+        self.assertEqual(importers.shape[0], 25)
+        self.assertEqual(len(set(infected.tolist()) | set(importers.tolist())), 30)
+        self.assertTrue(((import_days >= 1) & (import_days < 365)).all())
+
+    def test_small_population(self):
+        infected, importers, import_days = choose_seeds(10, 5, 25, 365)
+
+        self.assertEqual(infected.shape[0] + importers.shape[0], 10)
+
+
+class testPairSpouses(unittest.TestCase):
+
+    def test_symmetric(self):
+        rng = np.random.default_rng(5)
+        age = rng.integers(0, 99, 100000)
+
+        partner = pair_spouses(age >= 18, .52, rng)
+        married = np.flatnonzero(partner != NO_PARTNER)
+
+        self.assertTrue((partner[partner[married]] == married).all())
+        self.assertTrue((partner[married] != married).all())
+        self.assertTrue((age[married] >= 18).all())
+        self.assertAlmostEqual(married.shape[0] / np.count_nonzero(age >= 18), .52, delta=.01)
+
+    def test_nobody_eligible(self):
+        self.assertEqual(pair_spouses(np.zeros(3, dtype=bool)).tolist(), [NO_PARTNER] * 3)
+
+
+class testChunks(unittest.TestCase):
+
+    def test_chunked(self):
+        chunks = list(chunked({'a': np.arange(7), 'b': np.arange(7) * 2}, 3))
+
+        self.assertEqual([c['a'].tolist() for c in chunks], [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(chunks[2]['b'].tolist(), [12])
+
+    def test_in_chunk(self):
+        local, mask = in_chunk(np.array([1, 12, 15, 30]), 10, 10)
+
+        self.assertEqual(local.tolist(), [2, 5])
+        self.assertEqual(mask.tolist(), [False, True, True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+unit tests for decoding Humans and vectors rows into the columnar stores
+"""
+
+import unittest
+
+from model.arrays import SUSCEPTIBLE, EXPOSED, INFECTED, RECOVERED, DEAD, NO_IMPORT, NO_PARTNER, UNBORN, \
+    VECTOR_SUSCEPTIBLE, VECTOR_INFECTED, REMOVED
+from model.rows import compact_layout, hosts_from_rows, vectors_from_rows
+
+
+def host_row(pk, unique_id=None, linked_to=None, linked_to_id=None, subregion='a', state=SUSCEPTIBLE):
+    return (pk, unique_id, linked_to, linked_to_id, subregion, None, None, None, float(pk), 0., state)
+
+
+def vector_row(pk, *status):
+    return (pk, 'a', 0, 10, 50., float(pk), 0.) + status
+
+
+class testLayout(unittest.TestCase):
+
+    def test_compact(self):
+        self.assertTrue(compact_layout(['id', 'uniqueID', 'linkedTo', 'linkedToID', 'state', 'subregion']))
+        self.assertTrue(compact_layout(['id', 'uniqueID', 'state', 'birthday', 'lifetime']))
+
+    def test_legacy(self):
+        # Columns of tables built before sql/compact-state.sql
+        self.assertFalse(compact_layout(['id', 'uniqueID', 'linkedTo', 'susceptible', 'exposed', 'infected',
+                                         'recovered', 'subregion']))
+        self.assertFalse(compact_layout(['id', 'uniqueID', 'alive', 'susceptible', 'infected', 'removed']))
+
+
+class testHostRows(unittest.TestCase):
+
+    def test_integer_ids(self):
+        # Ids with gaps, as after deletes; links point at ids, not positions
+        rows = [host_row(3, linked_to_id=10), host_row(5, subregion='b', state=INFECTED),
+                host_row(10, linked_to_id=3), host_row(12, linked_to_id=99)]
+
+        hosts = hosts_from_rows(rows, 4)
+
+        self.assertEqual(hosts.id.tolist(), [3, 5, 10, 12])
+        self.assertEqual(hosts.partner.tolist(), [2, NO_PARTNER, 0, NO_PARTNER])  # Id 99 isn't in the table
+        self.assertEqual(hosts.subregions, ['a', 'b'])
+        self.assertEqual(hosts.subregion.tolist(), [0, 1, 0, 0])
+        self.assertEqual(hosts.state.tolist(), [SUSCEPTIBLE, INFECTED, SUSCEPTIBLE, SUSCEPTIBLE])
+        self.assertEqual(hosts.import_day.tolist(), [NO_IMPORT] * 4)
+
+    def test_uuid_links(self):
+        # Tables built with uuid identities have no linkedToID; a spouse may come before or after its partner
+        rows = [host_row(1, 'u-a', linked_to='u-c'), host_row(2, 'u-b'), host_row(3, 'u-c', linked_to='u-a'),
+                host_row(4, 'u-d', linked_to='u-gone')]
+
+        hosts = hosts_from_rows(rows, 4)
+
+        self.assertEqual(hosts.partner.tolist(), [2, NO_PARTNER, 0, NO_PARTNER])
+
+
+class testStates(unittest.TestCase):
+
+    def test_host_codes(self):
+        codes = [SUSCEPTIBLE, EXPOSED, INFECTED, RECOVERED, DEAD]
+
+        hosts = hosts_from_rows([host_row(i + 1, state=code) for i, code in enumerate(codes)], len(codes))
+
+        self.assertEqual(hosts.state.tolist(), codes)
+
+    def test_host_strings(self):
+        # susceptible, exposed, infected, recovered, as the old Humans rows kept them
+        status = [('True', 'False', 'False', 'False'), ('False', 'True', 'False', 'False'),
+                  ('False', 'False', 'True', 'False'), ('False', 'False', 'False', 'True'),
+                  ('False', 'False', 'False', 'False')]
+        rows = [host_row(i + 1)[:-1] + s for i, s in enumerate(status)]
+
+        hosts = hosts_from_rows(rows, len(rows), compact=False)
+
+        self.assertEqual(hosts.state.tolist(), [SUSCEPTIBLE, EXPOSED, INFECTED, RECOVERED, DEAD])
+
+    def test_vector_codes(self):
+        codes = [UNBORN, VECTOR_SUSCEPTIBLE, VECTOR_INFECTED, REMOVED]
+
+        vectors = vectors_from_rows([vector_row(i + 1, code) for i, code in enumerate(codes)], len(codes))
+
+        self.assertEqual(vectors.state.tolist(), codes)
+        self.assertEqual(vectors.range.tolist(), [50.] * 4)
+
+    def test_vector_strings(self):
+        # alive, susceptible, infected, removed
+        status = [('False', 'False', 'False', 'False'), ('True', 'True', 'False', 'False'),
+                  ('True', 'False', 'True', 'False'), ('False', 'False', 'True', 'True')]
+        rows = [vector_row(i + 1, *s) for i, s in enumerate(status)]
+
+        vectors = vectors_from_rows(rows, len(rows), ['b'], compact=False)
+
+        self.assertEqual(vectors.state.tolist(), [UNBORN, VECTOR_SUSCEPTIBLE, VECTOR_INFECTED, REMOVED])
+        self.assertEqual(vectors.subregions, ['b', 'a'])
+        self.assertEqual(vectors.subregion.tolist(), [1] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+"""
+unit tests for the vector birth/death schedule
+"""
+
+import unittest
+
+from model.arrays import VectorArrays, UNBORN, VECTOR_SUSCEPTIBLE, REMOVED
+from model.schedule import VectorSchedule
+
+
+class testVectorSchedule(unittest.TestCase):
+
+    def test_buckets(self):
+        schedule = VectorSchedule([1, 3, 1, 0, 9], [2, 2, 15, 4, 1], 10, season_start=1, season_end=8)
+
+        self.assertEqual(schedule.born(1).tolist(), [0, 2])
+        self.assertEqual(schedule.born(0).tolist(), [])  # Before the season
+        self.assertEqual(schedule.born(9).tolist(), [])  # After the season
+        self.assertEqual(schedule.expiring(3).tolist(), [0])
+        self.assertEqual(schedule.expiring(5).tolist(), [1])
+        self.assertEqual(schedule.expiring(8).tolist(), [2])  # Cut short by the end of the season
+
+    def test_lifecycle(self):
+        vectors = VectorArrays(1)
+        vectors.birthday[:] = 2
+        vectors.lifetime[:] = 3
+        schedule = VectorSchedule(vectors.birthday, vectors.lifetime, 10)
+        states = []
+
+        for day in range(8):
+            schedule.hatch(vectors, day)
+            states.append(int(vectors.state[0]))
+            schedule.expire(vectors, day)
+
+        self.assertEqual(states, [UNBORN, UNBORN] + [VECTOR_SUSCEPTIBLE] * 4 + [REMOVED] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+unit tests for the shared column store
+"""
+
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from model.arrays import HostArrays
+from model.shared import SharedColumns, publish_store, view_store
+
+
+def column_sum(spec, name, queue):
+    attached = SharedColumns.attach(spec)
+    queue.put(float(attached.arrays[name].sum()))
+    attached.close()
+
+
+class testSharedColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.hosts = HostArrays(100, ['a'])
+        self.hosts.id[:] = np.arange(1, 101)
+        self.hosts.x[:] = np.linspace(0, 1, 100)
+
+    def test_publish(self):
+        shared = publish_store(self.hosts)
+        self.addCleanup(shared.close)
+
+        self.assertNotIn('state', shared.arrays)  # Mutable columns stay private
+        self.assertTrue(np.array_equal(shared.arrays['x'], self.hosts.x))
+
+        attached = SharedColumns.attach(shared.spec)
+        self.assertTrue(np.array_equal(attached.arrays['id'], self.hosts.id))
+        with self.assertRaises(ValueError):
+            attached.arrays['id'][0] = 0
+        attached.close()
+
+    def test_worker(self):
+        shared = publish_store(self.hosts)
+        self.addCleanup(shared.close)
+        queue = multiprocessing.Queue()
+
+        process = multiprocessing.Process(target=column_sum, args=(shared.spec, 'x', queue))
+        process.start()
+        process.join()
+
+        self.assertAlmostEqual(queue.get(), self.hosts.x.sum())
+
+    def test_memmap(self):
+        filename = os.path.join(tempfile.mkdtemp(), 'hosts.bin')
+        shared = publish_store(self.hosts, filename)
+
+        attached = SharedColumns.attach(shared.spec)
+        self.assertTrue(np.array_equal(attached.arrays['x'], self.hosts.x))
+        attached.close()
+        shared.close()
+
+    def test_view_store(self):
+        shared = publish_store(self.hosts)
+        self.addCleanup(shared.close)
+        columns = dict(shared.arrays, state=np.zeros(100, dtype=np.uint8), day_of_exp=np.zeros(100, dtype=np.int16),
+                       day_of_inf=np.zeros(100, dtype=np.int16))
+
+        store = view_store(HostArrays, columns, ['a'], 10, 20)
+
+        self.assertEqual(len(store), 10)
+        self.assertEqual(store.id.tolist(), list(range(11, 21)))
+        self.assertTrue(np.shares_memory(store.x, shared.arrays['x']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+unit tests for the parameter sweep engine
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from model.arrays import INFECTED
+from model.sweep import SweepStore, grid_design, latin_hypercube, run_sweep
+from helpers import OUTBREAK_PARAMS, make_population
+
+
+class testDesigns(unittest.TestCase):
+
+    def test_grid(self):
+        design = grid_design({'BETA': [.1, .2], 'BITE_LIMIT': [1, 2, 3]})
+
+        self.assertEqual(len(design), 6)
+        self.assertIn({'BETA': .2, 'BITE_LIMIT': 3}, design)
+
+    def test_latin_hypercube(self):
+        design = latin_hypercube({'BETA': (0., 1.), 'BITE_LIMIT': (1, 10)}, 10, np.random.default_rng(1))
+        beta = np.array([p['BETA'] for p in design])
+
+        # One point in each tenth of the range
+        self.assertEqual(sorted(np.floor(beta * 10).astype(int).tolist()), list(range(10)))
+        self.assertEqual(sorted(p['BITE_LIMIT'] for p in design), list(range(1, 11)))
+
+
+class testRunSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_incremental(self):
+        hosts, vectors = make_population()
+        store = SweepStore(self.directory)
+
+        computed = run_sweep(hosts, vectors, OUTBREAK_PARAMS, grid_design({'BETA': [0., .5]}), 6, store, replicates=2,
+                             seed=1, workers=1)
+        self.assertEqual(computed, 2)
+
+        # Reopening the store finds the old points; only the new one runs
+        store = SweepStore(self.directory)
+        computed = run_sweep(hosts, vectors, OUTBREAK_PARAMS, grid_design({'BETA': [0., .5, .9]}), 6, store,
+                             replicates=2, seed=1, workers=1)
+        self.assertEqual(computed, 1)
+        self.assertEqual(len(store), 3)
+
+        point = [p for p in store.points() if p['BETA'] == 0.][0]
+        self.assertEqual(store.load(point).shape, (2, 7, 3, 9))
+
+    def test_new_population(self):
+        hosts, vectors = make_population()
+        store = SweepStore(self.directory)
+        run_sweep(hosts, vectors, OUTBREAK_PARAMS, [{'BETA': .5}], 6, store, seed=1, workers=1)
+
+        # Same sizes, rebuilt tables: the stored point is not reused
+        hosts.state[15:30] = INFECTED
+        computed = run_sweep(hosts, vectors, OUTBREAK_PARAMS, [{'BETA': .5}], 6, store, seed=1, workers=1)
+
+        self.assertEqual(computed, 1)
+        self.assertEqual(len(store), 2)
+
+    def test_unknown_parameter(self):
+        hosts, vectors = make_population()
+
+        with self.assertRaises(ValueError):
+            run_sweep(hosts, vectors, OUTBREAK_PARAMS, [{'NOT_A_PARAMETER': 1}], 6, SweepStore(self.directory))
+
+    def test_unread_parameter(self):
+        # GAMMA is a module constant in simulation.py, but no step of the run reads it
+        hosts, vectors = make_population()
+        store = SweepStore(self.directory)
+
+        with self.assertRaises(ValueError):
+            run_sweep(hosts, vectors, dict(OUTBREAK_PARAMS, GAMMA=.3), [{'GAMMA': .1}, {'GAMMA': .5}], 6, store)
+        self.assertEqual(len(store), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,9 +3,13 @@ unit tests
 """
 
 import unittest
-from simulation import point_in_poly
 
-class testPointInPolygon(unittest.TestCase):
+import numpy as np
+
+from gis.point_creator import sample_points, triangle_areas, triangulate
+from helpers import points_in_poly, polygon_area
+
+class testPolygonSampling(unittest.TestCase):
 
 
     def test_inside(self):
@@ -66,19 +70,21 @@ class testPointInPolygon(unittest.TestCase):
                     (715965.7037724331, 2117192.629475899), (715965.8088724166, 2117167.790279988),
                     (715966.1484723613, 2117099.150391288)]
 
-        point_x = 715966
-        point_y = 2117095
+        points = sample_points({'vertices': polygon}, 2000, np.random.default_rng(3))
 
-        self.assertTrue(point_in_poly(point_x, point_y, polygon))
+        self.assertTrue(points_in_poly(points[:, 0], points[:, 1], polygon).all())
+        self.assertAlmostEqual(triangle_areas(triangulate(polygon)).sum() / polygon_area(polygon), 1, places=6)
 
     def test_outside(self):
-        polygon = [[0, 10], [10, 10], [10, 0], [0, 0]]
+        # Square with a square hole; nothing may land in the hole
+        polygon = [[0, 10], [10, 10], [10, 0], [0, 0], [4, 4], [4, 6], [6, 6], [6, 4]]
+        hole = polygon[4:]
 
-        point_x = 0
-        point_y = 5
+        points = sample_points({'vertices': polygon, 'parts': [0, 4]}, 2000, np.random.default_rng(3))
 
-        self.assertFalse(point_in_poly(point_x, point_y, polygon))
+        self.assertFalse(points_in_poly(points[:, 0], points[:, 1], hole).any())
+        self.assertTrue(np.all((points >= 0) & (points <= 10)))
 
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()